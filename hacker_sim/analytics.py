@@ -0,0 +1,238 @@
+"""Bounded-memory streaming statistics over simulation events."""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import multiprocessing as mp
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .content.registry import ContentStore
+from .headless import Event, run_career
+
+TRACKED_METRICS = ("credits", "age", "law_watch")
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with relative error ``alpha`` (DDSketch-style).
+
+    Memory is capped at ``max_buckets`` per sign; when full the two lowest
+    buckets are folded together, which only coarsens the far low tail.
+    Sketches with equal ``alpha`` merge by adding bucket counts.
+    """
+
+    def __init__(self, alpha: float = 0.01, max_buckets: int = 2048) -> None:
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self._gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self._pos: Dict[int, int] = {}
+        self._neg: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1) -> None:
+        self.count += weight
+        self.total += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value == 0:
+            self.zero += weight
+            return
+        buckets = self._pos if value > 0 else self._neg
+        key = math.ceil(math.log(abs(value)) / self._log_gamma)
+        buckets[key] = buckets.get(key, 0) + weight
+        if len(buckets) > self.max_buckets:
+            self._collapse(buckets)
+
+    @staticmethod
+    def _collapse(buckets: Dict[int, int]) -> None:
+        lowest, second = sorted(buckets)[:2]
+        buckets[second] += buckets.pop(lowest)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.alpha != self.alpha:
+            raise ValueError("精度不同的分位数草图无法合并")
+        for mine, theirs in ((self._pos, other._pos), (self._neg, other._neg)):
+            for key, weight in theirs.items():
+                mine[key] = mine.get(key, 0) + weight
+            while len(mine) > self.max_buckets:
+                self._collapse(mine)
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self._neg, reverse=True):
+            seen += self._neg[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._pos):
+            seen += self._pos[key]
+            if seen > rank:
+                return self._value(key)
+        return self.max
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class Reservoir:
+    """Bottom-k sample: keeps the ``size`` items with the smallest hash priority.
+
+    Priorities come from a stable key (the career's seed/episode), so the
+    sample is uniform, independent of arrival order, and merging two
+    reservoirs gives exactly the reservoir of the combined stream. A key
+    already in the sample (the same career seen twice, e.g. from
+    overlapping runs) is counted but not sampled again.
+    """
+
+    def __init__(self, size: int = 64) -> None:
+        if size < 0:
+            raise ValueError("样本容量不能为负")
+        self.size = size
+        self.seen = 0
+        self._heap: List[Tuple[float, str, dict]] = []  # max-heap on priority via negation
+        self._keys: Set[str] = set()
+
+    @staticmethod
+    def priority(key: str) -> float:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64
+
+    def offer(self, key: str, item: dict, seen: int = 1) -> None:
+        self.seen += seen
+        if key in self._keys:
+            return
+        prio = self.priority(key)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, (-prio, key, item))
+            self._keys.add(key)
+        elif self._heap and prio < -self._heap[0][0]:
+            self._keys.discard(heapq.heapreplace(self._heap, (-prio, key, item))[1])
+            self._keys.add(key)
+
+    def merge(self, other: "Reservoir") -> "Reservoir":
+        for neg_prio, key, item in other._heap:
+            self.offer(key, item, seen=0)
+        self.seen += other.seen
+        return self
+
+    def items(self) -> List[dict]:
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class CareerAggregate:
+    """Mergeable summary of any number of careers in fixed memory.
+
+    Memory grows only with the number of distinct contract and crisis ids,
+    which is bounded by the content registries.
+    """
+
+    def __init__(self, sample_size: int = 64, alpha: float = 0.01) -> None:
+        self.careers = 0
+        self.actions = 0
+        self.sketches = {metric: QuantileSketch(alpha) for metric in TRACKED_METRICS}
+        self.sample = Reservoir(sample_size)
+        self.crisis_triggers: Dict[str, int] = {}
+        self.crisis_resolved: Dict[str, List[int]] = {}
+        self.contract_outcomes: Dict[str, List[int]] = {}  # id -> [success, failure, rejected]
+
+    def consume(self, events: Iterable[Event]) -> "CareerAggregate":
+        for event in events:
+            tag = event[0]
+            if tag == "action":
+                self.actions += 1
+                if event[1] == "contract":
+                    outcome = self.contract_outcomes.setdefault(event[2], [0, 0, 0])
+                    outcome[{1: 0, 0: 1}.get(event[3], 2)] += 1
+            elif tag == "crisis":
+                self.crisis_triggers[event[1]] = self.crisis_triggers.get(event[1], 0) + 1
+            elif tag == "resolved":
+                tally = self.crisis_resolved.setdefault(event[1], [0, 0])
+                tally[0 if event[2] else 1] += 1
+            elif tag == "career":
+                summary = event[1]
+                self.careers += 1
+                for metric, sketch in self.sketches.items():
+                    sketch.add(summary[metric])
+                self.sample.offer(f"{summary['seed']}:{summary['episode']}", summary)
+        return self
+
+    def merge(self, other: "CareerAggregate") -> "CareerAggregate":
+        self.careers += other.careers
+        self.actions += other.actions
+        for metric, sketch in self.sketches.items():
+            sketch.merge(other.sketches[metric])
+        self.sample.merge(other.sample)
+        for key, count in other.crisis_triggers.items():
+            self.crisis_triggers[key] = self.crisis_triggers.get(key, 0) + count
+        for mine, theirs in ((self.crisis_resolved, other.crisis_resolved), (self.contract_outcomes, other.contract_outcomes)):
+            for key, counts in theirs.items():
+                current = mine.setdefault(key, [0] * len(counts))
+                for idx, value in enumerate(counts):
+                    current[idx] += value
+        return self
+
+    def summary(self, quantiles: Sequence[float] = (0.1, 0.5, 0.9, 0.99)) -> dict:
+        return {
+            "careers": self.careers,
+            "actions": self.actions,
+            "metrics": {
+                metric: {"mean": sketch.mean, **{f"p{int(q * 100)}": sketch.quantile(q) for q in quantiles}}
+                for metric, sketch in self.sketches.items()
+            },
+            "crisis_triggers": dict(self.crisis_triggers),
+            "crisis_resolved": {key: list(value) for key, value in self.crisis_resolved.items()},
+            "contract_outcomes": {key: list(value) for key, value in self.contract_outcomes.items()},
+            "sample": self.sample.items(),
+        }
+
+
+# ----------------------------------------------------------------------
+# Pipelines
+def career_stream(seeds: Iterable[int], steps: int, episodes: int = 1, content: Optional[ContentStore] = None) -> Iterator[Event]:
+    for seed in seeds:
+        for episode in range(episodes):
+            yield from run_career(seed, steps, episode, content=content)
+
+
+def _aggregate_chunk(args: Tuple[Sequence[int], int, int, int]) -> CareerAggregate:
+    seeds, steps, episodes, sample_size = args
+    return CareerAggregate(sample_size).consume(career_stream(seeds, steps, episodes))
+
+
+def aggregate_careers(seeds: Sequence[int], steps: int, episodes: int = 1, workers: int = 1,
+                      chunk: int = 64, sample_size: int = 64) -> CareerAggregate:
+    """Simulate careers for ``seeds`` and fold them into one aggregate.
+
+    With ``workers > 1`` each process aggregates a chunk of seeds and only the
+    partial aggregates cross the process boundary.
+    """
+    chunks = [(seeds[i:i + chunk], steps, episodes, sample_size) for i in range(0, len(seeds), chunk)]
+    total = CareerAggregate(sample_size)
+    if workers <= 1:
+        for args in chunks:
+            total.merge(_aggregate_chunk(args))
+        return total
+    with mp.get_context().Pool(workers) as pool:
+        for partial in pool.imap_unordered(_aggregate_chunk, chunks):
+            total.merge(partial)
+    return total
@@ -0,0 +1,356 @@
+"""Compact, array-backed player records for large populations."""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from array import array
+from dataclasses import asdict, fields
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+from .content import GEAR_CATALOG, TASK_CONTRACTS, TRAINING_MODULES, UNLOCK_ROOT
+from .models import Attributes, ChangeCallback, Player, Reputation, Resources
+from .skill_graph import iter_bits
+
+TYPECODE = "q"
+SKILL_KEYS: Tuple[str, ...] = tuple(Player.default_skills())
+SECTIONS: Tuple[Tuple[str, type], ...] = (("attributes", Attributes), ("reputation", Reputation), ("resources", Resources))
+SCALARS: Tuple[str, ...] = ("age", "events_since_age", "day", "hour")
+# Unlock nodes of the built-in content, one bit each in the ``unlocks.*``
+# words (63 bits per word keeps them non-negative); nodes added by content
+# packs live next to the view like extra skills.
+UNLOCK_KEYS: Tuple[str, ...] = tuple(dict.fromkeys(
+    (UNLOCK_ROOT,)
+    + tuple(m.module_id for m in TRAINING_MODULES)
+    + tuple(g.item_id for g in GEAR_CATALOG)
+    + tuple(c.contract_id for c in TASK_CONTRACTS)
+))
+WORD_BITS = 63
+UNLOCK_WORDS = -(-len(UNLOCK_KEYS) // WORD_BITS)
+
+# Fixed record layout shared with population arrays: one int64 per numeric field.
+RECORD_FIELDS: Tuple[str, ...] = (
+    tuple(f"{section}.{f.name}" for section, model in SECTIONS for f in fields(model))
+    + tuple(f"skills.{key}" for key in SKILL_KEYS)
+    + SCALARS
+    + tuple(f"unlocks.{word}" for word in range(UNLOCK_WORDS))
+)
+OFFSETS: Dict[str, int] = {name: idx for idx, name in enumerate(RECORD_FIELDS)}
+RECORD_SIZE = len(RECORD_FIELDS)
+SKILL_BASE = OFFSETS[f"skills.{SKILL_KEYS[0]}"]
+UNLOCK_BASE = OFFSETS["unlocks.0"]
+_UNLOCK_SLOT: Dict[str, Tuple[int, int]] = {
+    node: (UNLOCK_BASE + idx // WORD_BITS, 1 << idx % WORD_BITS) for idx, node in enumerate(UNLOCK_KEYS)
+}
+
+
+def unlock_words(nodes: Iterable[str]) -> List[int]:
+    """The ``unlocks.*`` words for ``nodes``; nodes outside ``UNLOCK_KEYS`` are ignored."""
+    words = [0] * UNLOCK_WORDS
+    for node in nodes:
+        slot = _UNLOCK_SLOT.get(node)
+        if slot is not None:
+            words[slot[0] - UNLOCK_BASE] |= slot[1]
+    return words
+
+
+def default_record() -> List[int]:
+    template = Player(codename="", background="")
+    values = {f"{section}.{key}": value for section, _ in SECTIONS for key, value in asdict(getattr(template, section)).items()}
+    values.update({f"skills.{key}": value for key, value in template.skills.items()})
+    values.update({name: getattr(template, name) for name in SCALARS})
+    values.update({f"unlocks.{word}": bits for word, bits in enumerate(unlock_words(template.unlocked_nodes))})
+    return [values[name] for name in RECORD_FIELDS]
+
+
+DEFAULT_RECORD = default_record()
+
+
+class _SectionView:
+    __slots__ = ("_buf", "_base")
+
+    def __init__(self, buf, base: int) -> None:
+        self._buf = buf
+        self._base = base
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)}' for name in self.FIELDS)})"
+
+
+def _field(idx: int) -> property:
+    def get(self):
+        return self._buf[self._base + idx]
+
+    def set(self, value: int) -> None:
+        self._buf[self._base + idx] = value
+
+    return property(get, set)
+
+
+def _section_view(section: str, model: type) -> type:
+    names = tuple(f.name for f in fields(model))
+    namespace: Dict[str, object] = {"__slots__": (), "FIELDS": names}
+    for name in names:
+        namespace[name] = _field(OFFSETS[f"{section}.{name}"])
+    return type(f"{model.__name__}View", (_SectionView,), namespace)
+
+
+AttributesView = _section_view("attributes", Attributes)
+ReputationView = _section_view("reputation", Reputation)
+ResourcesView = _section_view("resources", Resources)
+
+
+class SkillsView(MutableMapping):
+    """Dict-like skills: interned tracks live in the record, others in ``extra``."""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "CompactPlayer") -> None:
+        self._owner = owner
+
+    def __getitem__(self, key: str) -> int:
+        idx = _SKILL_SLOT.get(key)
+        if idx is not None:
+            return self._owner._buf[self._owner._base + idx]
+        extra = self._owner._extra
+        if extra is None:
+            raise KeyError(key)
+        return extra[key]
+
+    def __setitem__(self, key: str, value: int) -> None:
+        idx = _SKILL_SLOT.get(key)
+        if idx is not None:
+            self._owner._buf[self._owner._base + idx] = value
+            return
+        if self._owner._extra is None:
+            self._owner._extra = {}
+        self._owner._extra[sys.intern(key)] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _SKILL_SLOT or not self._owner._extra:
+            raise KeyError(key)
+        del self._owner._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from SKILL_KEYS
+        if self._owner._extra:
+            yield from self._owner._extra
+
+    def __len__(self) -> int:
+        return len(SKILL_KEYS) + len(self._owner._extra or ())
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+_SKILL_SLOT = {key: SKILL_BASE + idx for idx, key in enumerate(SKILL_KEYS)}
+
+
+class UnlocksView(Sequence):
+    """List-like unlocked nodes: built-in nodes are bits in the record, others in ``extra_nodes``.
+
+    Iterates built-in nodes in content order, then the others in unlock
+    order. Nodes are only ever added (``append``/``extend``), at most once.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "CompactPlayer") -> None:
+        self._owner = owner
+
+    def __contains__(self, node: object) -> bool:
+        slot = _UNLOCK_SLOT.get(node)
+        if slot is not None:
+            return bool(self._owner._buf[self._owner._base + slot[0]] & slot[1])
+        extra = self._owner._extra_nodes
+        return extra is not None and node in extra
+
+    def __iter__(self) -> Iterator[str]:
+        buf, base = self._owner._buf, self._owner._base + UNLOCK_BASE
+        for word in range(UNLOCK_WORDS):
+            for bit in iter_bits(buf[base + word]):
+                yield UNLOCK_KEYS[word * WORD_BITS + bit]
+        if self._owner._extra_nodes:
+            yield from self._owner._extra_nodes
+
+    def __len__(self) -> int:
+        buf, base = self._owner._buf, self._owner._base + UNLOCK_BASE
+        return sum(bin(buf[base + word]).count("1") for word in range(UNLOCK_WORDS)) + len(self._owner._extra_nodes or ())
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other: object) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, tuple, UnlocksView)) else NotImplemented
+
+    __hash__ = None
+
+    def append(self, node: str) -> None:
+        slot = _UNLOCK_SLOT.get(node)
+        if slot is not None:
+            self._owner._buf[self._owner._base + slot[0]] |= slot[1]
+        elif node not in self:
+            if self._owner._extra_nodes is None:
+                self._owner._extra_nodes = []
+            self._owner._extra_nodes.append(sys.intern(node))
+
+    def extend(self, nodes: Iterable[str]) -> None:
+        for node in nodes:
+            self.append(node)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _scalar(name: str) -> property:
+    return _field(OFFSETS[name])
+
+
+class CompactPlayer:
+    """Drop-in for ``Player`` that keeps every numeric field in one int64 record.
+
+    The record may be private or a slice of a larger buffer (``buf``/``base``),
+    which is how population arrays host players in place. Section views and
+    the skills mapping are created on access and hold no data of their own;
+    unlocked nodes are a bitset in the record as well. Field-change
+    subscriptions are not supported.
+    """
+
+    __slots__ = ("codename", "background", "log", "_buf", "_base", "_extra", "_extra_nodes")
+
+    def __init__(self, codename: str, background: str, buf=None, base: int = 0, init: bool = True) -> None:
+        self.codename = sys.intern(codename)
+        self.background = sys.intern(background)
+        self.log: List[str] = []
+        self._extra: Optional[Dict[str, int]] = None
+        self._extra_nodes: Optional[List[str]] = None
+        if buf is None:
+            buf = array(TYPECODE, DEFAULT_RECORD)
+            base = 0
+        elif init:
+            buf[base:base + RECORD_SIZE] = array(TYPECODE, DEFAULT_RECORD) if isinstance(buf, array) else _typed(DEFAULT_RECORD)
+        self._buf = buf
+        self._base = base
+
+    age = _scalar("age")
+    events_since_age = _scalar("events_since_age")
+    day = _scalar("day")
+    hour = _scalar("hour")
+
+    @property
+    def attributes(self) -> AttributesView:
+        return AttributesView(self._buf, self._base)
+
+    @property
+    def reputation(self) -> ReputationView:
+        return ReputationView(self._buf, self._base)
+
+    @property
+    def resources(self) -> ResourcesView:
+        return ResourcesView(self._buf, self._base)
+
+    @property
+    def skills(self) -> SkillsView:
+        return SkillsView(self)
+
+    @skills.setter
+    def skills(self, values: Dict[str, int]) -> None:
+        self._extra = None
+        view = SkillsView(self)
+        for key in SKILL_KEYS:
+            view[key] = 0
+        for key, value in values.items():
+            view[key] = value
+
+    @property
+    def unlocked_nodes(self) -> UnlocksView:
+        return UnlocksView(self)
+
+    @unlocked_nodes.setter
+    def unlocked_nodes(self, nodes: Iterable[str]) -> None:
+        nodes = list(nodes)
+        self._extra_nodes = None
+        words = unlock_words(nodes)
+        start = self._base + UNLOCK_BASE
+        self._buf[start:start + UNLOCK_WORDS] = array(TYPECODE, words) if isinstance(self._buf, array) else _typed(words)
+        UnlocksView(self).extend(node for node in nodes if node not in _UNLOCK_SLOT)
+
+    def observe(self, observer: Optional[ChangeCallback], prefix: str = "") -> None:
+        if observer is not None:
+            raise TypeError("紧凑角色不支持变更订阅")
+
+    def record(self) -> List[int]:
+        return list(self._buf[self._base:self._base + RECORD_SIZE])
+
+    # ------------------------------------------------------------------
+    # Player compatibility
+    def to_dict(self) -> Dict[str, object]:
+        values = self.record()
+        payload: Dict[str, object] = {"codename": self.codename, "background": self.background}
+        for section, model in SECTIONS:
+            payload[section] = {f.name: values[OFFSETS[f"{section}.{f.name}"]] for f in fields(model)}
+        payload["skills"] = dict(self.skills)
+        payload["unlocked_nodes"] = list(self.unlocked_nodes)
+        payload.update({name: values[OFFSETS[name]] for name in SCALARS})
+        payload["log"] = self.log[-40:]
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, object], buf=None, base: int = 0) -> "CompactPlayer":
+        player = cls(payload.get("codename", "Unknown"), payload.get("background", "nomad"), buf, base)
+        for section, model in SECTIONS:
+            view = getattr(player, section)
+            for key, value in payload.get(section, {}).items():
+                if key not in view.FIELDS:
+                    raise TypeError(f"{model.__name__} 没有字段 {key}")
+                setattr(view, key, value)
+        if "skills" in payload:
+            player.skills = payload["skills"]
+        if "unlocked_nodes" in payload:
+            player.unlocked_nodes = payload["unlocked_nodes"]
+        player.age = payload.get("age", player.age)
+        player.events_since_age = payload.get("events_since_age", 0)
+        player.day = payload.get("day", player.day)
+        player.hour = payload.get("hour", player.hour)
+        player.log = list(payload.get("log", []))
+        return player
+
+    @classmethod
+    def from_player(cls, player: Player, buf=None, base: int = 0) -> "CompactPlayer":
+        return cls.from_dict(player.to_dict(), buf, base)
+
+    def to_player(self) -> Player:
+        return Player.from_dict(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"CompactPlayer(codename={self.codename!r}, background={self.background!r})"
+
+
+def _typed(values: List[int]) -> memoryview:
+    return memoryview(array(TYPECODE, values))
+
+
+# ----------------------------------------------------------------------
+# Memory benchmark
+def bytes_per_player(factory: Callable[[int], object], count: int = 20000) -> float:
+    """Average traced allocation per live object built by ``factory(i)``."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        population = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    list_overhead = sys.getsizeof(population)
+    return (after - before - list_overhead) / count
+
+
+def main() -> None:
+    count = 20000
+    full = bytes_per_player(lambda i: Player(codename=f"npc-{i}", background="nomad"), count)
+    compact = bytes_per_player(lambda i: CompactPlayer(f"npc-{i}", "nomad"), count)
+    print(f"Player        {full:8.0f} B/player")
+    print(f"CompactPlayer {compact:8.0f} B/player  ({full / compact:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
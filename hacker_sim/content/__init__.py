@@ -5,6 +5,7 @@ from .gear import GEAR_CATALOG
 from .market import MARKET_TRENDS
 from .training import TRAINING_MODULES
 from .crisis import CRISIS_EVENTS
+from .unlocks import UNLOCK_PREREQUISITES, UNLOCK_ROOT
 
 __all__ = [
     "BACKGROUNDS",
@@ -13,4 +14,6 @@ __all__ = [
     "GEAR_CATALOG",
     "MARKET_TRENDS",
     "CRISIS_EVENTS",
+    "UNLOCK_PREREQUISITES",
+    "UNLOCK_ROOT",
 ]
@@ -0,0 +1,344 @@
+"""Data-driven content packs (JSON/CSV) with a memory-mapped compiled cache."""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+from array import array
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..effects import compile_effect
+from ..models import CrisisEvent, CrisisOption, GearItem, TaskContract, TrainingModule
+
+CACHE_DIR = Path.home() / ".hacker_sandbox" / "pack_cache"
+MAGIC = b"HSPACK01"
+# Part of every cache key: bump whenever validate_pack's rules change so packs
+# compiled under older rules are re-validated instead of trusted.
+SCHEMA_VERSION = 2
+HEADER = struct.Struct("<8sIIQQ")
+
+# kind -> (model class or None for plain dict rows, id field)
+PACK_KINDS: Dict[str, Tuple[Optional[type], str]] = {
+    "training": (TrainingModule, "module_id"),
+    "contracts": (TaskContract, "contract_id"),
+    "gear": (GearItem, "item_id"),
+    "crisis": (CrisisEvent, "event_id"),
+    "market": (None, "name"),
+    "backgrounds": (None, "key"),
+}
+
+MARKET_FIELDS = {"name": str, "lawful": float, "underground": float, "enforcement": int, "trend": str}
+BACKGROUND_FIELDS = {"key": str, "label": str, "mods": dict, "starting_skills": dict, "lore": str}
+
+
+# ----------------------------------------------------------------------
+# Parsing + validation
+def detect_kind(path: Path) -> str:
+    stem = path.stem.lower()
+    for kind in PACK_KINDS:
+        if stem == kind or stem.startswith(kind + "_") or stem.startswith(kind + "."):
+            return kind
+    raise ValueError(f"无法识别内容包类型：{path.name}")
+
+
+def parse_pack(raw: bytes, kind: str, fmt: str) -> List[dict]:
+    if fmt == ".json":
+        data = json.loads(raw.decode("utf-8"))
+        if isinstance(data, dict):
+            if data.get("kind", kind) != kind:
+                raise ValueError(f"内容包类型不符：{data.get('kind')}")
+            data = data.get("entries", [])
+        if not isinstance(data, list):
+            raise ValueError("内容包必须是条目列表")
+        return data
+    if fmt == ".csv":
+        rows = []
+        for row in csv.DictReader(io.StringIO(raw.decode("utf-8-sig"))):
+            rows.append({key: _csv_cell(value) for key, value in row.items() if key})
+        return rows
+    raise ValueError(f"不支持的内容包格式：{fmt}")
+
+
+def _csv_cell(value: Optional[str]) -> object:
+    text = (value or "").strip()
+    if text and text[0] in "[{":
+        return json.loads(text)
+    return text
+
+
+def _coerce(value: object, expected: object, where: str) -> object:
+    if expected in (int, "int"):
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"{where} 需要整数")
+        return int(value)
+    if expected in (float, "float"):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"{where} 需要数值")
+        return float(value)
+    if expected in (str, "str"):
+        return str(value)
+    if expected == "Optional[str]":
+        return str(value) if value not in (None, "") else None
+    if expected is dict or str(expected).startswith("Dict"):
+        if not isinstance(value, dict) or not all(isinstance(v, int) and not isinstance(v, bool) for v in value.values()):
+            raise ValueError(f"{where} 需要 {{键: 整数}} 映射")
+        return value
+    if str(expected) == "List[int]":
+        if not isinstance(value, list) or not all(isinstance(v, int) for v in value):
+            raise ValueError(f"{where} 需要整数列表")
+        return value
+    return value
+
+
+def _validate_fields(entry: dict, spec: Dict[str, object], where: str) -> dict:
+    missing = [name for name in spec if name not in entry]
+    if missing:
+        raise ValueError(f"{where} 缺少字段：{', '.join(missing)}")
+    unknown = [name for name in entry if name not in spec]
+    if unknown:
+        raise ValueError(f"{where} 未知字段：{', '.join(unknown)}")
+    return {name: _coerce(entry[name], expected, f"{where}.{name}") for name, expected in spec.items()}
+
+
+def validate_entry(kind: str, entry: dict, where: str) -> dict:
+    model, _ = PACK_KINDS[kind]
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where} 不是对象")
+    if kind == "market":
+        return _validate_fields(entry, MARKET_FIELDS, where)
+    if kind == "backgrounds":
+        entry = {"starting_skills": {}, **entry}
+        return _validate_fields(entry, BACKGROUND_FIELDS, where)
+    spec = {f.name: f.type for f in fields(model)}
+    if kind == "crisis":
+        spec["options"] = list
+        clean = _validate_fields(entry, spec, where)
+        option_spec = {f.name: f.type for f in fields(CrisisOption)}
+        if not isinstance(clean["options"], list) or not clean["options"]:
+            raise ValueError(f"{where}.options 不能为空")
+        clean["options"] = [
+            _check_odds(_validate_fields({"requirement": None, **opt}, option_spec, f"{where}.options[{i}]"), f"{where}.options[{i}]")
+            for i, opt in enumerate(clean["options"])
+        ]
+        for i, opt in enumerate(clean["options"]):
+            compile_effect(opt["success_delta"], f"{where}.options[{i}].success_delta")
+            compile_effect(opt["failure_delta"], f"{where}.options[{i}].failure_delta")
+        return clean
+    clean = _validate_fields(entry, spec, where)
+    if "base_success" in clean:
+        _check_odds(clean, where)
+    if clean.get("cost", 0) < 0:
+        raise ValueError(f"{where}.cost 不能为负")
+    if kind == "gear":
+        compile_effect(clean["bonuses"], f"{where}.bonuses")
+    if kind == "training":
+        compile_effect(clean["skill_gain"], f"{where}.skill_gain")
+    if kind == "contracts":
+        low_high = clean["payout_range"]
+        if len(low_high) != 2 or low_high[0] > low_high[1] or low_high[0] < 0:
+            raise ValueError(f"{where}.payout_range 非法")
+    return clean
+
+
+def _check_odds(entry: dict, where: str) -> dict:
+    if not 0.0 <= entry["base_success"] <= 1.0:
+        raise ValueError(f"{where}.base_success 必须在 0~1 之间")
+    return entry
+
+
+def validate_pack(kind: str, entries: Sequence[dict], source: str = "pack") -> List[dict]:
+    _, id_field = PACK_KINDS[kind]
+    seen = set()
+    clean = []
+    for idx, entry in enumerate(entries):
+        item = validate_entry(kind, entry, f"{source}[{idx}]")
+        if item[id_field] in seen:
+            raise ValueError(f"{source}[{idx}] 重复的 {id_field}：{item[id_field]}")
+        seen.add(item[id_field])
+        clean.append(item)
+    return clean
+
+
+def build_entry(kind: str, payload: dict) -> object:
+    model, _ = PACK_KINDS[kind]
+    if model is None:
+        return payload
+    if model is CrisisEvent:
+        payload = dict(payload, options=[CrisisOption(**opt) for opt in payload["options"]])
+    return model(**payload)
+
+
+def entry_payload(kind: str, entry: object) -> dict:
+    """Inverse of :func:`build_entry`, used to export built-in registries."""
+    if PACK_KINDS[kind][0] is None:
+        return dict(entry)
+    return asdict(entry)
+
+
+# ----------------------------------------------------------------------
+# Binary cache
+def compile_pack(kind: str, entries: Sequence[dict], target: Path) -> None:
+    """Write validated entries as ``header | rec offsets | id offsets | id order | ids | records``."""
+    _, id_field = PACK_KINDS[kind]
+    ids = [str(entry[id_field]).encode("utf-8") for entry in entries]
+    records = [json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for entry in entries]
+    count = len(entries)
+    rec_offsets = array("Q", _running_offsets(records))
+    id_offsets = array("Q", _running_offsets(ids))
+    order = array("I", sorted(range(count), key=ids.__getitem__))
+    id_blob_at = HEADER.size + rec_offsets.itemsize * (count + 1) * 2 + order.itemsize * count
+    id_blob_at += -id_blob_at % 8
+    rec_blob_at = id_blob_at + id_offsets[-1]
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f".tmp{os.getpid()}")
+    with tmp.open("wb") as handle:
+        handle.write(HEADER.pack(MAGIC, count, 0, id_blob_at, rec_blob_at))
+        handle.write(rec_offsets.tobytes())
+        handle.write(id_offsets.tobytes())
+        handle.write(order.tobytes())
+        handle.write(b"\0" * (id_blob_at - handle.tell()))
+        handle.writelines(ids)
+        handle.writelines(records)
+    os.replace(tmp, target)
+
+
+def _running_offsets(chunks: Sequence[bytes]) -> Iterator[int]:
+    total = 0
+    yield 0
+    for chunk in chunks:
+        total += len(chunk)
+        yield total
+
+
+class CompiledPack(Sequence):
+    """Read-only view over a compiled pack; entries are built on first access."""
+
+    def __init__(self, kind: str, path: Path) -> None:
+        self.kind = kind
+        self.path = path
+        with path.open("rb") as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _, self._id_blob_at, self._rec_blob_at = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"缓存文件损坏：{path}")
+        self._view = view = memoryview(self._mm)
+        start = HEADER.size
+        self._count = count
+        self._rec_offsets = view[start:start + 8 * (count + 1)].cast("Q")
+        start += 8 * (count + 1)
+        self._id_offsets = view[start:start + 8 * (count + 1)].cast("Q")
+        start += 8 * (count + 1)
+        self._order = view[start:start + 4 * count].cast("I")
+        self._cache: Dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        entry = self._cache.get(index)
+        if entry is None:
+            a = self._rec_blob_at + self._rec_offsets[index]
+            b = self._rec_blob_at + self._rec_offsets[index + 1]
+            entry = self._cache[index] = build_entry(self.kind, json.loads(self._mm[a:b]))
+        return entry
+
+    def entry_id(self, index: int) -> str:
+        a = self._id_blob_at + self._id_offsets[index]
+        b = self._id_blob_at + self._id_offsets[index + 1]
+        return self._mm[a:b].decode("utf-8")
+
+    def index_of(self, entry_id: str) -> int:
+        target = entry_id.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            idx = self._order[mid]
+            a = self._id_blob_at + self._id_offsets[idx]
+            current = self._mm[a:self._id_blob_at + self._id_offsets[idx + 1]]
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return idx
+        raise KeyError(entry_id)
+
+    def get(self, entry_id: str, default: object = None) -> object:
+        try:
+            return self[self.index_of(entry_id)]
+        except KeyError:
+            return default
+
+    def close(self) -> None:
+        self._rec_offsets.release()
+        self._id_offsets.release()
+        self._order.release()
+        self._view.release()
+        self._cache.clear()
+        self._mm.close()
+
+
+# ----------------------------------------------------------------------
+# Entry points
+def content_hash(raw: bytes, kind: str, rules: str = "") -> str:
+    """Cache key of a pack source under the given validation rules."""
+    digest = hashlib.sha256(MAGIC + f"{kind}\0{SCHEMA_VERSION}\0{rules}\0".encode("utf-8"))
+    digest.update(raw)
+    return digest.hexdigest()
+
+
+def _rules(validator: Optional[Callable[[str, List[dict]], None]]) -> str:
+    """Identify an extra validator in the cache key; set ``validator.version`` when its rules change."""
+    if validator is None:
+        return ""
+    return f"{validator.__module__}.{validator.__qualname__}:{getattr(validator, 'version', 0)}"
+
+
+def load_pack(path: Path, kind: Optional[str] = None, cache_dir: Path = CACHE_DIR,
+              validator: Optional[Callable[[str, List[dict]], None]] = None) -> CompiledPack:
+    """Load a JSON/CSV pack, compiling it on first sight of its content hash.
+
+    A warm load only hashes the source and maps the cache file; entries are
+    parsed lazily. ``validator`` may add cross-pack checks before compiling.
+    The cache key covers ``SCHEMA_VERSION`` and the validator, so a file
+    compiled under other rules is never reused.
+    """
+    path = Path(path)
+    kind = kind or detect_kind(path)
+    if kind not in PACK_KINDS:
+        raise ValueError(f"未知内容包类型：{kind}")
+    raw = path.read_bytes()
+    target = Path(cache_dir) / f"{kind}-{content_hash(raw, kind, _rules(validator))[:24]}.pack"
+    if not target.exists():
+        entries = validate_pack(kind, parse_pack(raw, kind, path.suffix.lower()), path.name)
+        if validator:
+            validator(kind, entries)
+        compile_pack(kind, entries, target)
+    return CompiledPack(kind, target)
+
+
+def load_pack_dir(directory: Path, cache_dir: Path = CACHE_DIR) -> Dict[str, List[CompiledPack]]:
+    packs: Dict[str, List[CompiledPack]] = {}
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() in (".json", ".csv"):
+            pack = load_pack(path, cache_dir=cache_dir)
+            packs.setdefault(pack.kind, []).append(pack)
+    return packs
+
+
+def export_pack(kind: str, entries: Sequence[object], path: Path) -> None:
+    """Dump a registry (e.g. ``TASK_CONTRACTS``) as a JSON pack."""
+    payload = {"kind": kind, "entries": [entry_payload(kind, entry) for entry in entries]}
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False, indent=2))
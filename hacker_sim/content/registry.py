@@ -0,0 +1,417 @@
+"""Immutable, versioned content registries with lock-free reads and atomic swap."""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import importlib.util
+import json
+import threading
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from ..contract_board import ContractIndex
+from ..effects import CompiledEffects, compile_content, lazy_content
+from ..models import CrisisEvent, GearItem, Player, TaskContract, TrainingModule
+from ..skill_graph import SkillGraph
+from .packs import CACHE_DIR, PACK_KINDS, CompiledPack, entry_payload, load_pack_dir
+from .unlocks import UNLOCK_PREREQUISITES, UNLOCK_ROOT
+
+# Kinds kept as lazy overlays when packs are applied; market and backgrounds are
+# a handful of rows and are merged eagerly.
+LAYERED_KINDS = ("training", "contracts", "gear", "crisis")
+
+# kind -> (registry module, attribute) for the built-in content files.
+BUILTIN_MODULES: Dict[str, Tuple[str, str]] = {
+    "training": ("training", "TRAINING_MODULES"),
+    "contracts": ("contracts", "TASK_CONTRACTS"),
+    "gear": ("gear", "GEAR_CATALOG"),
+    "crisis": ("crisis", "CRISIS_EVENTS"),
+    "market": ("market", "MARKET_TRENDS"),
+    "backgrounds": ("backgrounds", "BACKGROUNDS"),
+    "unlocks": ("unlocks", "UNLOCK_PREREQUISITES"),
+}
+
+
+class LayeredSequence(Sequence):
+    """Base entries overlaid by compiled packs, resolved on access.
+
+    A pack entry replaces the entry with the same id in place and new ids
+    append in pack order. Only ids shared between layers are enumerated,
+    by probing the smaller layer's ids into the larger one's sorted id
+    table, so a large pack over the built-ins costs a few binary searches
+    and each pack entry is parsed from its mmap on first access.
+    """
+
+    def __init__(self, kind: str, base: Sequence[object], packs: Sequence[CompiledPack]) -> None:
+        if isinstance(base, LayeredSequence):
+            layers: Tuple[Sequence[object], ...] = base.layers + tuple(packs)
+        else:
+            layers = (tuple(base), *packs)
+        self.kind = kind
+        self.layers = layers
+        self._id_field = PACK_KINDS[kind][1]
+        self._base_ids = {_entry_id(entry, self._id_field): idx for idx, entry in enumerate(layers[0])}
+        places: Dict[str, List[Tuple[int, int]]] = {}
+        for later in range(1, len(layers)):
+            for earlier in range(later):
+                small, big = (earlier, later) if len(layers[earlier]) <= len(layers[later]) else (later, earlier)
+                for idx, entry_id in self._ids(small):
+                    other = self._find(big, entry_id)
+                    if other is not None:
+                        found = places.setdefault(entry_id, [])
+                        found.extend(place for place in ((small, idx), (big, other)) if place not in found)
+        # The first occurrence keeps its position and shows the last layer's entry.
+        self._replace: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        hidden: Dict[int, Set[int]] = {}
+        for found in places.values():
+            found.sort()
+            self._replace[found[0]] = found[-1]
+            for layer, idx in found[1:]:
+                hidden.setdefault(layer, set()).add(idx)
+        self._starts: List[int] = []
+        self._segments: List[Tuple[int, Optional[array]]] = []
+        total = 0
+        for layer, entries in enumerate(layers):
+            skip = hidden.get(layer)
+            kept = array("I", (idx for idx in range(len(entries)) if idx not in skip)) if skip else None
+            size = len(entries) if kept is None else len(kept)
+            if size:
+                self._starts.append(total)
+                self._segments.append((layer, kept))
+                total += size
+        self._len = total
+
+    def _ids(self, layer: int) -> Iterator[Tuple[int, str]]:
+        entries = self.layers[layer]
+        if layer == 0:
+            return iter((idx, entry_id) for entry_id, idx in self._base_ids.items())
+        return ((idx, entries.entry_id(idx)) for idx in range(len(entries)))
+
+    def _find(self, layer: int, entry_id: str) -> Optional[int]:
+        if layer == 0:
+            return self._base_ids.get(entry_id)
+        try:
+            return self.layers[layer].index_of(entry_id)
+        except KeyError:
+            return None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        seg = bisect.bisect_right(self._starts, index) - 1
+        layer, kept = self._segments[seg]
+        local = index - self._starts[seg]
+        return self._resolve(layer, local if kept is None else kept[local])
+
+    def __iter__(self) -> Iterator[object]:
+        for layer, kept in self._segments:
+            for idx in (range(len(self.layers[layer])) if kept is None else kept):
+                yield self._resolve(layer, idx)
+
+    def _resolve(self, layer: int, idx: int) -> object:
+        if self._replace:
+            layer, idx = self._replace.get((layer, idx), (layer, idx))
+        return self.layers[layer][idx]
+
+    def lookup(self, entry_id: str) -> Optional[object]:
+        for layer in range(len(self.layers) - 1, -1, -1):
+            idx = self._find(layer, entry_id)
+            if idx is not None:
+                return self.layers[layer][idx]
+        return None
+
+    def has(self, entry_id: str) -> bool:
+        return any(self._find(layer, entry_id) is not None for layer in range(len(self.layers)))
+
+
+class EntryPack(Sequence):
+    """In-memory entries with the lookup interface of a :class:`CompiledPack`.
+
+    Lets code-built overrides (e.g. balance sweeps) go through
+    :meth:`ContentRegistry.with_packs` like packs loaded from disk.
+    """
+
+    def __init__(self, kind: str, entries: Sequence[object]) -> None:
+        self.kind = kind
+        self._entries = list(entries)
+        self._ids = [_entry_id(entry, PACK_KINDS[kind][1]) for entry in self._entries]
+        self._index = {entry_id: idx for idx, entry_id in enumerate(self._ids)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    def entry_id(self, index: int) -> str:
+        return self._ids[index]
+
+    def index_of(self, entry_id: str) -> int:
+        return self._index[entry_id]
+
+
+class LayeredIndex(Mapping):
+    """id -> entry view of a :class:`LayeredSequence`; lookups never scan."""
+
+    def __init__(self, entries: LayeredSequence) -> None:
+        self._entries = entries
+
+    def __getitem__(self, entry_id: str) -> object:
+        entry = self._entries.lookup(entry_id) if isinstance(entry_id, str) else None
+        if entry is None:
+            raise KeyError(entry_id)
+        return entry
+
+    def __contains__(self, entry_id: object) -> bool:
+        return isinstance(entry_id, str) and self._entries.has(entry_id)
+
+    def __iter__(self) -> Iterator[str]:
+        id_field = self._entries._id_field
+        return (getattr(entry, id_field) for entry in self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class ContentRegistry:
+    """One consistent content version plus the tables derived from it.
+
+    Built-in content is compiled and validated as a whole in ``build``, so a
+    broken registry is never published. Registries with packs keep pack
+    entries in their mmaps (pack entries were validated when the pack was
+    compiled); effect programs compile per entry on first use and the
+    unlock graph is built on first access.
+    """
+
+    version: int
+    training: Sequence[TrainingModule]
+    contracts: Sequence[TaskContract]
+    gear: Sequence[GearItem]
+    crisis: Sequence[CrisisEvent]
+    market: Tuple[Mapping[str, object], ...]
+    backgrounds: Mapping[str, Mapping[str, object]]
+    training_by_id: Mapping[str, TrainingModule]
+    contract_by_id: Mapping[str, TaskContract]
+    gear_by_id: Mapping[str, GearItem]
+    crisis_by_id: Mapping[str, CrisisEvent]
+    effects: CompiledEffects
+    prerequisites: Mapping[str, Sequence[str]]
+    root: str
+
+    @classmethod
+    def build(cls, version: int, training: Sequence[TrainingModule], contracts: Sequence[TaskContract], gear: Sequence[GearItem],
+              crisis: Sequence[CrisisEvent], market: Sequence[Mapping[str, object]], backgrounds: Mapping[str, Mapping[str, object]],
+              prerequisites: Mapping[str, Sequence[str]] = UNLOCK_PREREQUISITES, root: str = UNLOCK_ROOT) -> "ContentRegistry":
+        if not market:
+            raise ValueError("市场周期不能为空")
+        if not backgrounds:
+            raise ValueError("背景不能为空")
+        registry = cls(
+            version=version,
+            training=tuple(training),
+            contracts=tuple(contracts),
+            gear=tuple(gear),
+            crisis=tuple(crisis),
+            market=tuple(market),
+            backgrounds=MappingProxyType(dict(backgrounds)),
+            training_by_id=_index(training, "module_id"),
+            contract_by_id=_index(contracts, "contract_id"),
+            gear_by_id=_index(gear, "item_id"),
+            crisis_by_id=_index(crisis, "event_id"),
+            effects=compile_content(training, gear, crisis),
+            prerequisites=MappingProxyType(dict(prerequisites)),
+            root=root,
+        )
+        registry.graph  # compiled eagerly here so a bad unlock table fails before publishing
+        return registry
+
+    @cached_property
+    def graph(self) -> SkillGraph:
+        return SkillGraph.from_content(self.training, self.gear, self.contracts, self.prerequisites, self.root,
+                                       skills=Player.default_skills())
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Hash of the playable content; equal content gives the same hash across versions and reloads."""
+        digest = hashlib.sha256()
+        for kind in sorted(("training", "contracts", "gear", "crisis", "market")):
+            payload = [entry_payload(kind, entry) for entry in getattr(self, kind)]
+            digest.update(kind.encode("utf-8") + b"\0")
+            digest.update(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(json.dumps(dict(self.backgrounds), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()
+
+    @cached_property
+    def contract_index(self) -> ContractIndex:
+        """Static contract board index, shared by every engine on this version."""
+        return ContractIndex(self.contracts)
+
+    def with_packs(self, packs: Mapping[str, Sequence[CompiledPack]], version: int) -> "ContentRegistry":
+        """New registry where pack entries replace same-id entries and append new ones.
+
+        Training, contract, gear and crisis packs stay lazy overlays; nothing
+        is parsed or compiled until it is used.
+        """
+        layered: Dict[str, Sequence[object]] = {}
+        by_id: Dict[str, Mapping[str, object]] = {}
+        for kind, attr in zip(LAYERED_KINDS, ("training_by_id", "contract_by_id", "gear_by_id", "crisis_by_id")):
+            if packs.get(kind):
+                layered[kind] = entries = LayeredSequence(kind, getattr(self, kind), packs[kind])
+                by_id[kind] = LayeredIndex(entries)
+            else:
+                layered[kind] = getattr(self, kind)
+                by_id[kind] = getattr(self, attr)
+        market = _overlay(list(self.market), packs.get("market", ()), PACK_KINDS["market"][1])
+        rows = _overlay([dict(row, key=key) for key, row in self.backgrounds.items()], packs.get("backgrounds", ()), "key")
+        backgrounds = {row["key"]: {k: v for k, v in row.items() if k != "key"} for row in rows}
+        if any(packs.get(kind) for kind in ("training", "gear", "crisis")):
+            effects = lazy_content(by_id["training"], by_id["gear"], by_id["crisis"])
+        else:
+            effects = self.effects
+        registry = ContentRegistry(
+            version=version,
+            training=layered["training"],
+            contracts=layered["contracts"],
+            gear=layered["gear"],
+            crisis=layered["crisis"],
+            market=tuple(market),
+            backgrounds=MappingProxyType(backgrounds),
+            training_by_id=by_id["training"],
+            contract_by_id=by_id["contracts"],
+            gear_by_id=by_id["gear"],
+            crisis_by_id=by_id["crisis"],
+            effects=effects,
+            prerequisites=self.prerequisites,
+            root=self.root,
+        )
+        _check_prerequisites(registry)
+        return registry
+
+
+def _overlay(current: List[object], packs: Sequence[Sequence[object]], id_field: str) -> List[object]:
+    position = {_entry_id(entry, id_field): idx for idx, entry in enumerate(current)}
+    for pack in packs:
+        for entry in pack:
+            entry_id = _entry_id(entry, id_field)
+            if entry_id in position:
+                current[position[entry_id]] = entry
+            else:
+                position[entry_id] = len(current)
+                current.append(entry)
+    return current
+
+
+def _check_prerequisites(registry: ContentRegistry) -> None:
+    """The unlock-table checks of :class:`SkillGraph` that need only id lookups."""
+    tables = (registry.training_by_id, registry.gear_by_id, registry.contract_by_id)
+
+    def exists(node_id: str) -> bool:
+        return node_id == registry.root or any(node_id in table for table in tables)
+
+    nodes: Dict[str, Tuple[Mapping[str, int], Sequence[str]]] = {}
+    for node_id, parents in registry.prerequisites.items():
+        if not exists(node_id):
+            continue
+        missing = [parent for parent in parents if not exists(parent)]
+        if missing:
+            raise ValueError(f"节点 {node_id} 的前置不存在：{', '.join(missing)}")
+        nodes[node_id] = ({}, tuple(parents))
+    for _, parents in list(nodes.values()):
+        for parent in parents:
+            nodes.setdefault(parent, ({}, ()))
+    SkillGraph._toposort(nodes)
+
+
+def _entry_id(entry: object, id_field: str) -> str:
+    return entry[id_field] if isinstance(entry, Mapping) else getattr(entry, id_field)
+
+
+def _index(entries: Sequence[object], id_field: str) -> Mapping[str, object]:
+    index: Dict[str, object] = {}
+    for entry in entries:
+        entry_id = getattr(entry, id_field)
+        if entry_id in index:
+            raise ValueError(f"内容 id 重复：{entry_id}")
+        index[entry_id] = entry
+    return MappingProxyType(index)
+
+
+def load_builtin(version: int) -> ContentRegistry:
+    """Re-execute the content modules from disk into fresh objects.
+
+    The imported ``hacker_sim.content`` names are left untouched; only the
+    returned registry sees the edited files.
+    """
+    fresh = {}
+    for kind, (module, attr) in BUILTIN_MODULES.items():
+        name = f"{__package__}.{module}"
+        spec = importlib.util.spec_from_file_location(name, Path(__file__).with_name(f"{module}.py"))
+        loaded = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(loaded)
+        fresh[kind] = getattr(loaded, attr)
+        if kind == "unlocks":
+            fresh["root"] = loaded.UNLOCK_ROOT
+    return ContentRegistry.build(version, fresh["training"], fresh["contracts"], fresh["gear"], fresh["crisis"],
+                                 fresh["market"], fresh["backgrounds"], fresh["unlocks"], fresh["root"])
+
+
+class ContentStore:
+    """Holds the live registry.
+
+    Readers load ``current`` (one attribute read, no lock); engines pin it at
+    the start of each action and keep that version until the action ends.
+    Writers build a complete registry off to the side and publish it with
+    a single rebind, serialised against each other by a writer-only lock.
+    """
+
+    def __init__(self, registry: ContentRegistry) -> None:
+        self.current = registry
+        self._write_lock = threading.Lock()
+
+    def swap(self, registry: ContentRegistry) -> ContentRegistry:
+        with self._write_lock:
+            old = self.current
+            if registry.version <= old.version:
+                raise ValueError(f"内容版本必须递增：{registry.version} <= {old.version}")
+            self.current = registry
+            return old
+
+    def reload(self, build: Callable[[int], ContentRegistry]) -> ContentRegistry:
+        """Build version ``current + 1`` with ``build`` and publish it; a failed build publishes nothing."""
+        with self._write_lock:
+            registry = build(self.current.version + 1)
+            self.current = registry
+            return registry
+
+    def reload_async(self, build: Callable[[int], ContentRegistry]) -> "Future[ContentRegistry]":
+        future: "Future[ContentRegistry]" = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(self.reload(build))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, name="content-reload", daemon=True).start()
+        return future
+
+    def reload_builtin(self) -> ContentRegistry:
+        return self.reload(load_builtin)
+
+    def reload_packs(self, directory: Path, cache_dir: Path = CACHE_DIR, base: Optional[ContentRegistry] = None) -> ContentRegistry:
+        """Overlay content packs from ``directory`` on ``base`` (default: the built-in files)."""
+        packs = load_pack_dir(directory, cache_dir)
+        return self.reload(lambda version: (base or load_builtin(version)).with_packs(packs, version))
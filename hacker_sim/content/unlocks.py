@@ -0,0 +1,14 @@
+"""Unlock graph prerequisites (node id -> nodes that must be unlocked first)."""
+UNLOCK_ROOT = "training_intro"
+
+UNLOCK_PREREQUISITES = {
+    "foundations": [UNLOCK_ROOT],
+    "web_scope": [UNLOCK_ROOT],
+    "social_mesh": [UNLOCK_ROOT],
+    "bin_boot": ["foundations"],
+    "cloud_core": ["foundations", "web_scope"],
+    "forge_lab": ["bin_boot"],
+    "nebula_stack": ["cloud_core"],
+    "zero_drop": ["bin_boot"],
+    "cloud_guard": ["cloud_core"],
+}
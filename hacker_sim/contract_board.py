@@ -0,0 +1,204 @@
+"""Indexed contract board: filtered, payout- or EV-sorted, paginated queries."""
+from __future__ import annotations
+
+import bisect
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .models import TaskContract
+
+# Orders by expected market payout, optionally weighted by contract risk, or by
+# expected value (success chance x payout). The chance depends on the player's
+# level in each required skill and would break the shared bucket order, so
+# "ev" pages are cut in payout order and re-ranked within the page.
+SORT_KEYS = ("payout", "risk_adjusted", "ev")
+# Tiers of the requirement gap index: contracts doable now, visible on the board, everything.
+TIER_READY = 0
+TIER_VISIBLE = 2
+
+
+@dataclass
+class ContractQuery:
+    legality: Optional[str] = None
+    risk: Optional[Sequence[str]] = None
+    min_payout: Optional[int] = None
+    max_payout: Optional[int] = None
+    max_gap: Optional[int] = TIER_VISIBLE
+    visible_only: bool = True
+    sort: str = "payout"
+    limit: int = 20
+    offset: int = 0
+
+
+@dataclass
+class ContractPage:
+    items: List[TaskContract]
+    next_offset: Optional[int]
+
+
+class ContractIndex:
+    """The player-independent half of the board, built once per content version.
+
+    Per-(legality, risk) buckets sorted by mean payout plus the skill ->
+    contract postings; every engine's :class:`ContractBoard` shares it.
+    """
+
+    def __init__(self, contracts: Sequence[TaskContract]) -> None:
+        self.contracts = contracts
+        self.mean: List[float] = []
+        self.bucket_of: List[Tuple[str, str]] = []
+        self.requirements: List[Tuple[Tuple[str, int], ...]] = []
+        self.by_skill: Dict[str, List[int]] = {}
+        self.buckets: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        for idx, contract in enumerate(contracts):
+            mean = sum(contract.payout_range) / 2
+            bucket = (contract.legality, contract.risk)
+            self.mean.append(mean)
+            self.bucket_of.append(bucket)
+            self.requirements.append(tuple(contract.requirements.items()))
+            for skill in contract.requirements:
+                self.by_skill.setdefault(skill, []).append(idx)
+            self.buckets.setdefault(bucket, []).append((-mean, idx))
+        for entries in self.buckets.values():
+            entries.sort()
+
+    def __len__(self) -> int:
+        return len(self.mean)
+
+
+class ContractBoard:
+    """One player's view of a shared :class:`ContractIndex`, split into gap tiers.
+
+    Within a bucket the market multiplier and risk weight are constant, so the
+    payout and risk-adjusted orders both equal the mean-payout order; queries merge
+    the selected buckets lazily and stop once the page is full. The gap tiers
+    are filtered out of the shared buckets on first use, and skill changes
+    only touch contracts that require the changed skill.
+    """
+
+    def __init__(self, index: ContractIndex, risk_penalty: Mapping[str, float], default_penalty: float = 0.1) -> None:
+        self.index = index
+        self.contracts = index.contracts
+        self._risk_penalty = dict(risk_penalty)
+        self._default_penalty = default_penalty
+        self._skills: Dict[str, int] = {}
+        self._gap: Optional[List[int]] = None
+        self._tiers: Dict[Optional[int], Dict[Tuple[str, str], List[Tuple[float, int]]]] = {None: index.buckets}
+
+    def _build_tiers(self) -> None:
+        self._gap = gap = [self._worst_gap(reqs) for reqs in self.index.requirements]
+        for tier in (TIER_VISIBLE, TIER_READY):
+            self._tiers[tier] = {
+                bucket: [entry for entry in entries if gap[entry[1]] <= tier] for bucket, entries in self.index.buckets.items()
+            }
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    def sync_skills(self, skills: Mapping[str, int]) -> int:
+        """Apply a player's skill levels; returns how many contracts were re-tiered."""
+        changed = [skill for skill in set(skills) | set(self._skills) if skills.get(skill, 0) != self._skills.get(skill, 0)]
+        if not changed:
+            return 0
+        self._skills = dict(skills)
+        if self._gap is None:
+            return 0
+        index = self.index
+        touched = {idx for skill in changed for idx in index.by_skill.get(skill, ())}
+        moved = 0
+        for idx in touched:
+            old, new = self._gap[idx], self._worst_gap(index.requirements[idx])
+            if old == new:
+                continue
+            self._gap[idx] = new
+            before, after = set(self._tiers_for(old)), set(self._tiers_for(new))
+            entry = (-index.mean[idx], idx)
+            for tier in before - after:
+                entries = self._tiers[tier][index.bucket_of[idx]]
+                del entries[bisect.bisect_left(entries, entry)]
+            for tier in after - before:
+                bisect.insort(self._tiers[tier].setdefault(index.bucket_of[idx], []), entry)
+            moved += before != after
+        return moved
+
+    def _worst_gap(self, requirements: Tuple[Tuple[str, int], ...]) -> int:
+        if not requirements:
+            return 0
+        return max(req - self._skills.get(skill, 0) for skill, req in requirements)
+
+    @staticmethod
+    def _tiers_for(gap: int) -> Iterator[Optional[int]]:
+        yield None
+        if gap <= TIER_VISIBLE:
+            yield TIER_VISIBLE
+        if gap <= TIER_READY:
+            yield TIER_READY
+
+    # ------------------------------------------------------------------
+    # Queries
+    def query(self, query: ContractQuery, multipliers: Mapping[str, float], age: int = 99, law_watch: int = 0,
+              hidden: Collection[str] = (), chance: Optional[Callable[[TaskContract], float]] = None) -> ContractPage:
+        """One page of contracts; ``hidden`` ids (e.g. locked by prerequisites) are skipped.
+
+        With ``sort="ev"`` the page holds the same contracts as a payout query
+        and is ordered by ``chance(contract)`` times the scaled payout; without
+        ``chance`` it stays in payout order.
+        """
+        if query.sort not in SORT_KEYS:
+            raise ValueError("未知排序方式")
+        tier, exact_gap = self._pick_tier(query.max_gap)
+        if self._gap is None and (tier is not None or exact_gap is not None):
+            self._build_tiers()
+        risks = {query.risk} if isinstance(query.risk, str) else (set(query.risk) if query.risk else None)
+        streams = []
+        for bucket, entries in self._tiers[tier].items():
+            legality, risk = bucket
+            if query.legality and legality != query.legality:
+                continue
+            if risks is not None and risk not in risks:
+                continue
+            if query.visible_only and not self._bucket_visible(legality, risk, age, law_watch):
+                continue
+            factor = multipliers.get(legality, 1.0)
+            if query.sort == "risk_adjusted":
+                factor *= 1.0 - self._risk_penalty.get(risk, self._default_penalty)
+            lo = 0 if query.max_payout is None else bisect.bisect_left(entries, (-query.max_payout, -1))
+            hi = len(entries) if query.min_payout is None else bisect.bisect_right(entries, (-query.min_payout, len(self.contracts)))
+            streams.append(self._scaled(entries, lo, hi, factor))
+        merged: Iterable[Tuple[float, int]] = heapq.merge(*streams)
+        if exact_gap is not None:
+            merged = (item for item in merged if self._gap[item[1]] <= exact_gap)
+        if hidden:
+            merged = (item for item in merged if self.contracts[item[1]].contract_id not in hidden)
+        window = list(itertools.islice(merged, query.offset, query.offset + query.limit + 1))
+        page = window[:query.limit]
+        if query.sort == "ev" and chance is not None:
+            # Scores are negated, so ascending order is highest expected value first.
+            page.sort(key=lambda item: item[0] * chance(self.contracts[item[1]]))
+        items = [self.contracts[idx] for _, idx in page]
+        next_offset = query.offset + query.limit if len(window) > query.limit else None
+        return ContractPage(items=items, next_offset=next_offset)
+
+    def _pick_tier(self, max_gap: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+        if max_gap is None:
+            return None, None
+        if max_gap <= TIER_READY:
+            return TIER_READY, (max_gap if max_gap < TIER_READY else None)
+        if max_gap <= TIER_VISIBLE:
+            return TIER_VISIBLE, (max_gap if max_gap < TIER_VISIBLE else None)
+        return None, max_gap
+
+    @staticmethod
+    def _bucket_visible(legality: str, risk: str, age: int, law_watch: int) -> bool:
+        if age < 14 and risk == "high":
+            return False
+        if law_watch > 40 and legality == "illegal" and risk == "high":
+            return False
+        return True
+
+    @staticmethod
+    def _scaled(entries: List[Tuple[float, int]], lo: int, hi: int, factor: float) -> Iterator[Tuple[float, int]]:
+        for pos in range(lo, hi):
+            neg_mean, idx = entries[pos]
+            yield neg_mean * factor, idx
@@ -0,0 +1,125 @@
+"""World-level shared economy: many sessions, one market."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Sequence
+
+from .content import MARKET_TRENDS, TASK_CONTRACTS
+from .models import MarketSnapshot, TaskContract
+
+
+@dataclass(frozen=True)
+class EconomySnapshot:
+    """Immutable market state published by one tick.
+
+    ``supply`` holds one payout factor per contract (1.0 = uncrowded);
+    ``pressure`` is how far enforcement sits above the trend's baseline.
+    """
+
+    version: int
+    trend_index: int
+    market: MarketSnapshot
+    pressure: int
+    illegal_share: float
+    supply: array
+    index: Mapping[str, int]
+
+    def contract_factor(self, contract_id: str) -> float:
+        idx = self.index.get(contract_id)
+        return 1.0 if idx is None else self.supply[idx]
+
+
+class WorldEconomy:
+    """Shared market driven by what every attached session takes.
+
+    Sessions only append to a pending queue (``deque.append`` is atomic) and
+    read ``snapshot``, which a single ``tick()`` replaces wholesale, so
+    readers never lock and always see one consistent version. Each tick
+    folds the queued reports into per-contract demand (exponential moving
+    average) and derives payout factors, legality multipliers and the
+    enforcement level from the lawful/illegal mix.
+    """
+
+    def __init__(self, contracts: Sequence[TaskContract] = TASK_CONTRACTS, trends: Sequence[Dict[str, object]] = MARKET_TRENDS,
+                 trend_index: int = 0, capacity: float = 20.0, smoothing: float = 0.3, min_supply: float = 0.4,
+                 enforcement_swing: int = 30) -> None:
+        if not 0 < smoothing <= 1:
+            raise ValueError("平滑系数需在 (0, 1] 内")
+        if capacity <= 0:
+            raise ValueError("容量必须为正")
+        self.contracts = list(contracts)
+        self.trends = list(trends)
+        self.capacity = capacity
+        self.smoothing = smoothing
+        self.min_supply = min_supply
+        self.enforcement_swing = enforcement_swing
+        self._index = {c.contract_id: idx for idx, c in enumerate(self.contracts)}
+        self._illegal = array("b", (c.legality == "illegal" for c in self.contracts))
+        self._demand = array("d", bytes(8 * len(self.contracts)))
+        self._pending: deque = deque()
+        self._trend_index = trend_index % len(self.trends)
+        self.snapshot = self._publish(0, 0.0)
+
+    # ------------------------------------------------------------------
+    # Session side
+    def report(self, contract_id: str) -> None:
+        idx = self._index.get(contract_id)
+        if idx is not None:
+            self._pending.append(idx)
+
+    def report_many(self, contract_ids: Iterable[str]) -> None:
+        index = self._index
+        self._pending.extend(index[cid] for cid in contract_ids if cid in index)
+
+    # ------------------------------------------------------------------
+    # Host side
+    def set_trend(self, index: int) -> EconomySnapshot:
+        self._trend_index = index % len(self.trends)
+        return self.tick()
+
+    def advance_trend(self) -> EconomySnapshot:
+        return self.set_trend(self._trend_index + 1)
+
+    def tick(self) -> EconomySnapshot:
+        """Fold every report queued so far into demand and publish a new snapshot."""
+        counts = array("d", bytes(8 * len(self.contracts)))
+        pending = self._pending
+        while True:
+            try:
+                counts[pending.popleft()] += 1
+            except IndexError:
+                break
+        keep = 1.0 - self.smoothing
+        alpha = self.smoothing
+        self._demand = demand = array("d", (d * keep + c * alpha for d, c in zip(self._demand, counts)))
+        illegal = sum(d for d, flag in zip(demand, self._illegal) if flag)
+        total = sum(demand)
+        share = illegal / total if total else 0.0
+        self.snapshot = self._publish(self.snapshot.version + 1, share)
+        return self.snapshot
+
+    def _publish(self, version: int, illegal_share: float) -> EconomySnapshot:
+        trend = self.trends[self._trend_index]
+        # An even mix leaves enforcement at the trend baseline; an all-illegal world adds the full swing.
+        pressure = round(max(0.0, illegal_share - 0.5) * 2 * self.enforcement_swing)
+        enforcement = min(100, trend["enforcement"] + pressure)
+        # Underground work pays a risk premium while enforcement is raised; lawful work pays more when scarce.
+        lawful_mult = trend["lawful"] * (1.0 + 0.2 * max(0.0, illegal_share - 0.5))
+        underground_mult = trend["underground"] * (1.0 + pressure / 200)
+        floor, capacity = self.min_supply, self.capacity
+        supply = array("d", (max(floor, capacity / (capacity + d)) for d in self._demand))
+        market = MarketSnapshot(
+            lawful_multiplier=round(lawful_mult, 3),
+            underground_multiplier=round(underground_mult, 3),
+            enforcement_level=enforcement,
+            trend=trend["trend"],
+        )
+        return EconomySnapshot(version, self._trend_index, market, pressure, illegal_share, supply, self._index)
+
+    def demand(self) -> Dict[str, float]:
+        return {c.contract_id: self._demand[idx] for idx, c in enumerate(self.contracts)}
+
+    def pending(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,117 @@
+"""Effect maps (gear bonuses, crisis deltas, skill gains) compiled to flat programs."""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, Hashable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from .models import Attributes, CrisisEvent, GearItem, Player, Reputation, Resources, TrainingModule
+
+SLOT_ATTRIBUTES, SLOT_REPUTATION, SLOT_RESOURCES, SLOT_SKILLS = range(4)
+
+# Resolution order matches the old hasattr chain: attributes, reputation, resources, skills.
+SLOT_FIELDS: Tuple[Tuple[int, frozenset], ...] = (
+    (SLOT_ATTRIBUTES, frozenset(f.name for f in fields(Attributes))),
+    (SLOT_REPUTATION, frozenset(f.name for f in fields(Reputation))),
+    (SLOT_RESOURCES, frozenset(f.name for f in fields(Resources))),
+    (SLOT_SKILLS, frozenset(Player.default_skills())),
+)
+
+# (slot, key, change, lower bound or None, upper bound or None)
+EffectOp = Tuple[int, str, int, Optional[int], Optional[int]]
+EffectProgram = Tuple[EffectOp, ...]
+
+
+def compile_effect(delta: Mapping[str, int], source: str, skill_bounds: Tuple[Optional[int], Optional[int]] = (0, 10)) -> EffectProgram:
+    """Resolve every key of ``delta`` to its slot once; unknown keys are an error."""
+    program = []
+    for key, change in delta.items():
+        slot = next((slot for slot, names in SLOT_FIELDS if key in names), None)
+        if slot is None:
+            raise ValueError(f"{source} 未知效果字段：{key}")
+        lo, hi = skill_bounds if slot == SLOT_SKILLS else (None, None)
+        program.append((slot, key, int(change), lo, hi))
+    return tuple(program)
+
+
+def apply_effect(player: Player, program: EffectProgram) -> None:
+    sections = (player.attributes, player.reputation, player.resources)
+    skills = player.skills
+    for slot, key, change, lo, hi in program:
+        if slot == SLOT_SKILLS:
+            value = skills.get(key, 0) + change
+        else:
+            value = getattr(sections[slot], key) + change
+        if lo is not None and value < lo:
+            value = lo
+        if hi is not None and value > hi:
+            value = hi
+        if slot == SLOT_SKILLS:
+            skills[key] = value
+        else:
+            setattr(sections[slot], key, value)
+
+
+class LazyPrograms(Mapping):
+    """Programs compiled on first lookup and memoised.
+
+    ``keys`` lists what can be looked up (evaluated only when iterated);
+    ``compile_one`` raises ``KeyError`` for anything unknown.
+    """
+
+    def __init__(self, keys: Callable[[], Iterator[Hashable]], compile_one: Callable[[Hashable], object]) -> None:
+        self._keys = keys
+        self._compile = compile_one
+        self._memo: Dict[Hashable, object] = {}
+
+    def __getitem__(self, key: Hashable) -> object:
+        try:
+            return self._memo[key]
+        except KeyError:
+            program = self._memo[key] = self._compile(key)
+            return program
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._keys())
+
+
+@dataclass(frozen=True)
+class CompiledEffects:
+    training: Mapping[str, EffectProgram]
+    gear: Mapping[str, EffectProgram]
+    crisis: Mapping[Tuple[str, int], Tuple[EffectProgram, EffectProgram]]  # (event_id, option) -> (success, failure)
+
+    def compile_all(self) -> "CompiledEffects":
+        """Force every program, surfacing the first unknown key."""
+        for table in (self.training, self.gear, self.crisis):
+            for key in table:
+                table[key]
+        return self
+
+
+def lazy_content(training: Mapping[str, TrainingModule], gear: Mapping[str, GearItem], crisis: Mapping[str, CrisisEvent]) -> CompiledEffects:
+    """Effect tables over id maps that compile each entry on first use."""
+
+    def crisis_program(key: Tuple[str, int]) -> Tuple[EffectProgram, EffectProgram]:
+        event_id, idx = key
+        options = crisis[event_id].options
+        if not 0 <= idx < len(options):
+            raise KeyError(key)
+        option = options[idx]
+        return (compile_effect(option.success_delta, f"危机 {event_id}[{idx}]"),
+                compile_effect(option.failure_delta, f"危机 {event_id}[{idx}]"))
+
+    return CompiledEffects(
+        training=LazyPrograms(lambda: iter(training), lambda mid: compile_effect(training[mid].skill_gain, f"训练 {mid}", (None, 10))),
+        gear=LazyPrograms(lambda: iter(gear), lambda iid: compile_effect(gear[iid].bonuses, f"装备 {iid}", (None, 10))),
+        crisis=LazyPrograms(lambda: ((eid, idx) for eid, event in crisis.items() for idx in range(len(event.options))), crisis_program),
+    )
+
+
+def compile_content(training: Sequence[TrainingModule], gear: Sequence[GearItem], crisis: Sequence[CrisisEvent]) -> CompiledEffects:
+    """Compile all effect maps of a content set; raises on the first unknown key."""
+    return lazy_content(
+        {m.module_id: m for m in training}, {g.item_id: g for g in gear}, {e.event_id: e for e in crisis}
+    ).compile_all()
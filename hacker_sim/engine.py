@@ -2,26 +2,157 @@
 from __future__ import annotations
 
 import operator
-import random
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
 
-from .content import BACKGROUNDS, CRISIS_EVENTS, GEAR_CATALOG, MARKET_TRENDS, TASK_CONTRACTS, TRAINING_MODULES
-from .models import CrisisEvent, GearItem, MarketSnapshot, Player, TaskContract, TrainingModule
+from .contract_board import ContractBoard, ContractPage, ContractQuery
+from .content import (
+    BACKGROUNDS,
+    CRISIS_EVENTS,
+    GEAR_CATALOG,
+    MARKET_TRENDS,
+    TASK_CONTRACTS,
+    TRAINING_MODULES,
+    UNLOCK_PREREQUISITES,
+    UNLOCK_ROOT,
+)
+from .economy import EconomySnapshot, WorldEconomy
+from .content.registry import ContentRegistry, ContentStore
+from .effects import EffectProgram, apply_effect, compile_effect
+from .models import ActionBatch, ChangeCallback, CrisisEvent, CrisisOption, GearItem, MarketSnapshot, Player, TaskContract, TrainingModule
+from .rng import RandomStreams
+from .scheduler import EventScheduler, ScheduledEvent, game_clock
+from .skill_graph import SkillGraph
+
+RISK_PENALTY = {"low": 0.0, "medium": 0.08, "high": 0.18}
+# Process-wide live content; reloads publish new versions here.
+CONTENT = ContentStore(ContentRegistry.build(
+    0, TRAINING_MODULES, TASK_CONTRACTS, GEAR_CATALOG, CRISIS_EVENTS, MARKET_TRENDS, BACKGROUNDS, UNLOCK_PREREQUISITES, UNLOCK_ROOT
+))
 
 
 class GameEngine:
-    def __init__(self, seed: Optional[int] = None) -> None:
-        self.rng = random.Random(seed)
-        self.player: Optional[Player] = None
-        self.market_index = 0
-        self.active_crisis: Optional[CrisisEvent] = None
+    def __init__(self, seed: Optional[int] = None, economy: Optional[WorldEconomy] = None, content: Optional[ContentStore] = None) -> None:
+        self.rng = RandomStreams(seed)
+        self.economy = economy
+        self.content_store = content or CONTENT
+        self.content: ContentRegistry = self.content_store.current
+        self._listeners: List[ChangeCallback] = []
+        self._crisis: Optional[CrisisEvent] = None
+        self._player: Optional[Player] = None
+        self._market_index = 0
+        self._board: Optional[ContractBoard] = None
+        # Player state compiled against ``self.content.graph``; see ``_unlock_bits``/``_skill_bits``.
+        self._bits_owner: Tuple[Optional[Player], Optional[SkillGraph]] = (None, None)
+        self._unlocked_bits = 0
+        self._unlocked_count = 0
+        self._skill_mask: Optional[Tuple[Player, SkillGraph, int, int]] = None
+        self._locked: Tuple[int, FrozenSet[str]] = (-1, frozenset())
+        self.scheduler = EventScheduler()
+        self._handlers: Dict[str, Callable[[ScheduledEvent], None]] = {
+            "crisis": self._on_scheduled_crisis,
+            "market": self._on_scheduled_market,
+            "cost": self._on_scheduled_cost,
+            "deadline": self._on_scheduled_deadline,
+        }
+
+    # ------------------------------------------------------------------
+    # Change stream
+    def subscribe(self, callback: ChangeCallback) -> Callable[[], None]:
+        """Receive ``(path, old, new)`` for every state change; returns an unsubscribe hook.
+
+        Paths are ``"attributes.exposure"``, ``"skills.web"``, ``"day"`` and so on,
+        plus ``"player"`` when the player is replaced, ``"market_index"``,
+        ``"crisis"`` and ``"log"`` (new line as ``new``).
+        """
+        self._listeners.append(callback)
+        if len(self._listeners) == 1 and self.player:
+            self.player.observe(self._emit)
+
+        def unsubscribe() -> None:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+                if not self._listeners and self.player:
+                    self.player.observe(None)
+
+        return unsubscribe
+
+    def _emit(self, path: str, old: object, new: object) -> None:
+        for callback in list(self._listeners):
+            callback(path, old, new)
+
+    @property
+    def player(self) -> Optional[Player]:
+        return self._player
+
+    @player.setter
+    def player(self, player: Optional[Player]) -> None:
+        old, self._player = self._player, player
+        if not self._listeners:
+            return
+        if old is not None:
+            old.observe(None)
+        if player is not None:
+            player.observe(self._emit)
+        if old is not player:
+            self._emit("player", old, player)
+
+    @property
+    def market_index(self) -> int:
+        return self._market_index
+
+    @market_index.setter
+    def market_index(self, index: int) -> None:
+        old, self._market_index = self._market_index, index
+        if self._listeners and old != index:
+            self._emit("market_index", old, index)
+
+    @property
+    def board(self) -> ContractBoard:
+        """This player's contract board over the content version's shared index, built on first query."""
+        if self._board is None:
+            self._board = ContractBoard(self.content.contract_index, RISK_PENALTY)
+        return self._board
+
+    @property
+    def active_crisis(self) -> Optional[CrisisEvent]:
+        return self._crisis
+
+    @active_crisis.setter
+    def active_crisis(self, crisis: Optional[CrisisEvent]) -> None:
+        old, self._crisis = self._crisis, crisis
+        if self._listeners and old is not crisis:
+            self._emit("crisis", old, crisis)
+
+    # ------------------------------------------------------------------
+    # Content version
+    def _pin(self) -> ContentRegistry:
+        """Adopt the live content version; called once at the start of every action.
+
+        Everything below reads ``self.content``, so an action started on one
+        version finishes on it even if a reload is published meanwhile.
+        """
+        current = self.content_store.current
+        self._skill_mask = None
+        if current is not self.content:
+            self._adopt(current)
+        return current
+
+    def _adopt(self, registry: ContentRegistry) -> None:
+        self.content = registry
+        self._board = None
+        if self.active_crisis:
+            # Held references are remapped by id; a crisis removed from content is dropped.
+            self.active_crisis = registry.crisis_by_id.get(self.active_crisis.event_id)
+        if self.market_index >= len(registry.market):
+            self.market_index %= len(registry.market)
 
     # ------------------------------------------------------------------
     # Player lifecycle
     def create_player(self, codename: str, background_key: str) -> Player:
-        if background_key not in BACKGROUNDS:
+        backgrounds = self._pin().backgrounds
+        if background_key not in backgrounds:
             raise ValueError("未知背景")
-        profile = BACKGROUNDS[background_key]
+        profile = backgrounds[background_key]
         player = Player(codename=codename or "Zero", background=background_key)
         for attr, delta in profile["mods"].items():
             setattr(player.attributes, attr, max(0, getattr(player.attributes, attr) + delta))
@@ -39,6 +170,7 @@ class GameEngine:
         return {
             "player": self.player.to_dict(),
             "market_index": self.market_index,
+            "schedule": self.scheduler.to_list(),
         }
 
     def import_state(self, payload: dict) -> None:
@@ -47,44 +179,58 @@ class GameEngine:
             raise RuntimeError("存档损坏")
         self.player = Player.from_dict(player_data)
         self.market_index = payload.get("market_index", 0)
+        self.scheduler = EventScheduler.from_list(payload.get("schedule", []))
         self.active_crisis = None
-    def list_training(self) -> List[TrainingModule]:
-        return TRAINING_MODULES
+        self._pin()
+        self._backfill_unlocks()
+
+    def list_training(self) -> Sequence[TrainingModule]:
+        return self._pin().training
 
     def run_training(self, module_id: str) -> Tuple[bool, str]:
         self._require_player()
-        module = next((mod for mod in TRAINING_MODULES if mod.module_id == module_id), None)
+        self._pin()
+        module = self._find_training(module_id)
+        roll = self._train(module)
+        msg = f"完成训练《{module.title}》" if roll else f"训练失败《{module.title}》，需要复盘"
+        self._log(msg)
+        self._check_crisis_flags()
+        return roll, msg
+
+    def _find_training(self, module_id: str) -> TrainingModule:
+        module = self.content.training_by_id.get(module_id)
         if not module:
             raise ValueError("未知训练模块")
+        self._require_prerequisites(module_id)
+        return module
+
+    def _train(self, module: TrainingModule) -> bool:
         if self.player.resources.credits < module.cost:
             raise RuntimeError("资金不足")
         self.player.resources.credits -= module.cost
         roll = self._training_success(module)
         self._advance_time(module.hours)
         if roll:
-            for skill, inc in module.skill_gain.items():
-                self.player.skills[skill] = min(10, self.player.skills.get(skill, 0) + inc)
+            self._apply_effect(self.content.effects.training[module.module_id])
             self.player.resources.research_points += 1
-            msg = f"完成训练《{module.title}》"
-        else:
-            msg = f"训练失败《{module.title}》，需要复盘"
-        self._log(msg)
-        self._check_crisis_flags()
-        return roll, msg
+            self._unlock(module.module_id)
+        return roll
 
     def _training_success(self, module: TrainingModule) -> bool:
+        return self.rng.training.random() < self._training_chance(module)
+
+    def _training_chance(self, module: TrainingModule) -> float:
         intellect = self.player.attributes.intellect / 100
         discipline = self.player.attributes.discipline / 100
         base = module.base_success
         bonus = 0.05 * intellect + 0.03 * discipline + self.player.resources.hardware * 0.01
         penalty = max(0, (self.player.attributes.exposure - 20) * 0.002)
-        chance = max(0.2, min(0.98, base + bonus - penalty))
-        return self.rng.random() < chance
+        return max(0.2, min(0.98, base + bonus - penalty))
 
     # ------------------------------------------------------------------
     # Contracts
-    def list_contracts(self, legality: Optional[str] = None) -> List[TaskContract]:
-        contracts = TASK_CONTRACTS
+    def list_contracts(self, legality: Optional[str] = None) -> Sequence[TaskContract]:
+        contracts = self._pin().contracts
         if self.player:
             filtered = [c for c in contracts if self._contract_visible(c)]
             if filtered:
@@ -93,11 +239,24 @@ class GameEngine:
             contracts = [c for c in contracts if c.legality == legality]
         return contracts
 
+    def query_contracts(self, query: Optional[ContractQuery] = None, **filters) -> ContractPage:
+        query = query or ContractQuery(**filters)
+        self._pin()
+        snapshot = self._market_snapshot()
+        multipliers = {"lawful": snapshot.lawful_multiplier, "illegal": snapshot.underground_multiplier}
+        if not self.player:
+            return self.board.query(query, multipliers)
+        self.board.sync_skills(self.player.skills)
+        world = self.economy.snapshot if self.economy else None
+        return self.board.query(query, multipliers, self.player.age, self.player.reputation.law_watch, self._locked_contracts(),
+                                chance=lambda contract: self._contract_chance(contract, world))
+
     def _contract_visible(self, contract: TaskContract) -> bool:
         if not self.player:
             return True
-        worst_gap = max((req - self.player.skills.get(skill, 0)) for skill, req in contract.requirements.items()) if contract.requirements else 0
-        if worst_gap > 2:
+        if not self.content.graph.meets_skills(contract.contract_id, self._skill_bits()[1]):
+            return False
+        if not self.prerequisites_met(contract.contract_id):
             return False
         if self.player.age < 14 and contract.risk == "high":
             return False
@@ -107,41 +266,66 @@ class GameEngine:
 
     def start_contract(self, contract_id: str) -> str:
         self._require_player()
-        contract = next((c for c in TASK_CONTRACTS if c.contract_id == contract_id), None)
+        self._pin()
+        contract = self._find_contract(contract_id)
+        success, payout, loss = self._run_contract(contract)
+        if success:
+            msg = f"完成任务《{contract.name}》，收入¥{payout}" if contract.legality == "lawful" else f"成功执行地下委托《{contract.name}》，收益¥{payout}"
+        else:
+            msg = f"任务失败《{contract.name}》，损失¥{loss}" if loss else f"任务失败《{contract.name}》"
+        self._log(msg)
+        self._maybe_trigger_crisis(contract, success)
+        self._check_crisis_flags()
+        return msg
+
+    def _find_contract(self, contract_id: str) -> TaskContract:
+        contract = self.content.contract_by_id.get(contract_id)
         if not contract:
             raise ValueError("未知契约")
-        if not self._meets_requirements(contract.requirements):
+        if not self.content.graph.meets_skills(contract_id, self._skill_bits()[0]):
             raise RuntimeError("技能不足")
-        success = self._contract_success(contract)
-        snapshot = self._market_snapshot()
+        self._require_prerequisites(contract_id)
+        return contract
+
+    def _run_contract(self, contract: TaskContract) -> Tuple[bool, int, int]:
+        """Roll and settle a contract; returns ``(success, payout, loss)``."""
+        # One economy version for the whole contract, even if the world ticks meanwhile.
+        world = self.economy.snapshot if self.economy else None
+        success = self._contract_success(contract, world)
+        snapshot = world.market if world else self._market_snapshot()
         payout_multiplier = snapshot.lawful_multiplier if contract.legality == "lawful" else snapshot.underground_multiplier
-        payout = self.rng.randint(*contract.payout_range)
+        if world:
+            # Crowded contracts pay less; the take is reported for the next world tick.
+            payout_multiplier *= world.contract_factor(contract.contract_id)
+            self.economy.report(contract.contract_id)
+        payout = self.rng.payouts.randint(*contract.payout_range)
         payout = int(payout * payout_multiplier)
-        self._advance_time(self.rng.randint(4, 10))
+        self._advance_time(self.rng.time.randint(4, 10))
+        loss = 0
         if success:
             self.player.resources.credits += payout
             self._adjust_rep(contract, True)
-            msg = f"完成任务《{contract.name}》，收入¥{payout}" if contract.legality == "lawful" else f"成功执行地下委托《{contract.name}》，收益¥{payout}"
+            self._unlock(contract.contract_id)
         else:
             loss = payout // 4
             self.player.resources.credits = max(0, self.player.resources.credits - loss)
             self._adjust_rep(contract, False)
             self.player.attributes.exposure += 5 if contract.legality == "illegal" else 2
-            msg = f"任务失败《{contract.name}》，损失¥{loss}" if loss else f"任务失败《{contract.name}》"
-        self._log(msg)
-        self._maybe_trigger_crisis(contract, success)
-        self._check_crisis_flags()
-        return msg
+        return success, payout, loss
 
-    def _contract_success(self, contract: TaskContract) -> bool:
+    def _contract_success(self, contract: TaskContract, world: Optional[EconomySnapshot] = None) -> bool:
+        return self.rng.contracts.random() < self._contract_chance(contract, world)
+
+    def _contract_chance(self, contract: TaskContract, world: Optional[EconomySnapshot] = None) -> float:
         base = 0.6
         skill_bonus = sum(self.player.skills.get(skill, 0) - need for skill, need in contract.requirements.items()) * 0.04
         gear_bonus = (self.player.resources.hardware + self.player.resources.network) * 0.02
-        risk_penalty = {"low": 0.0, "medium": 0.08, "high": 0.18}.get(contract.risk, 0.1)
+        risk_penalty = RISK_PENALTY.get(contract.risk, 0.1)
         exposure_penalty = self.player.attributes.exposure * 0.002
         law_penalty = self.player.reputation.law_watch * 0.003 if contract.legality == "illegal" else 0.0
-        chance = max(0.1, min(0.95, base + skill_bonus + gear_bonus - risk_penalty - exposure_penalty - law_penalty))
-        return self.rng.random() < chance
+        if world and contract.legality == "illegal":
+            law_penalty += world.pressure * 0.003
+        return max(0.1, min(0.95, base + skill_bonus + gear_bonus - risk_penalty - exposure_penalty - law_penalty))
 
     def _adjust_rep(self, contract: TaskContract, success: bool) -> None:
         delta = 10 if success else -7
@@ -163,46 +347,175 @@ class GameEngine:
 
     # ------------------------------------------------------------------
     # Gear
-    def list_gear(self) -> List[GearItem]:
-        return GEAR_CATALOG
+    def list_gear(self) -> Sequence[GearItem]:
+        return self._pin().gear
 
     def purchase_gear(self, item_id: str) -> str:
         self._require_player()
-        item = next((g for g in GEAR_CATALOG if g.item_id == item_id), None)
+        self._pin()
+        item = self._find_gear(item_id)
+        self._buy(item)
+        msg = f"购入 {item.name}"
+        self._log(msg)
+        self._check_crisis_flags()
+        return msg
+
+    def _find_gear(self, item_id: str) -> GearItem:
+        item = self.content.gear_by_id.get(item_id)
         if not item:
             raise ValueError("未知装备")
+        self._require_prerequisites(item_id)
+        return item
+
+    def _buy(self, item: GearItem) -> None:
         if self.player.resources.credits < item.cost:
             raise RuntimeError("资金不足")
         self.player.resources.credits -= item.cost
-        for key, value in item.bonuses.items():
-            if hasattr(self.player.attributes, key):
-                setattr(self.player.attributes, key, getattr(self.player.attributes, key) + value)
-            elif hasattr(self.player.resources, key):
-                setattr(self.player.resources, key, getattr(self.player.resources, key) + value)
-            elif key in self.player.skills:
-                self.player.skills[key] = min(10, self.player.skills[key] + value)
-        msg = f"购入 {item.name}"
+        self._apply_effect(self.content.effects.gear[item.item_id])
+        self._unlock(item.item_id)
+
+    # ------------------------------------------------------------------
+    # Batches
+    def apply_actions(self, actions: Sequence[Sequence[str]], checkpoint_every: int = 0) -> ActionBatch:
+        """Run ``("train"|"contract"|"gear", id)`` / ``("market",)`` actions in one call.
+
+        Per-action messages are skipped; every ``checkpoint_every`` actions (and
+        at the end) one summary line is logged and crisis triggers are
+        evaluated. Rejected actions (malformed, unknown id, funds, skills) get
+        status -1 and change nothing; like the per-call API they do not count
+        toward the player's age.
+        """
+        self._require_player()
+        self._pin()
+        batch = ActionBatch.allocate(len(actions))
+        player = self.player
+        resources, reputation = player.resources, player.reputation
+        status, credits_col, payout_col, law_col, hours_col = batch.status, batch.credits, batch.payout, batch.law_watch, batch.hours
+        find_training, find_contract, find_gear = self._find_training, self._find_contract, self._find_gear
+        train, run_contract, buy = self._train, self._run_contract, self._buy
+        last = len(actions) - 1
+        window = executed = successes = 0
+        window_credits = resources.credits
+        trace = False
+        for idx, action in enumerate(actions):
+            credits, law_watch, clock = resources.credits, reputation.law_watch, player.day * 24 + player.hour
+            try:
+                kind = action[0]
+                if kind == "train":
+                    ok = train(find_training(action[1]))
+                elif kind == "contract":
+                    contract = find_contract(action[1])
+                    ok, payout_col[idx], _ = run_contract(contract)
+                    trace = trace or (ok and contract.legality == "illegal" and reputation.law_watch > 25)
+                elif kind == "gear":
+                    buy(find_gear(action[1]))
+                    ok = True
+                elif kind == "market":
+                    self._cycle_market()
+                    ok = True
+                else:
+                    raise ValueError("未知行动")
+                status[idx] = 1 if ok else 0
+                successes += ok
+                executed += 1
+            except (ValueError, RuntimeError, IndexError, TypeError):
+                status[idx] = -1
+            credits_col[idx] = resources.credits - credits
+            law_col[idx] = reputation.law_watch - law_watch
+            hours_col[idx] = player.day * 24 + player.hour - clock
+            window += 1
+            if window == checkpoint_every or idx == last:
+                self._batch_checkpoint(batch, idx, window, executed, successes, resources.credits - window_credits, trace)
+                window = executed = successes = 0
+                window_credits = resources.credits
+                trace = False
+        return batch
+
+    def _batch_checkpoint(self, batch: ActionBatch, idx: int, count: int, executed: int, successes: int, credit_delta: int,
+                          trace: bool) -> None:
+        self._log(f"批量行动 {count} 次：成功 {successes} 次，资金变化 ¥{credit_delta:+d}", events=executed)
+        before = self.active_crisis
+        if trace:
+            self._set_crisis("law_trace")
+        self._check_crisis_flags()
+        if self.active_crisis and self.active_crisis is not before:
+            batch.crises.append((idx, self.active_crisis.event_id))
+
+    # ------------------------------------------------------------------
+    # Scheduled events
+    def schedule_event(self, kind: str, in_hours: Optional[int] = None, at: Optional[int] = None, every: int = 0, **payload) -> ScheduledEvent:
+        """Schedule ``kind`` (crisis/market/cost/deadline) at a game hour.
+
+        ``at`` is an absolute ``game_clock`` value, ``in_hours`` is relative to
+        now; ``every`` re-arms the event with that period in hours.
+        """
+        self._require_player()
+        self._pin()
+        if kind not in self._handlers:
+            raise ValueError("未知事件类型")
+        if kind == "deadline":
+            compile_effect(payload.get("delta", {}), "期限")
+        elif kind == "crisis" and payload.get("event_id") not in self.content.crisis_by_id:
+            raise ValueError(f"未知危机：{payload.get('event_id')}")
+        now = game_clock(self.player.day, self.player.hour)
+        due = at if at is not None else now + (in_hours or 0)
+        if due < now:
+            raise ValueError("不能安排过去的事件")
+        return self.scheduler.schedule(due, kind, payload, every)
+
+    def wait(self, hours: int) -> str:
+        self._require_player()
+        if hours <= 0:
+            raise ValueError("时长必须为正")
+        self._pin()
+        self._advance_time(hours)
+        msg = f"休整 {hours} 小时"
         self._log(msg)
         self._check_crisis_flags()
         return msg
 
+    def _on_scheduled_crisis(self, event: ScheduledEvent) -> None:
+        # Checked when scheduled; a crisis removed by a later content reload is skipped.
+        self._set_crisis(event.payload.get("event_id"))
+
+    def _on_scheduled_market(self, event: ScheduledEvent) -> None:
+        self._log(f"市场变化：{self._cycle_market()}")
+
+    def _on_scheduled_cost(self, event: ScheduledEvent) -> None:
+        amount = int(event.payload.get("amount", 0))
+        self.player.resources.credits = max(0, self.player.resources.credits - amount)
+        self._log(f"{event.payload.get('label', '固定支出')}：¥{amount}")
+
+    def _on_scheduled_deadline(self, event: ScheduledEvent) -> None:
+        self._apply_effect(compile_effect(event.payload.get("delta", {}), "期限"))
+        self._log(f"期限到达：{event.payload.get('label', '未命名')}")
+
     # ------------------------------------------------------------------
     # Market + crisis
     def advance_market(self) -> MarketSnapshot:
-        self.market_index = (self.market_index + 1) % len(MARKET_TRENDS)
-        trend = MARKET_TRENDS[self.market_index]
-        snapshot = MarketSnapshot(
-            lawful_multiplier=trend["lawful"],
-            underground_multiplier=trend["underground"],
-            enforcement_level=trend["enforcement"],
-            trend=trend["trend"],
-        )
-        self._log(f"市场变化：{trend['name']}")
+        self._pin()
+        self._log(f"市场变化：{self._cycle_market()}")
         self._check_crisis_flags()
-        return snapshot
+        return self._market_snapshot()
+
+    def _cycle_market(self) -> str:
+        """Move to the next market trend and return its name.
+
+        With a shared economy attached the trend belongs to the host, which
+        alone advances and ticks it; a session only reports the world's
+        current trend. The per-session index only drives standalone play.
+        """
+        if self.economy:
+            world = self.economy.snapshot
+            return self.economy.trends[world.trend_index]["name"]
+        market = self.content.market
+        self.market_index = (self.market_index + 1) % len(market)
+        return market[self.market_index]["name"]
 
     def _market_snapshot(self) -> MarketSnapshot:
-        trend = MARKET_TRENDS[self.market_index]
+        if self.economy:
+            return self.economy.snapshot.market
+        trend = self.content.market[self.market_index]
         return MarketSnapshot(
             lawful_multiplier=trend["lawful"],
             underground_multiplier=trend["underground"],
@@ -212,37 +525,28 @@ class GameEngine:
 
     # Crisis management
     def get_active_crisis(self) -> Optional[CrisisEvent]:
+        self._pin()
         return self.active_crisis
 
     def resolve_crisis(self, option_index: int) -> Tuple[bool, str]:
         self._require_player()
+        self._pin()
         if not self.active_crisis:
             raise RuntimeError("当前没有危机")
         crisis = self.active_crisis
         if option_index < 0 or option_index >= len(crisis.options):
             raise ValueError("非法选项")
         option = crisis.options[option_index]
-        chance = option.base_success + self._crisis_requirement_bonus(option.requirement)
-        chance = max(0.05, min(0.95, chance))
-        success = self.rng.random() < chance
-        delta = option.success_delta if success else option.failure_delta
-        self._apply_delta_map(delta)
+        success = self.rng.crisis.random() < self._crisis_chance(option)
+        self._apply_effect(self.content.effects.crisis[(crisis.event_id, option_index)][0 if success else 1])
         msg = f"危机《{crisis.title}》{'化解' if success else '处理失败'}"
         self._log(msg)
         self.active_crisis = None
         self._check_crisis_flags()
         return success, msg
 
-    def _apply_delta_map(self, delta: Dict[str, int]) -> None:
-        for key, change in delta.items():
-            if hasattr(self.player.attributes, key):
-                setattr(self.player.attributes, key, getattr(self.player.attributes, key) + change)
-            elif hasattr(self.player.reputation, key):
-                setattr(self.player.reputation, key, getattr(self.player.reputation, key) + change)
-            elif hasattr(self.player.resources, key):
-                setattr(self.player.resources, key, getattr(self.player.resources, key) + change)
-            elif key in self.player.skills:
-                self.player.skills[key] = max(0, min(10, self.player.skills[key] + change))
+    def _crisis_chance(self, option: CrisisOption) -> float:
+        return max(0.05, min(0.95, option.base_success + self._crisis_requirement_bonus(option.requirement)))
 
     def _crisis_requirement_bonus(self, requirement: Optional[str]) -> float:
         if not requirement or not self.player:
@@ -258,7 +562,7 @@ class GameEngine:
     def _check_crisis_flags(self) -> None:
         if not self.player or self.active_crisis:
             return
-        for event in CRISIS_EVENTS:
+        for event in self.content.crisis:
             if self._crisis_condition(event.trigger):
                 self.active_crisis = event
                 self._log(f"危机触发：{event.title}")
@@ -272,38 +576,139 @@ class GameEngine:
             current = self.player.reputation.law_watch
             return (operator.gt if op_char == ">" else operator.lt)(current, value)
         if expr == "market_high":
-            return self.market_index == len(MARKET_TRENDS) - 1
+            if self.economy:
+                return self.economy.snapshot.trend_index == len(self.economy.trends) - 1
+            return self.market_index == len(self.content.market) - 1
         return False
 
     def _set_crisis(self, event_id: str) -> None:
         if self.active_crisis:
             return
-        crisis = next((evt for evt in CRISIS_EVENTS if evt.event_id == event_id), None)
+        crisis = self.content.crisis_by_id.get(event_id)
         if crisis:
             self.active_crisis = crisis
             self._log(f"危机触发：{crisis.title}")
 
     # ------------------------------------------------------------------
     def _advance_time(self, hours: int) -> None:
-        self.player.hour += hours
-        while self.player.hour >= 24:
-            self.player.hour -= 24
-            self.player.day += 1
-            self.player.attributes.exposure = max(0, self.player.attributes.exposure - 1)
+        target = game_clock(self.player.day, self.player.hour) + hours
+        due = self.scheduler.next_due()
+        if due is not None and due <= target:
+            for fired, event in self.scheduler.pop_due(target):
+                self._set_clock(max(fired, game_clock(self.player.day, self.player.hour)))
+                self._handlers[event.kind](event)
+        self._set_clock(target)
+
+    def _set_clock(self, clock: int) -> None:
+        player = self.player
+        day, hour = divmod(clock, 24)
+        if day != player.day:
+            player.attributes.exposure = max(0, player.attributes.exposure - (day - player.day))
+            player.day = day
+        player.hour = hour
+
+    # ------------------------------------------------------------------
+    # Unlock graph
+    def available_nodes(self) -> List[str]:
+        """Node ids (training, gear, contracts) the player can take on right now.
+
+        Every node can be repeated, so unlocked nodes stay listed.
+        """
+        self._require_player()
+        graph = self._pin().graph
+        return graph.ids(graph.available(self.player.skills, self._unlock_bits()))
+
+    def next_nodes(self) -> List[str]:
+        """Node ids one skill level or one unlock away."""
+        self._require_player()
+        graph = self._pin().graph
+        return graph.ids(graph.next_unlocks(self.player.skills, self._unlock_bits()))
+
+    def prerequisites_met(self, node_id: str) -> bool:
+        graph = self.content.graph
+        idx = graph.index.get(node_id)
+        return idx is None or graph.prereq[idx] & ~self._unlock_bits() == 0
+
+    def _require_prerequisites(self, node_id: str) -> None:
+        graph = self.content.graph
+        idx = graph.index.get(node_id)
+        missing = 0 if idx is None else graph.prereq[idx] & ~self._unlock_bits()
+        if missing:
+            raise RuntimeError(f"前置未解锁：{', '.join(graph.ids(missing))}")
+
+    def _locked_contracts(self) -> FrozenSet[str]:
+        bits = self._unlock_bits()
+        if self._locked[0] != bits:
+            content = self.content
+            locked = content.graph.ids(content.graph.locked(bits))
+            self._locked = (bits, frozenset(node_id for node_id in locked if node_id in content.contract_by_id))
+        return self._locked[1]
+
+    def _unlock_bits(self) -> int:
+        """The player's unlocked nodes as a bitset over the current content graph.
+
+        Rebuilt when the player, the content version or the length of
+        ``unlocked_nodes`` changes (an outside append); ``_unlock`` keeps it
+        current otherwise.
+        """
+        player, graph = self.player, self.content.graph
+        owner = self._bits_owner
+        if owner[0] is not player or owner[1] is not graph or self._unlocked_count != len(player.unlocked_nodes):
+            self._bits_owner = (player, graph)
+            self._unlocked_bits = graph.node_bits(player.unlocked_nodes)
+            self._unlocked_count = len(player.unlocked_nodes)
+            self._locked = (-1, frozenset())
+        return self._unlocked_bits
+
+    def _skill_bits(self) -> Tuple[int, int]:
+        """``(skill mask, skill mask two levels up)`` for the requirement checks.
+
+        Compiled once per action: ``_pin`` and ``_apply_effect`` drop it.
+        """
+        player, graph = self.player, self.content.graph
+        cached = self._skill_mask
+        if cached is None or cached[0] is not player or cached[1] is not graph:
+            mask = graph.skill_mask(player.skills)
+            cached = self._skill_mask = (player, graph, mask, graph.raise_levels(mask, 2))
+        return cached[2], cached[3]
+
+    def _apply_effect(self, program: EffectProgram) -> None:
+        apply_effect(self.player, program)
+        self._skill_mask = None
+
+    def _backfill_unlocks(self) -> None:
+        """Unlock the prerequisites of everything the imported skills already qualify for.
+
+        Saves from before prerequisites were enforced list only the root, so a
+        veteran's skill levels stand in for the training they never recorded.
+        """
+        graph = self.content.graph
+        for node_id in graph.ids(graph.implied_unlocks(self._skill_bits()[0]) & ~self._unlock_bits()):
+            self._unlock(node_id)
 
-    def _meets_requirements(self, reqs: Dict[str, int]) -> bool:
-        return all(self.player.skills.get(skill, 0) >= level for skill, level in reqs.items())
+    def _unlock(self, node_id: str) -> None:
+        unlocked = self.player.unlocked_nodes
+        if node_id not in unlocked:
+            bits = self._unlock_bits()
+            unlocked.append(node_id)
+            idx = self.content.graph.index.get(node_id)
+            self._unlocked_bits = bits if idx is None else bits | 1 << idx
+            self._unlocked_count = len(unlocked)
 
-    def _log(self, message: str) -> None:
+    def _log(self, message: str, events: int = 1) -> None:
         if self.player:
             self.player.log.append(message)
-            self.player.events_since_age += 1
-            if self.player.events_since_age >= 12:
-                self.player.events_since_age = 0
+            if self._listeners:
+                self._emit("log", None, message)
+            self.player.events_since_age += events
+            while self.player.events_since_age >= 12:
+                self.player.events_since_age -= 12
                 self.player.age += 1
                 self.player.log.append(f"年岁增长：{self.player.age} 岁")
+                if self._listeners:
+                    self._emit("log", None, self.player.log[-1])
             if len(self.player.log) > 80:
-                self.player.log.pop(0)
+                del self.player.log[:-80]
 
     def _require_player(self) -> None:
         if not self.player:
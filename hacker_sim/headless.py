@@ -0,0 +1,84 @@
+"""Headless career runner shared by bots, analytics and tooling."""
+from __future__ import annotations
+
+from typing import Iterator, Optional, Tuple
+
+from .content import BACKGROUNDS
+from .content.registry import ContentStore
+from .engine import GameEngine
+from .rng import CounterStream, RandomStreams
+
+BACKGROUND_KEYS = sorted(BACKGROUNDS)
+
+# Event tuples yielded by run_career:
+#   ("action", kind, target, status, credits_delta)  status 1/0, -1 when rejected
+#   ("crisis", event_id)                              crisis triggered
+#   ("resolved", event_id, success)
+#   ("career", summary_dict)                          last event of a career
+Event = Tuple[object, ...]
+
+
+def choose_action(engine: GameEngine, rng: CounterStream) -> Tuple[str, ...]:
+    """Random but sane policy: often answer crises, otherwise train, work or shop."""
+    player = engine.player
+    if engine.active_crisis and rng.random() < 0.5:
+        return ("crisis", rng.randint(0, len(engine.active_crisis.options) - 1))
+    roll = rng.random()
+    if roll < 0.45:
+        ready = engine.query_contracts(max_gap=0, limit=4).items
+        if ready:
+            return ("contract", ready[rng.randint(0, len(ready) - 1)].contract_id)
+    if roll < 0.85:
+        affordable = [m for m in engine.content.training
+                      if m.cost <= player.resources.credits and engine.prerequisites_met(m.module_id)]
+        if affordable:
+            return ("train", affordable[rng.randint(0, len(affordable) - 1)].module_id)
+    if roll < 0.95:
+        gear = engine.content.gear
+        item = gear[rng.randint(0, len(gear) - 1)]
+        if item.cost <= player.resources.credits and engine.prerequisites_met(item.item_id):
+            return ("gear", item.item_id)
+    return ("market",)
+
+
+def career_summary(engine: GameEngine, seed: int, episode: int) -> dict:
+    player = engine.player
+    return {
+        "seed": seed,
+        "episode": episode,
+        "codename": player.codename,
+        "background": player.background,
+        "credits": player.resources.credits,
+        "age": player.age,
+        "day": player.day,
+        "law_watch": player.reputation.law_watch,
+        "white_hat": player.reputation.white_hat,
+        "black_hat": player.reputation.black_hat,
+    }
+
+
+def run_career(seed: int, steps: int, episode: int = 0, background: Optional[str] = None,
+               content: Optional[ContentStore] = None) -> Iterator[Event]:
+    """Play one career for ``steps`` decisions, yielding events as they happen.
+
+    Rolls come from ``RandomStreams(seed).episode(episode)``, so a career is
+    reproducible on its own regardless of which process runs it. ``content``
+    defaults to the process-wide store.
+    """
+    streams = RandomStreams(seed).episode(episode)
+    policy = streams.stream("policy")
+    engine = GameEngine(content=content)
+    engine.rng = streams
+    engine.create_player(f"npc-{seed}-{episode}", background or BACKGROUND_KEYS[policy.randint(0, len(BACKGROUND_KEYS) - 1)])
+    for _ in range(steps):
+        action = choose_action(engine, policy)
+        before_crisis = engine.active_crisis
+        if action[0] == "crisis":
+            success, _ = engine.resolve_crisis(action[1])
+            yield ("resolved", before_crisis.event_id, success)
+        else:
+            result = engine.apply_actions([action])
+            yield ("action", action[0], action[1] if len(action) > 1 else "", result.status[0], result.credits[0])
+        if engine.active_crisis and engine.active_crisis is not before_crisis:
+            yield ("crisis", engine.active_crisis.event_id)
+    yield ("career", career_summary(engine, seed, episode))
@@ -0,0 +1,343 @@
+"""Leaderboards over saved and simulated careers with incremental sorted indexes."""
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import multiprocessing as mp
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .headless import run_career
+from .models import Player
+from .save_manager import SAVE_DIR, SAVE_FILE
+
+METRICS = ("credits", "white_hat", "black_hat", "age", "law_watch")
+MAGIC = b"HSLB0001"
+HEADER = struct.Struct("<8sII")  # magic, entry count, meta length
+LEADERBOARD_FILE = SAVE_DIR / "leaderboard.bin"
+
+Item = Tuple[int, int]  # (metric value, entry id); ids break ties
+
+
+class SortedIndex:
+    """Sorted list of ``(value, id)`` pairs split into buckets of about ``load`` items.
+
+    Lookups bisect the bucket maxima, then one bucket; bucket sizes live in
+    a Fenwick tree, so positions are O(log n) and an insert or removal
+    moves at most ``2 * load`` items instead of shifting the whole list.
+    """
+
+    def __init__(self, items: Sequence[Item] = (), load: int = 512) -> None:
+        self.load = load
+        self._buckets: List[List[Item]] = [list(items[i:i + load]) for i in range(0, len(items), load)]
+        self._len = len(items)
+        self._reindex()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Item]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __reversed__(self) -> Iterator[Item]:
+        for bucket in reversed(self._buckets):
+            yield from reversed(bucket)
+
+    def _reindex(self) -> None:
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        size = len(self._buckets)
+        tree = [0] * (size + 1)
+        for idx, bucket in enumerate(self._buckets, 1):
+            tree[idx] += len(bucket)
+            parent = idx + (idx & -idx)
+            if parent <= size:
+                tree[parent] += tree[idx]
+        self._tree = tree
+
+    def _bump(self, pos: int, delta: int) -> None:
+        tree = self._tree
+        pos += 1
+        while pos < len(tree):
+            tree[pos] += delta
+            pos += pos & -pos
+
+    def _before(self, pos: int) -> int:
+        """Number of items in buckets ``[0, pos)``."""
+        tree = self._tree
+        total = 0
+        while pos:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def add(self, item: Item) -> None:
+        if not self._buckets:
+            self._buckets.append([item])
+            self._len = 1
+            self._reindex()
+            return
+        pos = min(bisect.bisect_left(self._maxes, item), len(self._buckets) - 1)
+        bucket = self._buckets[pos]
+        bisect.insort(bucket, item)
+        self._maxes[pos] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self.load:
+            self._buckets[pos:pos + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._reindex()
+        else:
+            self._bump(pos, 1)
+
+    def remove(self, item: Item) -> None:
+        pos = bisect.bisect_left(self._maxes, item)
+        bucket = self._buckets[pos] if pos < len(self._buckets) else []
+        idx = bisect.bisect_left(bucket, item)
+        if idx == len(bucket) or bucket[idx] != item:
+            raise KeyError(item)
+        del bucket[idx]
+        self._len -= 1
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+            self._bump(pos, -1)
+        else:
+            del self._buckets[pos]
+            self._reindex()
+
+    def position(self, item: Item) -> int:
+        """Number of items strictly less than ``item``."""
+        pos = bisect.bisect_left(self._maxes, item)
+        if pos == len(self._buckets):
+            return self._len
+        return self._before(pos) + bisect.bisect_left(self._buckets[pos], item)
+
+
+class Leaderboard:
+    """Careers keyed by a stable string, ranked on every metric in ``METRICS``.
+
+    Keys are ``save:<slot>`` for save files and ``sim:<seed>:<episode>`` for
+    headless careers; adding a key again replaces its standing. Rank 1 is
+    the highest value (use ``bottom`` for metrics where low is good, such as
+    ``law_watch``); ties share a rank.
+    """
+
+    def __init__(self, load: int = 512) -> None:
+        self.load = load
+        self._ids: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = []
+        self._codenames: List[str] = []
+        self._backgrounds: List[str] = []
+        self._columns: Dict[str, array] = {metric: array("q") for metric in METRICS}
+        self._indexes: Dict[str, SortedIndex] = {metric: SortedIndex(load=load) for metric in METRICS}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    # Feeding -------------------------------------------------------------
+    def add(self, key: str, codename: str, background: str, values: Mapping[str, int]) -> None:
+        if key in self._ids:
+            self.remove(key)
+        if self._free:
+            entry = self._free.pop()
+            self._keys[entry] = key
+            self._codenames[entry] = codename
+            self._backgrounds[entry] = background
+            for metric in METRICS:
+                self._columns[metric][entry] = int(values[metric])
+        else:
+            entry = len(self._keys)
+            self._keys.append(key)
+            self._codenames.append(codename)
+            self._backgrounds.append(background)
+            for metric in METRICS:
+                self._columns[metric].append(int(values[metric]))
+        self._ids[key] = entry
+        for metric in METRICS:
+            self._indexes[metric].add((self._columns[metric][entry], entry))
+
+    def add_player(self, key: str, player: Player) -> None:
+        rep = player.reputation
+        self.add(key, player.codename, player.background, {
+            "credits": player.resources.credits,
+            "white_hat": rep.white_hat,
+            "black_hat": rep.black_hat,
+            "age": player.age,
+            "law_watch": rep.law_watch,
+        })
+
+    def add_summary(self, summary: Mapping[str, object]) -> None:
+        """Add a ``headless.career_summary`` dict."""
+        self.add(f"sim:{summary['seed']}:{summary['episode']}", summary["codename"], summary["background"], summary)
+
+    def add_save(self, path: Path) -> None:
+        payload = json.loads(Path(path).read_text())
+        self.add_player(f"save:{Path(path).stem}", Player.from_dict(payload["player"]))
+
+    def remove(self, key: str) -> None:
+        entry = self._ids.pop(key)
+        for metric in METRICS:
+            self._indexes[metric].remove((self._columns[metric][entry], entry))
+        self._keys[entry] = None
+        self._free.append(entry)
+
+    # Queries -------------------------------------------------------------
+    def entry(self, key: str) -> dict:
+        return self._entry(self._ids[key])
+
+    def _entry(self, entry: int) -> dict:
+        row = {"key": self._keys[entry], "codename": self._codenames[entry], "background": self._backgrounds[entry]}
+        for metric in METRICS:
+            row[metric] = self._columns[metric][entry]
+        return row
+
+    def _index(self, metric: str) -> SortedIndex:
+        try:
+            return self._indexes[metric]
+        except KeyError:
+            raise ValueError(f"未知排行指标：{metric}") from None
+
+    def top(self, metric: str, k: int = 10) -> List[dict]:
+        rows = []
+        for _, entry in reversed(self._index(metric)):
+            if len(rows) == k:
+                break
+            rows.append(self._entry(entry))
+        return rows
+
+    def bottom(self, metric: str, k: int = 10) -> List[dict]:
+        rows = []
+        for _, entry in self._index(metric):
+            if len(rows) == k:
+                break
+            rows.append(self._entry(entry))
+        return rows
+
+    def count_above(self, metric: str, value: int) -> int:
+        index = self._index(metric)
+        # Every real id is below len(self._keys), so this item sorts after all pairs holding ``value``.
+        return len(index) - index.position((value, len(self._keys)))
+
+    def rank(self, metric: str, key: str) -> int:
+        return self.count_above(metric, self._columns[metric][self._ids[key]]) + 1
+
+    def percentile(self, metric: str, key: str) -> float:
+        """Share of careers (0-100) scoring at or below ``key`` on ``metric``."""
+        index = self._index(metric)
+        return 100.0 * (len(index) - self.count_above(metric, self._columns[metric][self._ids[key]])) / len(index)
+
+    # Persistence ---------------------------------------------------------
+    def save(self, path: Path = LEADERBOARD_FILE) -> None:
+        """Write live entries plus each metric's sorted order, so ``load`` never sorts or re-reads saves.
+
+        Layout: header, JSON meta (metrics, background names), NUL-joined
+        keys and codenames, a background byte per entry, then per metric the
+        value column (int64) and the ascending order (uint32 entry ids).
+        """
+        live = [entry for entry, key in enumerate(self._keys) if key is not None]
+        remap = {entry: pos for pos, entry in enumerate(live)}
+        backgrounds = sorted({self._backgrounds[entry] for entry in live})
+        bg_index = {name: idx for idx, name in enumerate(backgrounds)}
+        meta = json.dumps({"metrics": list(METRICS), "backgrounds": backgrounds}, ensure_ascii=False).encode("utf-8")
+        strings = "\0".join([self._keys[entry] for entry in live] + [self._codenames[entry] for entry in live]).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            handle.write(HEADER.pack(MAGIC, len(live), len(meta)))
+            handle.write(meta)
+            handle.write(struct.pack("<I", len(strings)))
+            handle.write(strings)
+            handle.write(array("B", (bg_index[self._backgrounds[entry]] for entry in live)).tobytes())
+            for metric in METRICS:
+                column = self._columns[metric]
+                handle.write(array("q", (column[entry] for entry in live)).tobytes())
+                handle.write(array("I", (remap[entry] for _, entry in self._indexes[metric])).tobytes())
+
+    @classmethod
+    def load(cls, path: Path = LEADERBOARD_FILE, load: int = 512) -> "Leaderboard":
+        raw = memoryview(path.read_bytes())
+        magic, count, meta_len = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path} 不是排行榜文件")
+        offset = HEADER.size
+        meta = json.loads(bytes(raw[offset:offset + meta_len]).decode("utf-8"))
+        if tuple(meta["metrics"]) != METRICS:
+            raise ValueError(f"{path} 的排行指标与当前版本不符")
+        offset += meta_len
+        (strings_len,) = struct.unpack_from("<I", raw, offset)
+        offset += 4
+        strings = bytes(raw[offset:offset + strings_len]).decode("utf-8").split("\0") if count else []
+        offset += strings_len
+        board = cls(load)
+        board._keys = strings[:count]
+        board._codenames = strings[count:]
+        board._ids = {key: entry for entry, key in enumerate(board._keys)}
+        names = meta["backgrounds"]
+        board._backgrounds = [names[idx] for idx in raw[offset:offset + count]]
+        offset += count
+        for metric in METRICS:
+            column = array("q", raw[offset:offset + 8 * count].tobytes())
+            offset += 8 * count
+            order = array("I", raw[offset:offset + 4 * count].tobytes())
+            offset += 4 * count
+            board._columns[metric] = column
+            board._indexes[metric] = SortedIndex([(column[entry], entry) for entry in order], load)
+        return board
+
+
+# ----------------------------------------------------------------------
+# Sources
+def _simulate_chunk(args: Tuple[Sequence[int], int, int]) -> List[dict]:
+    seeds, steps, episodes = args
+    return [event[1] for seed in seeds for episode in range(episodes)
+            for event in run_career(seed, steps, episode) if event[0] == "career"]
+
+
+def simulated_summaries(seeds: Sequence[int], steps: int, episodes: int = 1, workers: int = 1,
+                        chunk: int = 64) -> Iterator[dict]:
+    chunks = [(seeds[i:i + chunk], steps, episodes) for i in range(0, len(seeds), chunk)]
+    if workers <= 1:
+        for args in chunks:
+            yield from _simulate_chunk(args)
+        return
+    with mp.get_context().Pool(workers) as pool:
+        for summaries in pool.imap_unordered(_simulate_chunk, chunks):
+            yield from summaries
+
+
+def build(saves: Iterable[Path] = (), summaries: Iterable[Mapping[str, object]] = (), board: Optional[Leaderboard] = None) -> Leaderboard:
+    board = Leaderboard() if board is None else board
+    for path in saves:
+        board.add_save(path)
+    for summary in summaries:
+        board.add_summary(summary)
+    return board
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="生涯排行榜")
+    parser.add_argument("--file", type=Path, default=LEADERBOARD_FILE)
+    parser.add_argument("--save", type=Path, action="append", default=[], help="加入存档文件（默认包含当前存档）")
+    parser.add_argument("--simulate", type=int, default=0, help="加入 N 个无头模拟生涯")
+    parser.add_argument("--steps", type=int, default=80)
+    parser.add_argument("--episodes", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--metric", choices=METRICS, default="credits")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+    board = Leaderboard.load(args.file) if args.file.exists() else Leaderboard()
+    saves = args.save or ([SAVE_FILE] if SAVE_FILE.exists() else [])
+    build(saves, simulated_summaries(list(range(args.simulate)), args.steps, args.episodes, args.workers), board)
+    if saves or args.simulate:
+        board.save(args.file)
+    for rank, row in enumerate(board.top(args.metric, args.top), 1):
+        print(f"{rank:>4} {row[args.metric]:>12} {row['codename']:<16} {row['background']:<10} {row['key']}")
+    print(f"{len(board)} careers in {args.file}")
+
+
+if __name__ == "__main__":
+    main()
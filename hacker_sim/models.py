@@ -1,12 +1,128 @@
 """Core dataclasses for Hacker Life Sandbox."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from array import array
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+ChangeCallback = Callable[[str, object, object], None]
+_MISSING = object()
+
+
+class Tracked:
+    """Opt-in change reporting for dataclass records.
+
+    Unobserved records are plain dataclasses: field writes take the normal
+    attribute path with no Python-level hook. ``observe(callback)`` switches
+    the instance to a generated subclass whose ``__setattr__`` reports public
+    writes as ``(path, old, new)``; ``observe(None)`` switches it back.
+    """
+
+    # Fields holding nested records that follow the parent's observer.
+    _nested: Tuple[str, ...] = ()
+
+    def observe(self, observer: Optional[ChangeCallback], prefix: str = "") -> None:
+        plain = _plain_class(type(self))
+        if observer is None:
+            self.__dict__.pop("_observer", None)
+            self.__dict__.pop("_prefix", None)
+            self.__class__ = plain
+        else:
+            self.__dict__["_observer"] = observer
+            self.__dict__["_prefix"] = prefix
+            self.__class__ = _observed_class(plain)
+        for name in self._nested:
+            self.__dict__[name] = self._attach(name, getattr(self, name), observer)
+
+    def _attach(self, name: str, value: object, observer: Optional[ChangeCallback]) -> object:
+        if name == "skills":
+            if not isinstance(value, SkillMap):
+                value = SkillMap(value)
+            value.observe(observer)
+        else:
+            value.observe(observer, f"{name}.")
+        return value
+
+    def __getstate__(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+
+class _Observed:
+    """Mixin for the generated observed variants; never instantiated directly."""
+
+    _plain: type
+
+    def __setattr__(self, name: str, value: object) -> None:
+        observer = self.__dict__.get("_observer")
+        if observer is None or name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        if name in self._nested:
+            value = self._attach(name, value, observer)
+        old = self.__dict__.get(name, _MISSING)
+        object.__setattr__(self, name, value)
+        if old is _MISSING or old != value:
+            observer(self.__dict__["_prefix"] + name, None if old is _MISSING else old, value)
+
+    def __eq__(self, other: object) -> bool:
+        if _plain_class(type(other)) is not self._plain:
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Copies and pickles come back unobserved.
+        return (_rebuild, (self._plain, self.__getstate__()))
+
+
+_OBSERVED: Dict[type, type] = {}
+
+
+def _plain_class(cls: type) -> type:
+    return cls.__dict__.get("_plain", cls) if issubclass(cls, _Observed) else cls
+
+
+def _observed_class(plain: type) -> type:
+    observed = _OBSERVED.get(plain)
+    if observed is None:
+        observed = type(plain.__name__, (_Observed, plain), {"_plain": plain, "__qualname__": plain.__qualname__,
+                                                            "__module__": plain.__module__})
+        _OBSERVED[plain] = observed
+    return observed
+
+
+def _rebuild(cls: type, state: dict) -> object:
+    obj = cls.__new__(cls)
+    obj.__dict__.update(state)
+    return obj
+
+
+class SkillMap(dict):
+    """Skill levels keyed by track; while observed, item writes are reported like fields."""
+
+    def observe(self, observer: Optional[ChangeCallback]) -> None:
+        if observer is None:
+            self.__dict__.pop("_observer", None)
+            self.__class__ = SkillMap
+        else:
+            self.__dict__["_observer"] = observer
+            self.__class__ = _ObservedSkillMap
+
+    def __reduce__(self):
+        return (SkillMap, (dict(self),))
+
+
+class _ObservedSkillMap(SkillMap):
+    def __setitem__(self, key: str, value: int) -> None:
+        old = self.get(key)
+        super().__setitem__(key, value)
+        if old != value:
+            self.__dict__["_observer"](f"skills.{key}", old, value)
 
 
 @dataclass
-class Attributes:
+class Attributes(Tracked):
     intellect: int = 45
     discipline: int = 40
     ethics: int = 55
@@ -16,7 +132,7 @@ class Attributes:
 
 
 @dataclass
-class Reputation:
+class Reputation(Tracked):
     white_hat: int = 10
     black_hat: int = 10
     corporate: int = 5
@@ -25,7 +141,7 @@ class Reputation:
 
 
 @dataclass
-class Resources:
+class Resources(Tracked):
     credits: int = 5000
     hardware: int = 1
     network: int = 1
@@ -33,20 +149,13 @@ class Resources:
 
 
 @dataclass
-class Player:
+class Player(Tracked):
     codename: str
     background: str
     attributes: Attributes = field(default_factory=Attributes)
     reputation: Reputation = field(default_factory=Reputation)
     resources: Resources = field(default_factory=Resources)
-    skills: Dict[str, int] = field(default_factory=lambda: {
-        "foundation": 1,
-        "web": 0,
-        "binary": 0,
-        "mobile": 0,
-        "social": 0,
-        "cloud": 0,
-    })
+    skills: Dict[str, int] = field(default_factory=lambda: Player.default_skills())
     unlocked_nodes: List[str] = field(default_factory=lambda: ["training_intro"])
     age: int = 10
     events_since_age: int = 0
@@ -54,14 +163,27 @@ class Player:
     hour: int = 9
     log: List[str] = field(default_factory=list)
 
+    _nested = ("attributes", "reputation", "resources", "skills")
+
+    @staticmethod
+    def default_skills() -> Dict[str, int]:
+        return {
+            "foundation": 1,
+            "web": 0,
+            "binary": 0,
+            "mobile": 0,
+            "social": 0,
+            "cloud": 0,
+        }
+
     def to_dict(self) -> Dict[str, object]:
         return {
             "codename": self.codename,
             "background": self.background,
-            "attributes": self.attributes.__dict__,
-            "reputation": self.reputation.__dict__,
-            "resources": self.resources.__dict__,
-            "skills": self.skills,
+            "attributes": asdict(self.attributes),
+            "reputation": asdict(self.reputation),
+            "resources": asdict(self.resources),
+            "skills": dict(self.skills),
             "unlocked_nodes": self.unlocked_nodes,
             "age": self.age,
             "events_since_age": self.events_since_age,
@@ -151,3 +273,33 @@ class CrisisEvent:
     difficulty: str
     options: List[CrisisOption]
 
+
+
+@dataclass
+class ActionBatch:
+    """Columnar results of ``GameEngine.apply_actions``.
+
+    ``status`` is 1/0 for success/failure and -1 for rejected actions; the
+    other columns hold per-action deltas. ``crises`` lists
+    ``(action index, event_id)`` for crises raised at checkpoints.
+    """
+
+    status: array
+    credits: array
+    payout: array
+    law_watch: array
+    hours: array
+    crises: List[Tuple[int, str]] = field(default_factory=list)
+
+    @classmethod
+    def allocate(cls, size: int) -> "ActionBatch":
+        return cls(
+            status=array("b", bytes(size)),
+            credits=array("q", bytes(8 * size)),
+            payout=array("q", bytes(8 * size)),
+            law_watch=array("i", bytes(4 * size)),
+            hours=array("i", bytes(4 * size)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.status)
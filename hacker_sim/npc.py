@@ -0,0 +1,498 @@
+"""Precomputed NPC rival policies: value iteration over a discretized engine state."""
+from __future__ import annotations
+
+import bisect
+import json
+import operator
+import struct
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .compact import CompactPlayer
+from .content.registry import ContentRegistry, ContentStore
+from .engine import CONTENT, GameEngine
+from .models import CrisisEvent, Player
+
+MAGIC = b"HSNPC002"
+HEADER = struct.Struct("<8sI")
+
+Action = Tuple[str, ...]
+
+
+def _skill_caps(registry: ContentRegistry) -> Dict[str, int]:
+    caps = {skill: 0 for skill in Player.default_skills()}
+    for contract in registry.contracts:
+        for skill, need in contract.requirements.items():
+            caps[skill] = max(caps.get(skill, 0), need)
+    return caps
+
+
+def _unlock_sets(gates: Sequence[str], prerequisites: Mapping[str, Sequence[str]], root: str) -> Tuple[int, ...]:
+    """Every unlock state over ``gates`` reachable from the root: bitmasks closed under prerequisites."""
+    bit = {gate: 1 << idx for idx, gate in enumerate(gates)}
+    sets = [bit.get(root, 0)]
+    for gate in gates:  # topological order, so a gate's prerequisites are decided before it
+        if gate == root:
+            continue
+        needs = sum(bit[parent] for parent in prerequisites.get(gate, ()))
+        sets += [unlocked | bit[gate] for unlocked in sets if unlocked & needs == needs]
+    return tuple(sorted(sets))
+
+
+@dataclass(frozen=True)
+class PolicyGrid:
+    """Discretization of the engine state the rival policy is solved over.
+
+    Skills are tracked up to the highest contract requirement (extra levels
+    only add a small bonus); credits and law_watch are grid points, and a
+    transition landing between two points is split between them by
+    distance. Law points sit on the engine thresholds (trace > 25,
+    crisis > 30, high-risk illegal work hidden > 40). ``gates`` are the
+    nodes something else requires, and ``unlock_sets`` the combinations of
+    them a career can reach; actions whose prerequisites are not in the
+    state's set are never taken. The last dimension is the active crisis
+    (0 = none). :meth:`for_content` derives everything but the credit and
+    law points from one content version.
+    """
+
+    skill_caps: Dict[str, int]
+    markets: int
+    crises: Tuple[str, ...]
+    gates: Tuple[str, ...] = ()
+    unlock_sets: Tuple[int, ...] = (0,)
+    credits: Tuple[int, ...] = (0, 300, 600, 1200, 2500, 5400, 7800, 15000, 30000, 60000)
+    law_watch: Tuple[int, ...] = (0, 20, 26, 31, 41, 60)
+
+    @classmethod
+    def for_content(cls, registry: ContentRegistry, **overrides) -> "PolicyGrid":
+        graph = registry.graph
+        gates = tuple(node for node in graph.order if graph.dependents[graph.index[node]])
+        fields = dict(
+            skill_caps=_skill_caps(registry),
+            markets=len(registry.market),
+            crises=tuple(event.event_id for event in registry.crisis),
+            gates=gates,
+            unlock_sets=_unlock_sets(gates, registry.prerequisites, registry.root),
+        )
+        fields.update(overrides)
+        return cls(**fields)
+
+    @property
+    def skills(self) -> Tuple[str, ...]:
+        return tuple(self.skill_caps)
+
+    @property
+    def skill_codes(self) -> int:
+        count = 1
+        for cap in self.skill_caps.values():
+            count *= cap + 1
+        return count
+
+    @property
+    def size(self) -> int:
+        return len(self.unlock_sets) * self.skill_codes * len(self.credits) * len(self.law_watch) * self.markets * (len(self.crises) + 1)
+
+    def skill_code(self, levels: Sequence[int]) -> int:
+        code = 0
+        for level, cap in zip(levels, self.skill_caps.values()):
+            code = code * (cap + 1) + min(max(level, 0), cap)
+        return code
+
+    def skill_levels(self, code: int) -> List[int]:
+        levels = []
+        for cap in reversed(list(self.skill_caps.values())):
+            code, level = divmod(code, cap + 1)
+            levels.append(level)
+        return levels[::-1]
+
+    def gate_mask(self, nodes: Sequence[str]) -> int:
+        return sum(1 << idx for idx, gate in enumerate(self.gates) if gate in nodes)
+
+    def index(self, skill_code: int, credit: int, law: int, market: int, crisis: int, unlock: int = 0) -> int:
+        index = (((unlock * self.skill_codes + skill_code) * len(self.credits) + credit) * len(self.law_watch) + law) * self.markets + market
+        return index * (len(self.crises) + 1) + crisis
+
+    def split(self, points: Sequence[int], value: float) -> List[Tuple[int, float]]:
+        """Grid points around ``value`` with interpolation weights."""
+        if value <= points[0]:
+            return [(0, 1.0)]
+        if value >= points[-1]:
+            return [(len(points) - 1, 1.0)]
+        hi = bisect.bisect_right(points, value)
+        lo = hi - 1
+        weight = (value - points[lo]) / (points[hi] - points[lo])
+        return [(lo, 1.0 - weight), (hi, weight)] if weight else [(lo, 1.0)]
+
+
+def actions(registry: ContentRegistry) -> List[Action]:
+    """Everything a rival can do; crisis options are indexed into the active crisis."""
+    options = max((len(event.options) for event in registry.crisis), default=0)
+    return ([("train", m.module_id) for m in registry.training]
+            + [("contract", c.contract_id) for c in registry.contracts]
+            + [("gear", g.item_id) for g in registry.gear]
+            + [("market",)]
+            + [("crisis", idx) for idx in range(options)])
+
+
+# ----------------------------------------------------------------------
+# Engine probes
+class _ForcedStream:
+    """Stand-in rng stream: every roll returns ``value``, ranges their midpoint."""
+
+    def __init__(self, value: float) -> None:
+        self.value = value
+
+    def random(self) -> float:
+        return self.value
+
+    def randint(self, a: int, b: int) -> int:
+        return (a + b) // 2
+
+
+class _ForcedRolls:
+    def __init__(self, value: float) -> None:
+        self.training = self.contracts = self.payouts = self.time = self.crisis = _ForcedStream(value)
+
+
+SUCCESS_ROLL = 0.0
+FAILURE_ROLL = 1.0 - 1e-9
+
+Delta = Tuple[int, int, int, Dict[str, int]]  # credits, law_watch, exposure, skill gains
+
+
+def _probe_player(grid: PolicyGrid, levels: Sequence[int] = (), law_watch: int = 20, credits: int = 10 ** 6) -> CompactPlayer:
+    player = CompactPlayer("probe", "nomad")
+    for skill, level in zip(grid.skills, levels):
+        player.skills[skill] = level
+    player.reputation.law_watch = law_watch
+    player.attributes.exposure = 20
+    player.resources.credits = credits
+    return player
+
+
+def _probe_engine(grid: PolicyGrid, store: ContentStore, roll: float = SUCCESS_ROLL, market: int = 0) -> GameEngine:
+    engine = GameEngine(content=store)
+    engine.rng = _ForcedRolls(roll)
+    engine.player = _probe_player(grid, [0] * len(grid.skills))
+    engine.market_index = market
+    return engine
+
+
+def _delta(engine: GameEngine, run: Callable[[], object]) -> Delta:
+    player = engine.player
+    before = (player.resources.credits, player.reputation.law_watch, player.attributes.exposure, dict(player.skills))
+    run()
+    skills = {k: v - before[3].get(k, 0) for k, v in player.skills.items() if v != before[3].get(k, 0)}
+    return player.resources.credits - before[0], player.reputation.law_watch - before[1], player.attributes.exposure - before[2], skills
+
+
+def _outcome(grid: PolicyGrid, store: ContentStore, action: Action, market: int, success: bool,
+             crisis: Optional[CrisisEvent] = None) -> Delta:
+    """Deltas the engine itself applies for one action outcome (rolls forced, payouts at their midpoint)."""
+    engine = _probe_engine(grid, store, SUCCESS_ROLL if success else FAILURE_ROLL, market)
+    kind = action[0]
+    if kind == "train":
+        return _delta(engine, lambda: engine._train(engine.content.training_by_id[action[1]]))
+    if kind == "contract":
+        return _delta(engine, lambda: engine._run_contract(engine.content.contract_by_id[action[1]]))
+    if kind == "gear":
+        return _delta(engine, lambda: engine._buy(engine.content.gear_by_id[action[1]]))
+    if kind == "crisis":
+        engine.active_crisis = crisis
+        return _delta(engine, lambda: engine.resolve_crisis(action[1]))
+    return 0, 0, 0, {}
+
+
+class _Triggers:
+    """Which crisis (slot, 0 = none) the engine raises after an action, memoised per outcome."""
+
+    def __init__(self, grid: PolicyGrid, store: ContentStore) -> None:
+        self.grid = grid
+        self.engine = _probe_engine(grid, store)
+        self._cache: Dict[Tuple[Optional[str], bool, float, int], int] = {}
+
+    def after(self, contract_id: Optional[str], success: bool, law_watch: float, market: int) -> int:
+        key = (contract_id, success, law_watch, market)
+        slot = self._cache.get(key)
+        if slot is None:
+            engine = self.engine
+            engine.active_crisis = None
+            engine.player.reputation.law_watch = int(law_watch)
+            engine.market_index = market
+            if contract_id is not None:
+                engine._maybe_trigger_crisis(engine.content.contract_by_id[contract_id], success)
+            engine._check_crisis_flags()
+            crisis = engine.active_crisis
+            slot = self._cache[key] = self.grid.crises.index(crisis.event_id) + 1 if crisis else 0
+        return slot
+
+
+@dataclass
+class SolveStats:
+    states: int
+    edges: int
+    iterations: int
+    residual: float
+
+
+# ----------------------------------------------------------------------
+# Policy
+class RivalPolicy:
+    """Solved policy: one action byte per discretized state.
+
+    Lookup encodes the live player (a few comparisons per dimension) and
+    reads one byte, so deciding for thousands of NPCs costs no search.
+    """
+
+    def __init__(self, grid: PolicyGrid, action_list: Sequence[Action], table: array, fingerprint: str = "",
+                 meta: Optional[Dict[str, object]] = None) -> None:
+        if len(table) != grid.size:
+            raise ValueError("策略表大小与网格不符")
+        self.grid = grid
+        self.actions = [tuple(a) for a in action_list]
+        self.table = table
+        self.fingerprint = fingerprint
+        self.meta = dict(meta or {})
+        self._crisis_slot = {event_id: idx + 1 for idx, event_id in enumerate(grid.crises)}
+        self._gate_bits = [(gate, 1 << idx) for idx, gate in enumerate(grid.gates)]
+        self._unlock_slot = {unlocked: idx for idx, unlocked in enumerate(grid.unlock_sets)}
+
+    # Runtime -----------------------------------------------------------
+    def encode(self, player, market_index: int, crisis_id: Optional[str] = None) -> int:
+        grid = self.grid
+        skills = player.skills
+        code = 0
+        for skill, cap in grid.skill_caps.items():
+            level = skills.get(skill, 0)
+            code = code * (cap + 1) + (cap if level > cap else max(level, 0))
+        credit = bisect.bisect_right(grid.credits, player.resources.credits) - 1
+        law = bisect.bisect_right(grid.law_watch, player.reputation.law_watch) - 1
+        crisis = self._crisis_slot.get(crisis_id, 0) if crisis_id else 0
+        unlocked = player.unlocked_nodes
+        mask = 0
+        for gate, bit in self._gate_bits:
+            if gate in unlocked:
+                mask |= bit
+        unlock = self._unlock_slot.get(mask)
+        if unlock is None:
+            unlock = self._unlock_slot[mask] = self._covered_unlock(mask)
+        return grid.index(code, max(credit, 0), max(law, 0), market_index % grid.markets, crisis, unlock)
+
+    def _covered_unlock(self, mask: int) -> int:
+        """The largest reachable unlock set inside ``mask``; unlocks held out of order are not relied on."""
+        sets = self.grid.unlock_sets
+        best = 0
+        for idx, unlocked in enumerate(sets):
+            if unlocked & ~mask == 0 and bin(unlocked).count("1") > bin(sets[best]).count("1"):
+                best = idx
+        return best
+
+    def decide(self, player, market_index: int, crisis_id: Optional[str] = None) -> Action:
+        return self.actions[self.table[self.encode(player, market_index, crisis_id)]]
+
+    def act(self, engine: GameEngine) -> Action:
+        crisis = engine.active_crisis
+        return self.decide(engine.player, engine.market_index, crisis.event_id if crisis else None)
+
+    # Persistence -------------------------------------------------------
+    def save(self, path: Path) -> None:
+        meta = dict(self.meta, grid=asdict(self.grid), actions=self.actions, fingerprint=self.fingerprint)
+        blob = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            handle.write(HEADER.pack(MAGIC, len(blob)))
+            handle.write(blob)
+            handle.write(self.table.tobytes())
+
+    @classmethod
+    def load(cls, path: Path, check_content: bool = True) -> "RivalPolicy":
+        raw = path.read_bytes()
+        magic, length = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path} 不是策略表")
+        meta = json.loads(raw[HEADER.size:HEADER.size + length].decode("utf-8"))
+        if check_content and meta["fingerprint"] != CONTENT.current.fingerprint:
+            raise ValueError(f"{path} 与当前内容不匹配，需要重新求解")
+        spec = meta.pop("grid")
+        grid = PolicyGrid(skill_caps=dict(spec["skill_caps"]), markets=spec["markets"], crises=tuple(spec["crises"]),
+                          gates=tuple(spec["gates"]), unlock_sets=tuple(spec["unlock_sets"]),
+                          credits=tuple(spec["credits"]), law_watch=tuple(spec["law_watch"]))
+        table = array("B", raw[HEADER.size + length:])
+        return cls(grid, meta.pop("actions"), table, meta.pop("fingerprint"), meta)
+
+
+# ----------------------------------------------------------------------
+# Offline solver
+def solve(grid: Optional[PolicyGrid] = None, gamma: float = 0.9, law_weight: float = 0.4, exposure_weight: float = 0.1,
+          tolerance: float = 0.01, max_iterations: int = 500, content: Optional[ContentRegistry] = None) -> Tuple[RivalPolicy, SolveStats]:
+    """Value-iterate the rival MDP and return the greedy policy.
+
+    Everything comes from one content version, ``content`` (default: the
+    live one, read once): the action list, requirements, prerequisites and
+    crises, and the probes, which run on an engine pinned to it. Success
+    chances come from the engine's own ``_training_chance`` /
+    ``_contract_chance`` / ``_crisis_chance`` on a probe player per skill
+    and law level; outcome deltas come from running the engine's action
+    cores with forced rolls, and crisis triggers from its own checks.
+    Reward per action is credits gained (in thousands) minus
+    ``law_weight`` per law_watch point and ``exposure_weight`` per exposure
+    point. Exposure, gear stats and age are not part of the state.
+    """
+    registry = content or CONTENT.current
+    store = ContentStore(registry)
+    grid = grid or PolicyGrid.for_content(registry)
+    action_list = actions(registry)
+    n_markets, n_slots = grid.markets, len(grid.crises) + 1
+    events = [None] + [registry.crisis_by_id[event_id] for event_id in grid.crises]
+    skill_levels = [grid.skill_levels(code) for code in range(grid.skill_codes)]
+    caps = list(grid.skill_caps.values())
+    skill_pos = {skill: idx for idx, skill in enumerate(grid.skills)}
+    triggers = _Triggers(grid, store)
+    # Per action: gates its prerequisites need, and the gate it opens on success.
+    gate_bit = {gate: 1 << idx for idx, gate in enumerate(grid.gates)}
+    needs = [grid.gate_mask(registry.prerequisites.get(action[1], ())) if action[0] in ("train", "contract", "gear") else 0
+             for action in action_list]
+    opens = [gate_bit.get(action[1], 0) if action[0] in ("train", "contract", "gear") else 0 for action in action_list]
+    unlock_slot = {unlocked: idx for idx, unlocked in enumerate(grid.unlock_sets)}
+
+    # Outcome deltas per (action, market, crisis slot, success) straight from the engine.
+    deltas: Dict[Tuple[int, int, int, bool], Delta] = {}
+    for a, action in enumerate(action_list):
+        for m in range(n_markets):
+            for ok in (True, False):
+                if action[0] != "crisis":
+                    deltas[(a, m, 0, ok)] = _outcome(grid, store, action, m, ok)
+                    continue
+                for slot in range(1, n_slots):
+                    if action[1] < len(events[slot].options):
+                        deltas[(a, m, slot, ok)] = _outcome(grid, store, action, m, ok, events[slot])
+    costs = {a: -deltas[(a, 0, 0, False)][0] if action[0] in ("train", "gear") else 0 for a, action in enumerate(action_list)}
+    requirements = {a: registry.contract_by_id[action[1]].requirements for a, action in enumerate(action_list) if action[0] == "contract"}
+
+    # Success chances per (skill code, law level) via the engine's formulas.
+    probe = _probe_engine(grid, store)
+    chances: Dict[Tuple[int, int], Dict[Tuple[int, int], float]] = {}
+    for code, levels in enumerate(skill_levels):
+        for li, law in enumerate(grid.law_watch):
+            probe.player = _probe_player(grid, levels, law)
+            row = {}
+            for a, action in enumerate(action_list):
+                if action[0] == "train":
+                    row[(a, 0)] = probe._training_chance(registry.training_by_id[action[1]])
+                elif action[0] == "contract":
+                    row[(a, 0)] = probe._contract_chance(registry.contract_by_id[action[1]])
+                elif action[0] == "crisis":
+                    for slot in range(1, n_slots):
+                        if action[1] < len(events[slot].options):
+                            row[(a, slot)] = probe._crisis_chance(events[slot].options[action[1]])
+            chances[(code, li)] = row
+
+    def shift(code: int, gains: Dict[str, int]) -> int:
+        if not gains:
+            return code
+        levels = list(skill_levels[code])
+        for skill, gain in gains.items():
+            k = skill_pos.get(skill)
+            if k is not None:
+                levels[k] = min(max(levels[k] + gain, 0), caps[k])
+        return grid.skill_code(levels)
+
+    # Flatten transitions: per state a run of actions, per action a run of (prob, next) edges.
+    act_start = array("i", [0])
+    act_id = array("B")
+    act_reward = array("d")
+    edge_start = array("i", [0])
+    edge_prob = array("d")
+    edge_next = array("i")
+    for u, unlocked in enumerate(grid.unlock_sets):
+        for code, levels in enumerate(skill_levels):
+            for credits in grid.credits:
+                for li, law in enumerate(grid.law_watch):
+                    row = chances[(code, li)]
+                    for m in range(n_markets):
+                        for slot in range(n_slots):
+                            for a, action in enumerate(action_list):
+                                kind = action[0]
+                                if costs[a] > credits or needs[a] & ~unlocked:
+                                    continue
+                                if kind == "contract" and any(levels[skill_pos[s]] < need for s, need in requirements[a].items()):
+                                    continue
+                                if kind == "crisis":
+                                    if (a, slot) not in row:
+                                        continue
+                                    p = row[(a, slot)]
+                                    branches = [(p, True, m), (1.0 - p, False, m)]
+                                elif kind == "market":
+                                    branches = [(1.0, True, (m + 1) % n_markets)]
+                                elif kind == "gear":
+                                    branches = [(1.0, True, m)]
+                                else:
+                                    p = row[(a, 0)]
+                                    branches = [(p, True, m), (1.0 - p, False, m)]
+                                reward = 0.0
+                                for p, ok, m_next in branches:
+                                    if p <= 0:
+                                        continue
+                                    d_credits, d_law, d_exposure, gains = deltas[(a, m, slot if kind == "crisis" else 0, ok)]
+                                    new_credits = max(0, credits + d_credits)
+                                    new_law = max(0, law + d_law)
+                                    reward += p * ((new_credits - credits) / 1000 - law_weight * (new_law - law) - exposure_weight * d_exposure)
+                                    if kind == "crisis" or slot == 0:
+                                        # Resolving clears the crisis; either way the engine re-checks its triggers.
+                                        next_slot = triggers.after(action[1] if kind == "contract" else None, ok, new_law, m_next)
+                                    else:
+                                        next_slot = slot
+                                    next_code = shift(code, gains)
+                                    u_next = unlock_slot[unlocked | opens[a]] if ok else u
+                                    for c_next, wc in grid.split(grid.credits, new_credits):
+                                        for l_next, wl in grid.split(grid.law_watch, new_law):
+                                            edge_prob.append(gamma * p * wc * wl)
+                                            edge_next.append(grid.index(next_code, c_next, l_next, m_next, next_slot, u_next))
+                                act_id.append(a)
+                                act_reward.append(reward)
+                                edge_start.append(len(edge_prob))
+                            act_start.append(len(act_id))
+
+    size = grid.size
+    values = array("d", bytes(8 * size))
+    table = array("B", bytes(size))
+    mul = operator.mul
+    residual = 0.0
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        residual = 0.0
+        for s in range(size):  # Gauss-Seidel: later states already see this sweep's values
+            best = float("-inf")
+            choice = 0
+            for k in range(act_start[s], act_start[s + 1]):
+                lo, hi = edge_start[k], edge_start[k + 1]
+                q = act_reward[k] + sum(map(mul, edge_prob[lo:hi], map(values.__getitem__, edge_next[lo:hi])))
+                if q > best:
+                    best, choice = q, act_id[k]
+            change = abs(best - values[s])
+            if change > residual:
+                residual = change
+            values[s] = best
+            table[s] = choice
+        if residual < tolerance:
+            break
+
+    meta = {"gamma": gamma, "law_weight": law_weight, "exposure_weight": exposure_weight}
+    policy = RivalPolicy(grid, action_list, table, registry.fingerprint, meta)
+    return policy, SolveStats(size, len(edge_prob), iterations, residual)
+
+
+def main() -> None:
+    start = time.perf_counter()
+    policy, stats = solve()
+    print(f"{stats.states} states, {stats.edges} edges, {stats.iterations} sweeps (residual {stats.residual:.4f}) in {time.perf_counter() - start:.1f}s")
+    path = Path.home() / ".hacker_sandbox" / "rival_policy.bin"
+    policy.save(path)
+    print(f"saved {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
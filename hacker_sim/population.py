@@ -0,0 +1,147 @@
+"""Shared-memory population state stepped in place by worker processes."""
+from __future__ import annotations
+
+import multiprocessing as mp
+from array import array
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .compact import DEFAULT_RECORD, OFFSETS, RECORD_SIZE, TYPECODE, CompactPlayer
+from .engine import GameEngine
+from .headless import BACKGROUND_KEYS, choose_action
+from .rng import RandomStreams
+
+ITEM_SIZE = array(TYPECODE).itemsize
+
+
+class SharedPopulation:
+    """``count`` player records in one shared-memory block, laid out like ``CompactPlayer``.
+
+    Workers attach by name and wrap rows as ``CompactPlayer`` views, so the
+    engine mutates shared state directly; the coordinator reads strided
+    columns without copying.
+    """
+
+    def __init__(self, count: int, name: Optional[str] = None, create: bool = True) -> None:
+        self.count = count
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=max(1, count * RECORD_SIZE * ITEM_SIZE))
+        self.values = self.shm.buf[:count * RECORD_SIZE * ITEM_SIZE].cast(TYPECODE)
+        self._owner = create
+        if create:
+            template = array(TYPECODE, DEFAULT_RECORD)
+            for idx in range(count):
+                self.values[idx * RECORD_SIZE:(idx + 1) * RECORD_SIZE] = template
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name: str, count: int) -> "SharedPopulation":
+        return cls(count, name=name, create=False)
+
+    def __enter__(self) -> "SharedPopulation":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self._owner:
+            self.shm.unlink()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def player(self, index: int, codename: str = "", background: str = "nomad") -> CompactPlayer:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return CompactPlayer(codename or f"npc-{index}", background, self.values, index * RECORD_SIZE, init=False)
+
+    def column(self, field: str) -> memoryview:
+        return self.values[OFFSETS[field]::RECORD_SIZE]
+
+    def aggregate(self, fields: Sequence[str] = ("resources.credits", "reputation.law_watch", "age")) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for field in fields:
+            column = self.column(field)
+            total = sum(column)
+            stats[field] = {"sum": total, "mean": total / self.count if self.count else 0.0, "min": min(column, default=0), "max": max(column, default=0)}
+            column.release()
+        return stats
+
+    def close(self) -> None:
+        self.values.release()
+        self.shm.close()
+
+
+# ----------------------------------------------------------------------
+# Worker side
+def _backgrounds(seed: int, start: int, stop: int) -> List[str]:
+    return [BACKGROUND_KEYS[RandomStreams(seed).episode(idx).stream("background").randint(0, len(BACKGROUND_KEYS) - 1)] for idx in range(start, stop)]
+
+
+def seed_slice(name: str, count: int, start: int, stop: int, seed: int) -> int:
+    """Create fresh careers for rows ``start:stop`` (background mods applied)."""
+    population = SharedPopulation.attach(name, count)
+    try:
+        engine = GameEngine(seed)
+        for idx, background in zip(range(start, stop), _backgrounds(seed, start, stop)):
+            player = engine.create_player(f"npc-{idx}", background)
+            CompactPlayer.from_player(player, population.values, idx * RECORD_SIZE)
+        return stop - start
+    finally:
+        population.close()
+
+
+def step_slice(name: str, count: int, start: int, stop: int, steps: int, seed: int, round_index: int = 0) -> int:
+    """Play ``steps`` policy actions for every row in ``start:stop``, in place.
+
+    Rolls for row ``i`` in round ``r`` come from ``RandomStreams(seed).episode(r).episode(i)``,
+    so the outcome does not depend on how rows are split between workers.
+    Unlocks live in the row's ``unlocks.*`` words and carry over between
+    rounds; engine-side state (market, crisis, schedule) starts fresh each round.
+    """
+    population = SharedPopulation.attach(name, count)
+    try:
+        round_streams = RandomStreams(seed).episode(round_index)
+        actions = 0
+        for idx in range(start, stop):
+            engine = GameEngine()
+            engine.rng = round_streams.episode(idx)
+            policy = engine.rng.stream("policy")
+            engine.player = population.player(idx)
+            for _ in range(steps):
+                action = choose_action(engine, policy)
+                if action[0] == "crisis":
+                    engine.resolve_crisis(action[1])
+                else:
+                    engine.apply_actions([action])
+                actions += 1
+            engine.player = None
+        return actions
+    finally:
+        population.close()
+
+
+# ----------------------------------------------------------------------
+# Coordinator
+def slices(count: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, count or 1))
+    bounds = [count * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts)]
+
+
+def simulate_population(count: int, steps: int, rounds: int = 1, workers: int = 0, seed: int = 0,
+                        fields: Sequence[str] = ("resources.credits", "reputation.law_watch", "age")) -> Dict[str, Dict[str, float]]:
+    """Seed ``count`` careers, step them ``rounds`` times across ``workers`` processes, return aggregates.
+
+    Only the segment name and row bounds cross the process boundary.
+    """
+    workers = workers or mp.cpu_count()
+    with SharedPopulation(count) as population:
+        parts = slices(count, workers)
+        with mp.get_context().Pool(workers) as pool:
+            pool.starmap(seed_slice, [(population.name, count, a, b, seed) for a, b in parts])
+            for round_index in range(rounds):
+                pool.starmap(step_slice, [(population.name, count, a, b, steps, seed, round_index) for a, b in parts])
+        return population.aggregate(fields)
+
@@ -0,0 +1,108 @@
+"""Game-time event scheduler (binary heap keyed on the game clock)."""
+from __future__ import annotations
+
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def game_clock(day: int, hour: int) -> int:
+    """Absolute game hour used as the scheduler key."""
+    return day * 24 + hour
+
+
+@dataclass(order=True)
+class ScheduledEvent:
+    due: int
+    seq: int
+    kind: str = field(compare=False)
+    payload: Dict[str, object] = field(compare=False, default_factory=dict)
+    every: int = field(compare=False, default=0)
+    cancelled: bool = field(compare=False, default=False)
+    queued: bool = field(compare=False, default=False)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"due": self.due, "kind": self.kind, "payload": self.payload, "every": self.every}
+
+
+class EventScheduler:
+    """Pending events ordered by due hour, then by scheduling order.
+
+    Draining up to a target hour costs O(k log n) for the k due events, no
+    matter how many are pending or how far the clock jumps. Cancellation is
+    lazy; cancelled entries are dropped when they reach the top. A recurring
+    event stays the same object across firings, so the handle returned by
+    ``schedule`` can cancel it at any time. ``version`` goes up on every
+    schedule, cancel and firing, for observers that only need "changed?".
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[ScheduledEvent] = []
+        self._seq = itertools.count()
+        self._live = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def schedule(self, due: int, kind: str, payload: Optional[Dict[str, object]] = None, every: int = 0) -> ScheduledEvent:
+        if every < 0:
+            raise ValueError("周期不能为负")
+        event = ScheduledEvent(due, next(self._seq), kind, dict(payload or {}), every, queued=True)
+        heapq.heappush(self._heap, event)
+        self._live += 1
+        self.version += 1
+        return event
+
+    def cancel(self, event: ScheduledEvent) -> None:
+        """Cancel a queued event; events that already fired (one-shot) or were cancelled are ignored."""
+        if event.queued:
+            event.queued = False
+            event.cancelled = True
+            self._live -= 1
+            self.version += 1
+
+    def next_due(self) -> Optional[int]:
+        self._drop_cancelled()
+        return self._heap[0].due if self._heap else None
+
+    def pop_due(self, now: int) -> Iterator[Tuple[int, ScheduledEvent]]:
+        """Yield ``(due, event)`` for events due at or before ``now`` in order.
+
+        A recurring event is re-armed in place before it is yielded, so
+        ``event.due`` already holds its next firing. Events scheduled while
+        iterating are picked up if they are also due.
+        """
+        while True:
+            self._drop_cancelled()
+            if not self._heap or self._heap[0].due > now:
+                return
+            event = heapq.heappop(self._heap)
+            due = event.due
+            if event.every:
+                event.due = due + event.every
+                event.seq = next(self._seq)
+                heapq.heappush(self._heap, event)
+            else:
+                event.queued = False
+                self._live -= 1
+            self.version += 1
+            yield due, event
+
+    def _drop_cancelled(self) -> None:
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+
+    def pending(self) -> List[ScheduledEvent]:
+        return sorted(event for event in self._heap if not event.cancelled)
+
+    def to_list(self) -> List[Dict[str, object]]:
+        return [event.to_dict() for event in self.pending()]
+
+    @classmethod
+    def from_list(cls, entries: List[Dict[str, object]]) -> "EventScheduler":
+        scheduler = cls()
+        for entry in entries:
+            scheduler.schedule(entry["due"], entry["kind"], entry.get("payload"), entry.get("every", 0))
+        return scheduler
@@ -0,0 +1,295 @@
+"""Consistent-hash session routing across worker processes."""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import itertools
+import multiprocessing as mp
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .engine import GameEngine
+
+VIRTUAL_NODES = 64
+
+Call = Tuple[str, str, Sequence[object]]
+
+
+def _hash_key(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Ring of virtual nodes; adding or removing a node only moves its own arcs."""
+
+    def __init__(self, replicas: int = VIRTUAL_NODES) -> None:
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners))
+
+    def add(self, node: str) -> None:
+        for replica in range(self.replicas):
+            point = _hash_key(f"{node}#{replica}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove(self, node: str) -> None:
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def lookup(self, key: str) -> str:
+        if not self._points:
+            raise RuntimeError("没有可用的分片")
+        idx = bisect.bisect(self._points, _hash_key(key)) % len(self._points)
+        return self._owners[idx]
+
+
+# ----------------------------------------------------------------------
+# Worker side
+def _export_session(engine: GameEngine) -> dict:
+    return {
+        "state": engine.export_state(),
+        "rng": engine.rng.getstate(),
+        "crisis": engine.active_crisis.event_id if engine.active_crisis else None,
+    }
+
+
+def _import_session(bundle: dict) -> GameEngine:
+    engine = GameEngine()
+    engine.import_state(bundle["state"])
+    engine.rng.setstate(bundle["rng"])
+    if bundle.get("crisis"):
+        engine.active_crisis = engine.content.crisis_by_id.get(bundle["crisis"])
+    return engine
+
+
+def _handle(engines: Dict[str, GameEngine], counters: Dict[str, int], op: str, session_id: str, args: Sequence[object]) -> object:
+    if op == "open":
+        seed, codename, background = args
+        engine = GameEngine(seed)
+        engine.create_player(codename, background)
+        engines[session_id] = engine
+        return None
+    if op == "call":
+        method, params = args
+        if method.startswith("_"):
+            raise ValueError("不允许调用私有方法")
+        counters["actions"] += 1
+        return getattr(engines[session_id], method)(*params)
+    if op == "export":
+        return _export_session(engines[session_id])
+    if op == "import":
+        engines[session_id] = _import_session(args[0])
+        return None
+    if op == "close":
+        engines.pop(session_id, None)
+        return None
+    if op == "metrics":
+        return {"sessions": len(engines), **counters}
+    raise ValueError(f"未知指令 {op}")
+
+
+def _worker_main(conn) -> None:
+    engines: Dict[str, GameEngine] = {}
+    counters = {"actions": 0, "errors": 0}
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        replies = []
+        for op, session_id, args in batch:
+            try:
+                replies.append((True, _handle(engines, counters, op, session_id, args)))
+            except Exception as exc:  # pylint: disable=broad-except
+                counters["errors"] += 1
+                replies.append((False, exc))
+        conn.send(replies)
+    conn.close()
+
+
+class _Shard:
+    def __init__(self, name: str, ctx) -> None:
+        self.name = name
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), name=f"shard-{name}", daemon=True)
+        self.process.start()
+        child.close()
+
+    def request(self, batch: List[Tuple[str, str, Sequence[object]]]) -> List[Tuple[bool, object]]:
+        self.conn.send(batch)
+        return self.conn.recv()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+# ----------------------------------------------------------------------
+# Router side
+class ShardRouter:
+    """Front router that pins sessions to worker processes by consistent hash.
+
+    Sessions are keyed by session id (the codename by default). Each worker
+    hosts its own ``GameEngine`` objects, so independent sessions run on
+    separate cores. Use :meth:`dispatch` to fan a batch of calls out to all
+    shards at once.
+    """
+
+    def __init__(self, workers: int = 0, replicas: int = VIRTUAL_NODES, context: Optional[str] = None) -> None:
+        self._ctx = mp.get_context(context)
+        self.ring = HashRing(replicas)
+        self._shards: Dict[str, _Shard] = {}
+        self._sessions: Dict[str, str] = {}
+        self._names = itertools.count()
+        for _ in range(workers or mp.cpu_count()):
+            self.add_worker()
+
+    def __enter__(self) -> "ShardRouter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    # ------------------------------------------------------------------
+    # Membership
+    @property
+    def workers(self) -> List[str]:
+        return list(self._shards)
+
+    def add_worker(self, name: Optional[str] = None) -> str:
+        name = name or f"w{next(self._names)}"
+        if name in self._shards:
+            raise ValueError("分片已存在")
+        self._shards[name] = _Shard(name, self._ctx)
+        self.ring.add(name)
+        self._rebalance()
+        return name
+
+    def remove_worker(self, name: str) -> None:
+        if name not in self._shards:
+            raise ValueError("未知分片")
+        if len(self._shards) == 1 and self._sessions:
+            raise RuntimeError("无法移除最后一个分片")
+        self.ring.remove(name)
+        try:
+            self._rebalance()
+        except Exception:
+            # Whatever did not move is still hosted here; keep the shard.
+            self.ring.add(name)
+            raise
+        self._shards.pop(name).stop()
+
+    def _rebalance(self) -> int:
+        """Move sessions to their ring owner; returns how many moved.
+
+        A session is copied first and closed on its old shard only once the
+        new shard has imported it, so a failed move leaves it where it was.
+        The first failure is raised after every other move is done.
+        """
+        moves: Dict[Tuple[str, str], List[str]] = {}
+        for session_id, owner in self._sessions.items():
+            target = self.ring.lookup(session_id)
+            if target != owner:
+                moves.setdefault((owner, target), []).append(session_id)
+        moved = 0
+        failure: Optional[BaseException] = None
+        for (owner, target), session_ids in moves.items():
+            exported = self._shards[owner].request([("export", sid, ()) for sid in session_ids])
+            ready = [(sid, bundle) for sid, (ok, bundle) in zip(session_ids, exported) if ok]
+            failure = failure or next((value for ok, value in exported if not ok), None)
+            if not ready:
+                continue
+            done = []
+            for (sid, _), (ok, value) in zip(ready, self._shards[target].request([("import", sid, (bundle,)) for sid, bundle in ready])):
+                if ok:
+                    done.append(sid)
+                    self._sessions[sid] = target
+                else:
+                    failure = failure or value
+            if done:
+                self._unwrap(self._shards[owner].request([("close", sid, ()) for sid in done]))
+            moved += len(done)
+        if failure is not None:
+            raise failure
+        return moved
+
+    # ------------------------------------------------------------------
+    # Sessions
+    def open_session(self, codename: str, background: str, seed: Optional[int] = None, session_id: Optional[str] = None) -> str:
+        session_id = session_id or codename
+        if session_id in self._sessions:
+            raise ValueError("会话已存在")
+        owner = self.ring.lookup(session_id)
+        self._unwrap(self._shards[owner].request([("open", session_id, (seed, codename, background))]))
+        self._sessions[session_id] = owner
+        return session_id
+
+    def close_session(self, session_id: str) -> None:
+        owner = self._sessions.pop(session_id)
+        self._unwrap(self._shards[owner].request([("close", session_id, ())]))
+
+    def shard_of(self, session_id: str) -> str:
+        return self._sessions[session_id]
+
+    def call(self, session_id: str, method: str, *args: object) -> object:
+        ok, value = self._shards[self._owner(session_id)].request([("call", session_id, (method, args))])[0]
+        if not ok:
+            raise value
+        return value
+
+    def dispatch(self, calls: Sequence[Call]) -> List[object]:
+        """Run ``(session_id, method, args)`` calls, one round trip per shard.
+
+        Results come back in call order; a failed call yields its exception
+        instance instead of raising, so one bad action does not sink the batch.
+        """
+        grouped: Dict[str, List[int]] = {}
+        for idx, (session_id, _, _) in enumerate(calls):
+            grouped.setdefault(self._owner(session_id), []).append(idx)
+        for owner, indices in grouped.items():
+            self._shards[owner].conn.send([("call", calls[i][0], (calls[i][1], tuple(calls[i][2]))) for i in indices])
+        results: List[object] = [None] * len(calls)
+        for owner, indices in grouped.items():
+            for idx, (ok, value) in zip(indices, self._shards[owner].conn.recv()):
+                results[idx] = value
+        return results
+
+    def metrics(self) -> dict:
+        per_shard = {}
+        for name, shard in self._shards.items():
+            per_shard[name] = self._unwrap(shard.request([("metrics", "", ())]))[0]
+        totals: Dict[str, int] = {}
+        for stats in per_shard.values():
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return {"workers": len(self._shards), "totals": totals, "shards": per_shard}
+
+    def shutdown(self) -> None:
+        for shard in self._shards.values():
+            shard.stop()
+        self._shards.clear()
+        self._sessions.clear()
+        self.ring = HashRing(self.ring.replicas)
+
+    # ------------------------------------------------------------------
+    def _owner(self, session_id: str) -> str:
+        owner = self._sessions.get(session_id)
+        if owner is None:
+            raise ValueError("未知会话")
+        return owner
+
+    @staticmethod
+    def _unwrap(replies: List[Tuple[bool, object]]) -> List[object]:
+        for ok, value in replies:
+            if not ok:
+                raise value
+        return [value for _, value in replies]
@@ -0,0 +1,182 @@
+"""Unlock graph over training, gear and contracts with bitset queries."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+MAX_LEVEL = 10
+
+
+def iter_bits(bits: int) -> Iterable[int]:
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def meets_requirements(requirements: Mapping[str, int], levels: Mapping[str, int], slack: int = 0) -> bool:
+    """Per-node form of :meth:`SkillGraph.meets_skills` that needs no compiled graph."""
+    for skill, need in requirements.items():
+        if need > 0 and min(max(levels.get(skill, 0), 0) + slack, MAX_LEVEL) < min(need, MAX_LEVEL):
+            return False
+    return True
+
+
+class SkillGraph:
+    """Nodes with skill thresholds and prerequisite nodes, compiled to bitsets.
+
+    Skill levels are thermometer-coded: skill ``k`` at level ``v`` sets bits
+    ``k*10 .. k*10+v-1``, so "meets every threshold" is ``req & ~have == 0``.
+    Node sets are bitsets over node indices; for whole-graph queries each
+    (skill, level) pair has a precomputed bitset of the nodes it blocks, so
+    "what is available" is one OR per skill plus one per missing prerequisite.
+    """
+
+    def __init__(self, nodes: Mapping[str, Tuple[Mapping[str, int], Sequence[str]]], skills: Sequence[str] = ()) -> None:
+        names = set(skills)
+        for requirements, _ in nodes.values():
+            names.update(requirements)
+        self.skills: List[str] = sorted(names)
+        self.skill_index = {name: idx for idx, name in enumerate(self.skills)}
+        for node_id, (_, prereqs) in nodes.items():
+            missing = [p for p in prereqs if p not in nodes]
+            if missing:
+                raise ValueError(f"节点 {node_id} 的前置不存在：{', '.join(missing)}")
+        self.order: List[str] = self._toposort(nodes)
+        self.index = {node_id: idx for idx, node_id in enumerate(self.order)}
+        self.all_nodes = (1 << len(self.order)) - 1
+        self._region = 0
+        self._base = 0
+        for k in range(len(self.skills)):
+            self._region |= ((1 << MAX_LEVEL) - 1) << (k * MAX_LEVEL)
+            self._base |= 1 << (k * MAX_LEVEL)
+
+        self.skill_req: List[int] = []
+        self.prereq: List[int] = []
+        self.ancestors: List[int] = []
+        self.dependents: List[int] = [0] * len(self.order)
+        blocked = [[0] * (MAX_LEVEL + 1) for _ in self.skills]
+        for idx, node_id in enumerate(self.order):
+            requirements, prereqs = nodes[node_id]
+            self.skill_req.append(self.skill_mask(requirements))
+            direct = 0
+            closure = 0
+            for parent in prereqs:
+                p = self.index[parent]
+                direct |= 1 << p
+                closure |= (1 << p) | self.ancestors[p]
+                self.dependents[p] |= 1 << idx
+            self.prereq.append(direct)
+            self.ancestors.append(closure)
+            for skill, need in requirements.items():
+                k = self.skill_index[skill]
+                for level in range(min(need, MAX_LEVEL + 1)):
+                    blocked[k][level] |= 1 << idx
+        self._blocked = blocked
+        self._prereq_sources = 0
+        for idx, deps in enumerate(self.dependents):
+            if deps:
+                self._prereq_sources |= 1 << idx
+
+    @staticmethod
+    def _toposort(nodes: Mapping[str, Tuple[Mapping[str, int], Sequence[str]]]) -> List[str]:
+        indegree = {node_id: len(prereqs) for node_id, (_, prereqs) in nodes.items()}
+        children: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        for node_id, (_, prereqs) in nodes.items():
+            for parent in prereqs:
+                children[parent].append(node_id)
+        ready = deque(node_id for node_id, deg in indegree.items() if deg == 0)
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for child in children[node_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if len(order) != len(nodes):
+            raise ValueError("解锁图存在循环依赖")
+        return order
+
+    @classmethod
+    def from_content(cls, training: Sequence[object], gear: Sequence[object], contracts: Sequence[object],
+                     prerequisites: Mapping[str, Sequence[str]], root: str, skills: Sequence[str] = ()) -> "SkillGraph":
+        nodes: Dict[str, Tuple[Mapping[str, int], Sequence[str]]] = {root: ({}, ())}
+        entries = [(m.module_id, {}) for m in training]
+        entries += [(g.item_id, {}) for g in gear]
+        entries += [(c.contract_id, c.requirements) for c in contracts]
+        for node_id, requirements in entries:
+            if node_id in nodes:
+                raise ValueError(f"解锁图节点重复：{node_id}")
+            nodes[node_id] = (requirements, tuple(prerequisites.get(node_id, ())))
+        return cls(nodes, skills)
+
+    # ------------------------------------------------------------------
+    # Encoding
+    def skill_mask(self, levels: Mapping[str, int]) -> int:
+        mask = 0
+        for skill, level in levels.items():
+            k = self.skill_index.get(skill)
+            if k is not None and level > 0:
+                mask |= ((1 << min(level, MAX_LEVEL)) - 1) << (k * MAX_LEVEL)
+        return mask
+
+    def raise_levels(self, mask: int, steps: int = 1) -> int:
+        """Skill mask with every skill ``steps`` levels higher (capped)."""
+        for _ in range(steps):
+            mask = ((mask << 1) | self._base) & self._region
+        return mask
+
+    def node_bits(self, node_ids: Iterable[str]) -> int:
+        bits = 0
+        for node_id in node_ids:
+            idx = self.index.get(node_id)
+            if idx is not None:
+                bits |= 1 << idx
+        return bits
+
+    def ids(self, bits: int) -> List[str]:
+        return [self.order[idx] for idx in iter_bits(bits)]
+
+    # ------------------------------------------------------------------
+    # Per-node checks
+    def meets_skills(self, node_id: str, skill_mask: int, slack: int = 0) -> bool:
+        have = self.raise_levels(skill_mask, slack) if slack else skill_mask
+        return self.skill_req[self.index[node_id]] & ~have == 0
+
+    def can_unlock(self, node_id: str, skill_mask: int, unlocked: int) -> bool:
+        idx = self.index[node_id]
+        return self.skill_req[idx] & ~skill_mask == 0 and self.prereq[idx] & ~unlocked == 0
+
+    def missing_chain(self, node_id: str, unlocked: int) -> List[str]:
+        """Prerequisite nodes (transitively) still locked, in unlock order."""
+        return self.ids(self.ancestors[self.index[node_id]] & ~unlocked)
+
+    # ------------------------------------------------------------------
+    # Whole-graph queries
+    def available(self, levels: Mapping[str, int], unlocked: int) -> int:
+        blocked = self.locked(unlocked)
+        for k, skill in enumerate(self.skills):
+            blocked |= self._blocked[k][min(max(levels.get(skill, 0), 0), MAX_LEVEL)]
+        return self.all_nodes & ~blocked
+
+    def implied_unlocks(self, skill_mask: int) -> int:
+        """Prerequisite chains of every skill-gated node whose thresholds ``skill_mask`` meets."""
+        chains = 0
+        for idx, req in enumerate(self.skill_req):
+            if req and req & ~skill_mask == 0:
+                chains |= self.ancestors[idx]
+        return chains
+
+    def locked(self, unlocked: int) -> int:
+        """Nodes with at least one direct prerequisite outside ``unlocked``."""
+        blocked = 0
+        for idx in iter_bits(self._prereq_sources & ~unlocked):
+            blocked |= self.dependents[idx]
+        return blocked
+
+    def next_unlocks(self, levels: Mapping[str, int], unlocked: int, steps: int = 1) -> int:
+        """Nodes that open up after ``steps`` more levels in any skill or one more unlock round."""
+        now = self.available(levels, unlocked)
+        raised = {skill: levels.get(skill, 0) + steps for skill in self.skills}
+        return self.available(raised, unlocked | now) & ~now & ~unlocked
@@ -0,0 +1,302 @@
+"""Long-session soak harness: drive the engine (or UI) and watch memory with tracemalloc."""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import gc
+import os
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .economy import WorldEconomy
+from .engine import GameEngine
+from .headless import BACKGROUND_KEYS, choose_action
+from .rng import CounterStream, RandomStreams
+
+# Allocations made by the harness itself (snapshot filtering compiles and
+# caches fnmatch patterns) or by the import machinery are not the session's;
+# everything else counts.
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, fnmatch.__file__),
+    tracemalloc.Filter(False, os.path.join(os.path.dirname(re.__file__), "*")),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class SoakReport:
+    """Memory trace of one soak run.
+
+    ``samples`` holds ``(actions, traced_bytes)`` pairs; ``baseline`` is the
+    first sample after warm-up, and ``growth`` is what the last sample added
+    on top of it. ``modules``/``lines`` attribute that growth, largest first.
+    """
+
+    target: str
+    actions: int
+    warmup: int
+    max_growth: int
+    samples: List[Tuple[int, int]] = field(default_factory=list)
+    baseline: int = 0
+    growth: int = 0
+    slope: float = 0.0  # bytes per 1000 actions after warm-up (least squares)
+    modules: List[Tuple[str, int]] = field(default_factory=list)
+    lines: List[Tuple[str, int, int]] = field(default_factory=list)  # (location, size delta, count delta)
+    elapsed: float = 0.0
+    skipped: Optional[str] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.skipped is not None or self.growth <= self.max_growth
+
+    def format(self, top: int = 10) -> str:
+        if self.skipped:
+            return f"[{self.target}] 跳过：{self.skipped}"
+        verdict = "PASS" if self.passed else "FAIL"
+        out = [
+            f"[{self.target}] {verdict} {self.actions} actions in {self.elapsed:.1f}s, "
+            f"baseline {_kib(self.baseline)} after {self.warmup}, growth {_kib(self.growth)} "
+            f"(limit {_kib(self.max_growth)}), slope {self.slope:+.0f} B/1k actions",
+            "  samples: " + " ".join(f"{n}:{_kib(size)}" for n, size in self.samples),
+        ]
+        if self.modules:
+            out.append("  growth by module:")
+            out.extend(f"    {size:+10d} B  {name}" for name, size in self.modules[:top])
+        if self.lines:
+            out.append("  growth by line:")
+            out.extend(f"    {size:+10d} B {count:+6d} blk  {where}" for where, size, count in self.lines[:top])
+        return "\n".join(out)
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f}KiB"
+
+
+def _module_name(filename: str) -> str:
+    """``/…/site-packages/pkg/mod.py`` -> ``pkg.mod``; falls back to the path."""
+    best = ""
+    for entry in sys.path:
+        root = os.path.abspath(entry or os.curdir)
+        if filename.startswith(root + os.sep) and len(root) > len(best):
+            best = root
+    if not best:
+        return filename
+    rel, _ = os.path.splitext(os.path.relpath(filename, best))
+    name = rel.replace(os.sep, ".")
+    return name[:-9] if name.endswith(".__init__") else name
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+
+def _slope(samples: Sequence[Tuple[int, int]]) -> float:
+    if len(samples) < 2:
+        return 0.0
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var = sum((x - mean_x) ** 2 for x, _ in samples)
+    if not var:
+        return 0.0
+    return 1000 * sum((x - mean_x) * (y - mean_y) for x, y in samples) / var
+
+
+def soak(step: Callable[[int], None], actions: int, target: str = "engine", sample_every: int = 5000, warmup: int = 2000,
+         max_growth: int = 256 * 1024, frames: int = 1) -> SoakReport:
+    """Call ``step(i)`` ``actions`` times and trace memory along the way.
+
+    Caches, pools and first-use imports fill up during the first ``warmup``
+    steps; the snapshot taken there (before the first step when ``warmup`` is
+    0) is the baseline. After that the traced
+    total should plateau, so anything the final snapshot holds beyond the
+    baseline is growth and is attributed by module and by line.
+    """
+    if warmup < 0 or actions <= warmup:
+        raise ValueError("行动次数必须大于预热次数，且预热次数不能为负")
+    report = SoakReport(target, actions, warmup, max_growth)
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start(frames)
+    begin = time.perf_counter()
+    try:
+        baseline = _snapshot() if warmup == 0 else None
+        if baseline is not None:
+            report.baseline = sum(stat.size for stat in baseline.statistics("filename"))
+            report.samples.append((0, report.baseline))
+        for done in range(actions):
+            step(done)
+            count = done + 1
+            if count == warmup:
+                baseline = _snapshot()
+                report.baseline = sum(stat.size for stat in baseline.statistics("filename"))
+                report.samples.append((count, report.baseline))
+            elif count > warmup and (count - warmup) % sample_every == 0 or count == actions:
+                size = sum(stat.size for stat in _snapshot().statistics("filename"))
+                report.samples.append((count, size))
+        final = _snapshot()
+    finally:
+        report.elapsed = time.perf_counter() - begin
+        if not started:
+            tracemalloc.stop()
+    report.growth = report.samples[-1][1] - report.baseline
+    report.slope = _slope(report.samples)
+    modules: Dict[str, int] = {}
+    for diff in final.compare_to(baseline, "lineno"):
+        if not diff.size_diff:
+            continue
+        frame = diff.traceback[0]
+        modules[_module_name(frame.filename)] = modules.get(_module_name(frame.filename), 0) + diff.size_diff
+        report.lines.append((f"{frame.filename}:{frame.lineno}", diff.size_diff, diff.count_diff))
+    report.modules = sorted(modules.items(), key=lambda item: -item[1])
+    return report
+
+
+# ----------------------------------------------------------------------
+# Drivers
+def _play(engine: GameEngine, policy: CounterStream) -> None:
+    action = choose_action(engine, policy)
+    if action[0] == "crisis":
+        engine.resolve_crisis(action[1])
+    else:
+        engine.apply_actions([action])
+
+
+def engine_step(seed: int = 0, economy_every: int = 0) -> Callable[[int], None]:
+    """One long career; with ``economy_every`` the engine reports into a shared economy ticked that often."""
+    streams = RandomStreams(seed)
+    policy = streams.stream("policy")
+    economy = WorldEconomy() if economy_every else None
+    engine = GameEngine(seed, economy=economy)
+    engine.create_player(f"soak-{seed}", BACKGROUND_KEYS[seed % len(BACKGROUND_KEYS)])
+
+    def step(i: int) -> None:
+        _play(engine, policy)
+        if economy and (i + 1) % economy_every == 0:
+            economy.tick()
+
+    return step
+
+
+# ``_ensure_game_shell``/``_render_actions`` bind these as button commands, so
+# the shell cannot be driven until the UI defines them.
+UI_REQUIRED = ("_ensure_game_shell", "_render_actions", "_refresh_stats", "_close_overlay",
+               "_save_game", "_load_game_state", "_back_to_menu", "_advance_market")
+# Overlay openers and the builders they hand to ``_spawn_overlay``; an overlay
+# is only exercised when its builder exists.
+UI_OVERLAYS = (
+    ("_open_training_overlay", "_draw_training"),
+    ("_open_contract_overlay", "_draw_contracts"),
+    ("_open_shop_overlay", "_draw_shop"),
+)
+UI_CRISIS_OVERLAY = ("_open_crisis_overlay", "_draw_crisis")
+TERMINAL_LINES = 500
+
+
+def _missing_ui(app_type) -> List[str]:
+    return [name for name in UI_REQUIRED if not hasattr(app_type, name)]
+
+
+def _terminal_append(app, line: str) -> None:
+    """Append to the shell's read-only terminal, keeping the last ``TERMINAL_LINES`` lines."""
+    terminal = app.terminal
+    terminal.configure(state="normal")
+    terminal.insert("end", line + "\n")
+    excess = int(terminal.index("end-1c").split(".")[0]) - TERMINAL_LINES
+    if excess > 0:
+        terminal.delete("1.0", f"{excess + 1}.0")
+    terminal.configure(state="disabled")
+
+
+def ui_step(app, seed: int = 0, overlay_every: int = 7) -> Callable[[int], None]:
+    """Play through a live ``HackerApp``: engine actions, terminal output, rebuilt action cards and overlays."""
+    missing = _missing_ui(type(app))
+    if missing:
+        raise RuntimeError(f"HackerApp 缺少方法：{', '.join(missing)}")
+    policy = RandomStreams(seed).stream("policy")
+    app.engine.create_player(f"soak-{seed}", BACKGROUND_KEYS[seed % len(BACKGROUND_KEYS)])
+    app._ensure_game_shell()
+    app.menu_frame.pack_forget()
+    app.shell.pack(fill="both", expand=True)
+    app.stage = "free"
+    openers = [getattr(app, opener) for opener, builder in UI_OVERLAYS if hasattr(app, builder)]
+    crisis = getattr(app, UI_CRISIS_OVERLAY[0]) if hasattr(app, UI_CRISIS_OVERLAY[1]) else None
+
+    def step(i: int) -> None:
+        engine = app.engine
+        before = len(engine.player.log)
+        _play(engine, policy)
+        log = engine.player.log
+        for line in log[min(before, len(log)):] or log[-1:]:
+            _terminal_append(app, line)
+        app._refresh_stats()
+        app._render_actions()
+        if i % overlay_every == 0:
+            opener = crisis if engine.active_crisis and crisis else (
+                openers[(i // overlay_every) % len(openers)] if openers else None)
+            if opener:
+                opener()
+                app.update_idletasks()
+                app._close_overlay()
+        app.update()
+
+    return step
+
+
+def soak_ui(actions: int, seed: int = 0, **options) -> SoakReport:
+    """UI soak; needs a display (e.g. ``xvfb-run``) and is reported as skipped without one."""
+    target = "ui"
+    warmup = options.get("warmup", 0)
+    try:
+        import tkinter as tk
+        from .ui import HackerApp
+    except ImportError as exc:
+        return SoakReport(target, actions, warmup, 0, skipped=f"tkinter 不可用：{exc}")
+    missing = _missing_ui(HackerApp)
+    if missing:
+        return SoakReport(target, actions, warmup, 0, skipped=f"界面浸泡不受支持，HackerApp 缺少：{', '.join(missing)}")
+    try:
+        app = HackerApp()
+    except tk.TclError as exc:
+        return SoakReport(target, actions, warmup, 0, skipped=f"无法打开显示：{exc}")
+    try:
+        app.withdraw()
+        return soak(ui_step(app, seed), actions, target=target, **options)
+    finally:
+        app.destroy()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="长时间运行内存浸泡测试")
+    parser.add_argument("--actions", type=int, default=100_000)
+    parser.add_argument("--warmup", type=int, default=2000)
+    parser.add_argument("--sample-every", type=int, default=10_000)
+    parser.add_argument("--max-growth-kib", type=float, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--economy-every", type=int, default=50, help="每 N 次行动推进共享经济；0 表示不挂接")
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc 保留的调用栈深度")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--ui", action="store_true", help="同时在虚拟显示下驱动 HackerApp")
+    parser.add_argument("--ui-actions", type=int, default=20_000)
+    args = parser.parse_args(argv)
+    options = dict(sample_every=args.sample_every, warmup=args.warmup,
+                   max_growth=int(args.max_growth_kib * 1024), frames=args.frames)
+    reports = [soak(engine_step(args.seed, args.economy_every), args.actions, **options)]
+    if args.ui:
+        reports.append(soak_ui(args.ui_actions, args.seed, **options))
+    for report in reports:
+        print(report.format(args.top))
+    return 0 if all(report.passed for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Content balance sweeps: grid runs over content fields with an on-disk result cache."""
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .analytics import CareerAggregate, career_stream
+from .content.packs import PACK_KINDS, entry_payload, validate_entry
+from .content.registry import ContentRegistry, ContentStore, EntryPack
+from .engine import CONTENT
+
+CACHE_DIR = Path.home() / ".hacker_sandbox" / "sweeps"
+# Bump when the simulation or the metrics below change meaning, so old cache entries stop matching.
+SWEEP_VERSION = 1
+
+# Content kinds a sweep can patch.
+KINDS = ("training", "contracts", "gear", "crisis", "market")
+BY_ID = {"training": "training_by_id", "contracts": "contract_by_id", "gear": "gear_by_id", "crisis": "crisis_by_id"}
+
+COLUMNS = ("credits_mean", "credits_p50", "credits_p90", "law_watch_mean", "age_mean", "contract_success", "crises_per_career", "crisis_resolve")
+
+Overrides = Dict[str, object]
+
+
+# ----------------------------------------------------------------------
+# Content patching
+def _entry(registry: ContentRegistry, kind: str, entry_id: str) -> object:
+    if kind not in KINDS:
+        raise ValueError(f"未知内容类型：{kind}")
+    if kind == "market":
+        entry = next((trend for trend in registry.market if trend[PACK_KINDS[kind][1]] == entry_id), None)
+    else:
+        entry = getattr(registry, BY_ID[kind]).get(entry_id)
+    if entry is None:
+        raise ValueError(f"{kind} 中不存在 {entry_id}")
+    return entry
+
+
+def _resolve(param: str, entry: Optional[object] = None, registry: Optional[ContentRegistry] = None) -> Tuple[str, str, object, object, str]:
+    """``kind:entry_id.field[.sub...]`` -> (kind, entry_id, entry, container, last key).
+
+    The entry is looked up in ``registry`` (default: the live content)
+    unless one is passed in.
+    """
+    kind, _, path = param.partition(":")
+    entry_id, _, dotted = path.partition(".")
+    keys = dotted.split(".") if dotted else []
+    if not keys:
+        raise ValueError(f"参数缺少字段：{param}")
+    if keys[0] == PACK_KINDS.get(kind, (None, ""))[1]:
+        raise ValueError(f"字段不可扫描：{param}")
+    if entry is None:
+        entry = _entry(registry or CONTENT.current, kind, entry_id)
+    container = entry
+    for key in keys[:-1]:
+        container = _get(container, key)
+    _get(container, keys[-1])
+    return kind, entry_id, entry, container, keys[-1]
+
+
+def _get(container: object, key: str) -> object:
+    if isinstance(container, (list, tuple)):
+        return container[int(key)]
+    if isinstance(container, dict):
+        return container[key]
+    if not hasattr(container, key):
+        raise ValueError(f"未知字段：{key}")
+    return getattr(container, key)
+
+
+def _set(container: object, key: str, value: object) -> None:
+    if isinstance(container, list):
+        container[int(key)] = value
+    elif isinstance(container, dict):
+        container[key] = value
+    else:
+        setattr(container, key, value)
+
+
+def patched(overrides: Mapping[str, object], base: Optional[ContentRegistry] = None) -> ContentStore:
+    """A private content store holding ``base`` (default: the live content) with ``overrides`` applied.
+
+    Patched entries are copies layered over ``base`` the way packs are, so
+    effect programs, the unlock graph and the contract index are derived
+    from the patched values. Each copy is re-validated with the content pack
+    rules, so an out-of-range odd or inverted payout range fails before any
+    simulation. Nothing is published to the process-wide store; engines see
+    the patch only when built with ``GameEngine(content=store)``.
+    """
+    base = base or CONTENT.current
+    copies: Dict[Tuple[str, str], object] = {}
+    for param, value in overrides.items():
+        kind, entry_id = param.partition(":")[0], param.partition(":")[2].partition(".")[0]
+        entry = copies.get((kind, entry_id))
+        if entry is None:
+            entry = copies[kind, entry_id] = copy.deepcopy(_entry(base, kind, entry_id))
+        _, _, _, container, key = _resolve(param, entry)
+        current = _get(container, key)
+        if not isinstance(current, (int, float, list, tuple)) or isinstance(current, bool):
+            raise ValueError(f"字段不可扫描：{param}")
+        if isinstance(current, int) and isinstance(value, float) and value.is_integer():
+            value = int(value)
+        _set(container, key, list(value) if isinstance(current, list) else value)
+    for (kind, entry_id), entry in copies.items():
+        validate_entry(kind, entry_payload(kind, entry), f"{kind}:{entry_id}")
+    if not copies:
+        return ContentStore(base)
+    packs: Dict[str, List[object]] = {}
+    for (kind, _), entry in copies.items():
+        packs.setdefault(kind, []).append(entry)
+    return ContentStore(base.with_packs({kind: [EntryPack(kind, entries)] for kind, entries in packs.items()}, base.version + 1))
+
+
+# ----------------------------------------------------------------------
+# Grid + metrics
+def grid(ranges: Mapping[str, Sequence[object]]) -> List[Overrides]:
+    names = sorted(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(ranges[name] for name in names))]
+
+
+def frange(lo: float, hi: float, step: float) -> List[float]:
+    if step <= 0:
+        raise ValueError("步长必须为正")
+    count = int(round((hi - lo) / step)) + 1
+    return [round(lo + i * step, 10) for i in range(max(0, count))]
+
+
+def point_metrics(aggregate: CareerAggregate) -> Dict[str, float]:
+    summary = aggregate.summary(quantiles=(0.5, 0.9))
+    metrics = summary["metrics"]
+    done = [sum(counts[:2]) for counts in summary["contract_outcomes"].values()]
+    wins = [counts[0] for counts in summary["contract_outcomes"].values()]
+    resolved = summary["crisis_resolved"].values()
+    careers = summary["careers"] or 1
+    return {
+        "credits_mean": metrics["credits"]["mean"],
+        "credits_p50": metrics["credits"]["p50"],
+        "credits_p90": metrics["credits"]["p90"],
+        "law_watch_mean": metrics["law_watch"]["mean"],
+        "age_mean": metrics["age"]["mean"],
+        "contract_success": sum(wins) / sum(done) if sum(done) else 0.0,
+        "crises_per_career": sum(summary["crisis_triggers"].values()) / careers,
+        "crisis_resolve": sum(r[0] for r in resolved) / max(1, sum(sum(r) for r in resolved)),
+    }
+
+
+def point_key(fingerprint: str, overrides: Mapping[str, object], seeds: Sequence[int], steps: int, episodes: int) -> str:
+    spec = {"version": SWEEP_VERSION, "content": fingerprint, "overrides": dict(overrides),
+            "seeds": list(seeds), "steps": steps, "episodes": episodes}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _run_chunk(args: Tuple[int, Overrides, Sequence[int], int, int]) -> Tuple[int, CareerAggregate]:
+    point, overrides, seeds, steps, episodes = args
+    return point, CareerAggregate(sample_size=0).consume(career_stream(seeds, steps, episodes, content=patched(overrides)))
+
+
+# ----------------------------------------------------------------------
+# Sweeps
+def sweep(points: Sequence[Overrides], seeds: Sequence[int], steps: int, episodes: int = 1, workers: int = 1,
+          chunk: int = 32, cache_dir: Optional[Path] = CACHE_DIR) -> List[Dict[str, object]]:
+    """Run every configuration over the same seeds; cached points are not re-simulated.
+
+    Work is split into (point, seed chunk) tasks so one slow configuration
+    does not hold up a worker pool; each task builds its own patched content
+    store and only the partial aggregate comes back.
+    """
+    for overrides in points:  # validate every point before spending any simulation time
+        patched(overrides)
+    fingerprint = CONTENT.current.fingerprint
+    keys = [point_key(fingerprint, overrides, seeds, steps, episodes) for overrides in points]
+    results: Dict[int, Dict[str, float]] = {}
+    if cache_dir is not None:
+        for idx, key in enumerate(keys):
+            path = cache_dir / f"{key}.json"
+            if path.exists():
+                results[idx] = json.loads(path.read_text(encoding="utf-8"))["metrics"]
+    todo = [idx for idx in range(len(points)) if idx not in results]
+    tasks = [(idx, points[idx], seeds[i:i + chunk], steps, episodes) for idx in todo for i in range(0, len(seeds), chunk)]
+    partials = {idx: CareerAggregate(sample_size=0) for idx in todo}
+    if workers <= 1:
+        for task in tasks:
+            idx, partial = _run_chunk(task)
+            partials[idx].merge(partial)
+    else:
+        with mp.get_context().Pool(workers) as pool:
+            for idx, partial in pool.imap_unordered(_run_chunk, tasks):
+                partials[idx].merge(partial)
+    for idx in todo:
+        results[idx] = point_metrics(partials[idx])
+        if cache_dir is not None:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            payload = {"overrides": points[idx], "metrics": results[idx]}
+            (cache_dir / f"{keys[idx]}.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    return [{"overrides": dict(points[idx]), "cached": idx not in partials, **results[idx]} for idx in range(len(points))]
+
+
+def search(param: str, lo: float, hi: float, metric: str, target: float, seeds: Sequence[int], steps: int,
+           iterations: int = 6, base: Optional[Overrides] = None, **options) -> List[Dict[str, object]]:
+    """Bisect one numeric field toward ``metric == target``, assuming the metric is monotonic in it.
+
+    Every probe goes through :func:`sweep`, so probes shared with earlier
+    searches or grids come from the cache.
+    """
+    rows = []
+    edges = sweep([dict(base or {}, **{param: lo}), dict(base or {}, **{param: hi})], seeds, steps, **options)
+    rows.extend(edges)
+    rising = edges[1][metric] >= edges[0][metric]
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        if isinstance(_get(*_resolve(param)[3:]), int):
+            mid = int(round(mid))
+        row = sweep([dict(base or {}, **{param: mid})], seeds, steps, **options)[0]
+        rows.append(row)
+        if (row[metric] < target) == rising:
+            lo = mid
+        else:
+            hi = mid
+    return rows
+
+
+def format_table(rows: Sequence[Mapping[str, object]], columns: Sequence[str] = COLUMNS) -> str:
+    params = sorted({name for row in rows for name in row["overrides"]})
+    header = [name.split(":", 1)[-1] for name in params] + list(columns)
+    lines = [[_cell(row["overrides"].get(name)) for name in params] + [_cell(row[col]) for col in columns] for row in rows]
+    widths = [max(len(header[i]), *(len(line[i]) for line in lines)) if lines else len(header[i]) for i in range(len(header))]
+    out = ["  ".join(text.rjust(width) for text, width in zip(header, widths))]
+    out.extend("  ".join(text.rjust(width) for text, width in zip(line, widths)) for line in lines)
+    return "\n".join(out)
+
+
+def _cell(value: object) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 100 else f"{value:.0f}"
+    if isinstance(value, (list, tuple)):
+        return "-".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+# ----------------------------------------------------------------------
+# CLI
+def parse_param(spec: str) -> Tuple[str, List[object]]:
+    """``kind:id.field=v1,v2`` / ``=lo:hi:step`` / ``=<json list>``."""
+    name, _, values = spec.partition("=")
+    if not values:
+        raise ValueError(f"参数缺少取值：{spec}")
+    if values.startswith("["):
+        return name, json.loads(values)
+    if values.count(":") == 2:
+        return name, frange(*(float(v) for v in values.split(":")))
+    return name, [json.loads(v) for v in values.split(",")]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="内容平衡参数扫描")
+    parser.add_argument("--param", action="append", default=[], help="kind:id.field=v1,v2 | lo:hi:step | JSON 列表")
+    parser.add_argument("--seeds", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=80)
+    parser.add_argument("--episodes", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+    ranges = dict(parse_param(spec) for spec in args.param)
+    rows = sweep(grid(ranges), list(range(args.seeds)), args.steps, args.episodes, args.workers,
+                 cache_dir=None if args.no_cache else CACHE_DIR)
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
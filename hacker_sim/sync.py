@@ -0,0 +1,213 @@
+"""Versioned state-diff sync between an engine and thin clients."""
+from __future__ import annotations
+
+import json
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .compact import OFFSETS, RECORD_FIELDS
+from .engine import GameEngine
+from .scheduler import EventScheduler
+
+LOG_LIMIT = 40  # Player.to_dict keeps the last 40 lines; replicas trim the same way.
+
+# Patch keys (one letter each, JSON with no spaces):
+#   v  version after the patch        b  version the patch applies to
+#   s  [field index, value, ...]      numeric fields by position in compact.RECORD_FIELDS
+#   k  {skill: level}                 skills outside the fixed record layout
+#   l  [line, ...]                    appended log lines
+#   u  [node_id, ...]                 appended unlocked nodes
+#   c  crisis event id or null        m  market index
+#   q  scheduler entries              f  full export_state() payload (resync)
+Patch = Dict[str, object]
+
+
+def encode(patch: Patch) -> bytes:
+    return json.dumps(patch, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode(payload: Union[bytes, str]) -> Patch:
+    return json.loads(payload)
+
+
+class StateDiffer:
+    """Server side: turns engine change events into small versioned patches.
+
+    Field writes arrive through ``GameEngine.subscribe``, so building a patch
+    costs O(changed fields), not O(state). Every ``resync_every`` versions,
+    and whenever the player is replaced, the next payload is a full state.
+    With ``include_log=False`` log lines only travel in full states. Until
+    the engine has a player there is nothing to send.
+    """
+
+    def __init__(self, engine: GameEngine, resync_every: int = 200, include_log: bool = True) -> None:
+        self.engine = engine
+        self.resync_every = resync_every
+        self.include_log = include_log
+        self.version = 0
+        self._dirty: Dict[str, None] = {}
+        self._log: List[str] = []
+        self._crisis_changed = False
+        self._market_changed = False
+        self._needs_full = True
+        self._since_full = 0
+        self._nodes_sent = 0
+        self._schedule_mark: Tuple[Optional[EventScheduler], int] = (None, 0)
+        self._unsubscribe: Optional[Callable[[], None]] = engine.subscribe(self._on_change)
+
+    def close(self) -> None:
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, path: str, old: object, new: object) -> None:
+        if path == "log":
+            if self.include_log:
+                self._log.append(new)
+        elif path == "crisis":
+            self._crisis_changed = True
+        elif path == "market_index":
+            self._market_changed = True
+        elif path == "player":
+            self._needs_full = True
+        else:
+            self._dirty[path] = None
+
+    def _schedule_changed(self) -> bool:
+        scheduler, version = self._schedule_mark
+        current = self.engine.scheduler
+        return scheduler is not current or version != current.version
+
+    def _mark_schedule(self) -> None:
+        scheduler = self.engine.scheduler
+        self._schedule_mark = (scheduler, scheduler.version)
+
+    # ------------------------------------------------------------------
+    def full(self) -> Patch:
+        engine = self.engine
+        if not engine.player:
+            raise RuntimeError("需要先创建角色")
+        self.version += 1
+        self._dirty.clear()
+        self._log.clear()
+        self._crisis_changed = self._market_changed = self._needs_full = False
+        self._since_full = 0
+        self._nodes_sent = len(engine.player.unlocked_nodes)
+        self._mark_schedule()
+        state = engine.export_state()
+        state["crisis"] = engine.active_crisis.event_id if engine.active_crisis else None
+        return {"v": self.version, "f": state}
+
+    def diff(self) -> Optional[Patch]:
+        """Patch since the last payload, a full state when due, or None when nothing changed."""
+        if not self.engine.player:
+            self._needs_full = True
+            return None
+        if self._needs_full or self._since_full >= self.resync_every:
+            return self.full()
+        engine = self.engine
+        player = engine.player
+        patch: Patch = {}
+        if self._dirty:
+            values: List[object] = []
+            extra: Dict[str, int] = {}
+            for path in self._dirty:
+                value = _read(player, path)
+                idx = OFFSETS.get(path)
+                if idx is not None:
+                    values += (idx, value)
+                elif path.startswith("skills."):
+                    extra[path[7:]] = value
+                else:
+                    # Unlisted fields cannot be expressed as a patch.
+                    return self.full()
+            if values:
+                patch["s"] = values
+            if extra:
+                patch["k"] = extra
+            self._dirty.clear()
+        if self._log:
+            patch["l"] = self._log[-LOG_LIMIT:]
+            self._log = []
+        nodes = player.unlocked_nodes
+        if len(nodes) > self._nodes_sent:
+            patch["u"] = nodes[self._nodes_sent:]
+            self._nodes_sent = len(nodes)
+        if self._crisis_changed:
+            patch["c"] = engine.active_crisis.event_id if engine.active_crisis else None
+            self._crisis_changed = False
+        if self._market_changed:
+            patch["m"] = engine.market_index
+            self._market_changed = False
+        if self._schedule_changed():
+            patch["q"] = engine.scheduler.to_list()
+            self._mark_schedule()
+        if not patch:
+            return None
+        patch["b"] = self.version
+        self.version += 1
+        patch["v"] = self.version
+        self._since_full += 1
+        return patch
+
+    def next_payload(self) -> Optional[bytes]:
+        patch = self.diff()
+        return encode(patch) if patch is not None else None
+
+
+def _read(player, path: str) -> object:
+    section, _, name = path.partition(".")
+    if not name:
+        return getattr(player, section)
+    if section == "skills":
+        return player.skills.get(name, 0)
+    return getattr(getattr(player, section), name)
+
+
+class StateReplica:
+    """Client side: an ``export_state()``-shaped dict kept current by patches.
+
+    ``apply`` returns False when a patch does not follow the replica's
+    version (a dropped or reordered message); the client should then ask
+    for a full state.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.state: Optional[dict] = None
+
+    @property
+    def player(self) -> dict:
+        if self.state is None:
+            raise RuntimeError("尚未收到完整状态")
+        return self.state["player"]
+
+    def apply(self, payload: Union[bytes, str, Patch]) -> bool:
+        patch = decode(payload) if isinstance(payload, (bytes, str)) else payload
+        if "f" in patch:
+            self.state = patch["f"]
+            self.version = patch["v"]
+            return True
+        if self.state is None or patch.get("b") != self.version:
+            return False
+        player = self.state["player"]
+        values = patch.get("s", ())
+        for pos in range(0, len(values), 2):
+            section, _, name = RECORD_FIELDS[values[pos]].partition(".")
+            if name:
+                player[section][name] = values[pos + 1]
+            else:
+                player[section] = values[pos + 1]
+        player["skills"].update(patch.get("k", {}))
+        if "l" in patch:
+            log = player["log"]
+            log.extend(patch["l"])
+            del log[:-LOG_LIMIT]
+        player["unlocked_nodes"].extend(patch.get("u", ()))
+        if "c" in patch:
+            self.state["crisis"] = patch["c"]
+        if "m" in patch:
+            self.state["market_index"] = patch["m"]
+        if "q" in patch:
+            self.state["schedule"] = patch["q"]
+        self.version = patch["v"]
+        return True
@@ -45,6 +45,7 @@ class HackerApp(tk.Tk):
 
         self._init_styles()
         self._build_start_menu()
+        self.engine.subscribe(self._on_engine_change)
 
     # ------------------------------------------------------------------
     def _init_styles(self) -> None:
@@ -230,6 +231,47 @@ class HackerApp(tk.Tk):
         ).pack(fill=tk.X)
         ttk.Button(self.sidebar, text="接入节点", style="Glow.TButton", command=self._create_player).pack(fill=tk.X, pady=(8, 0))
 
+    # ------------------------------------------------------------------
+    # Sidebar updates are driven by the engine change stream; only the label
+    # whose field changed is touched.
+    def _on_engine_change(self, path: str, old: object, new: object) -> None:
+        if path == "player":
+            self._refresh_stats()
+            return
+        section, _, key = path.rpartition(".")
+        if section in ("attributes", "resources") and key in self.stat_vars:
+            self.stat_vars[key].set(str(new))
+        elif section == "reputation" and key in self.reputation_vars:
+            self.reputation_vars[key].set(str(new))
+        elif path in ("day", "hour"):
+            self._refresh_clock()
+        elif path == "age" and self.age_label:
+            self.age_label.configure(text=f"Age {new}")
+
+    def _refresh_stats(self) -> None:
+        player = self.engine.player
+        if not player:
+            for var in (*self.stat_vars.values(), *self.reputation_vars.values()):
+                var.set("-")
+            if self.status_label:
+                self.status_label.configure(text="未登录")
+            return
+        for key, var in self.stat_vars.items():
+            section = player.attributes if hasattr(player.attributes, key) else player.resources
+            var.set(str(getattr(section, key)))
+        for key, var in self.reputation_vars.items():
+            var.set(str(getattr(player.reputation, key)))
+        if self.status_label:
+            self.status_label.configure(text=f"{player.codename} · {BACKGROUNDS[player.background]['label']}")
+        if self.age_label:
+            self.age_label.configure(text=f"Age {player.age}")
+        self._refresh_clock()
+
+    def _refresh_clock(self) -> None:
+        player = self.engine.player
+        if player and self.time_label:
+            self.time_label.configure(text=f"Day {player.day} / {player.hour:02d}:00")
+
     # ------------------------------------------------------------------
     def _render_actions(self) -> None:
         if not self.action_frame:
@@ -292,7 +334,7 @@ class HackerApp(tk.Tk):
         contract_box = ttk.Frame(subframe, style="Card.TFrame", padding=6)
         contract_box.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         ttk.Label(contract_box, text="推荐契约", style="Panel.TLabel").pack(anchor=tk.W)
-        for contract in self.engine.list_contracts()[:3]:
+        for contract in self.engine.query_contracts(limit=3).items:
             ttk.Label(contract_box, text=f"- {contract.name} [{contract.risk}]", style="Panel.TLabel").pack(anchor=tk.W)
         self.preview_children = [container]
 
@@ -0,0 +1,31 @@
+import pytest
+
+from hacker_sim.analytics import Reservoir
+
+
+def test_zero_sized_reservoir_only_counts():
+    empty = Reservoir(0)
+    for i in range(5):
+        empty.offer(f"k{i}", {"i": i})
+    other = Reservoir(0)
+    other.offer("x", {})
+    assert empty.merge(other).items() == [] and empty.seen == 6
+    with pytest.raises(ValueError):
+        Reservoir(-1)
+
+
+def test_merge_matches_single_stream():
+    whole, left, right = Reservoir(4), Reservoir(4), Reservoir(4)
+    for i in range(40):
+        whole.offer(f"k{i}", {"i": i})
+        (left if i % 3 else right).offer(f"k{i}", {"i": i})
+    assert left.merge(right).items() == whole.items()
+
+
+def test_duplicate_keys_are_sampled_once():
+    sample = Reservoir(4)
+    sample.offer("a", {"x": 1})
+    sample.offer("a", {"x": 2})
+    other = Reservoir(4)
+    other.offer("a", {"x": 3})
+    assert sample.merge(other).items() == [{"x": 1}] and sample.seen == 3
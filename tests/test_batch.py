@@ -0,0 +1,36 @@
+from hacker_sim.engine import GameEngine
+
+
+def _engine():
+    engine = GameEngine(2)
+    engine.create_player("batch", "analyst")
+    engine.player.resources.credits = 10 ** 6
+    return engine
+
+
+def test_malformed_actions_are_rejected_in_place():
+    engine = _engine()
+    batch = engine.apply_actions([("train", "foundations"), ("contract",), (), None, ("gear", ["x"]), ("market",)])
+    assert list(batch.status[1:5]) == [-1, -1, -1, -1]
+    assert batch.status[0] in (0, 1) and batch.status[5] == 1
+
+
+def test_rejected_actions_do_not_age_the_player():
+    engine = _engine()
+    before = engine.player.events_since_age, engine.player.age
+    engine.apply_actions([("train", "unknown")] * 30, checkpoint_every=5)
+    assert (engine.player.events_since_age, engine.player.age) == before
+
+
+def test_batch_matches_per_call_api():
+    batch_engine, call_engine = _engine(), _engine()
+    actions = [("train", "foundations"), ("gear", "rig_basic"), ("train", "web_scope"), ("contract", "bb_light")] * 3
+    batch = batch_engine.apply_actions(actions)
+    for action, status in zip(actions, batch.status):
+        try:
+            {"train": call_engine.run_training, "gear": call_engine.purchase_gear,
+             "contract": call_engine.start_contract}[action[0]](action[1])
+        except (ValueError, RuntimeError):
+            assert status == -1
+    assert batch_engine.player.resources.credits == call_engine.player.resources.credits
+    assert batch_engine.player.skills == call_engine.player.skills
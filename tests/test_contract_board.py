@@ -0,0 +1,44 @@
+import pytest
+
+from hacker_sim.engine import GameEngine
+
+
+def _engine(**skills):
+    engine = GameEngine(4)
+    engine.create_player("board", "freelancer")
+    engine.player.age = 20
+    engine.player.skills.update(skills)
+    for node in ("foundations", "web_scope", "bin_boot", "cloud_core"):
+        engine.player.unlocked_nodes.append(node)
+    return engine
+
+
+@pytest.mark.parametrize("skills", [{}, {"web": 3, "binary": 2}, {"binary": 5, "cloud": 5, "foundation": 5}])
+def test_visible_query_matches_list_contracts(skills):
+    engine = _engine(**skills)
+    listed = {c.contract_id for c in engine.list_contracts()}
+    for sort in ("payout", "risk_adjusted", "ev"):
+        page = engine.query_contracts(sort=sort, limit=len(engine.content.contracts))
+        assert {c.contract_id for c in page.items} == listed
+        assert page.next_offset is None
+    engine.player.reputation.law_watch = 50
+    listed = {c.contract_id for c in engine.list_contracts(legality="illegal")}
+    assert {c.contract_id for c in engine.query_contracts(legality="illegal", limit=100).items} == listed
+
+
+def test_ev_reranks_each_payout_page_by_chance():
+    engine = _engine(web=6, binary=0, cloud=6, foundation=0, social=4, mobile=4)
+    snapshot = engine._market_snapshot()
+    factor = {"lawful": snapshot.lawful_multiplier, "illegal": snapshot.underground_multiplier}
+
+    def ev(contract):
+        return engine._contract_chance(contract) * sum(contract.payout_range) / 2 * factor[contract.legality]
+
+    for offset in (0, 3):
+        by_payout = engine.query_contracts(limit=3, offset=offset, max_gap=None)
+        by_ev = engine.query_contracts(sort="ev", limit=3, offset=offset, max_gap=None)
+        assert sorted(c.contract_id for c in by_ev.items) == sorted(c.contract_id for c in by_payout.items)
+        assert [ev(c) for c in by_ev.items] == sorted((ev(c) for c in by_ev.items), reverse=True)
+        assert by_ev.next_offset == by_payout.next_offset
+    assert engine.query_contracts(sort="ev", limit=2, max_gap=None).items[0].contract_id == "datavault"
+    assert engine.query_contracts(limit=2, max_gap=None).items[0].contract_id == "zero_drop"
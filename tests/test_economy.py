@@ -0,0 +1,29 @@
+from hacker_sim.economy import WorldEconomy
+from hacker_sim.engine import GameEngine
+
+
+def test_session_market_actions_leave_the_shared_trend_to_the_host():
+    economy = WorldEconomy()
+    engine = GameEngine(1, economy=economy)
+    engine.create_player("eco", "analyst")
+    version = economy.snapshot.version
+    engine.advance_market()
+    engine.apply_actions([("market",)])
+    assert engine.market_index == 0
+    assert economy.snapshot.trend_index == 0 and economy.snapshot.version == version
+    assert any(line.endswith(economy.trends[0]["name"]) for line in engine.player.log)
+    economy.set_trend(len(economy.trends) - 1)
+    assert engine._crisis_condition("market_high")
+
+
+def test_contract_reads_one_economy_snapshot():
+    economy = WorldEconomy()
+    engine = GameEngine(1, economy=economy)
+    engine.create_player("eco", "analyst")
+    contract = engine.content.contract_by_id["datavault"]
+    engine.player.reputation.law_watch = 10
+    calm = engine._contract_chance(contract, economy.snapshot)
+    economy.report_many(["datavault"] * 200)
+    crowded = economy.tick()
+    assert crowded.pressure > 0
+    assert engine._contract_chance(contract, crowded) < calm
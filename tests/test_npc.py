@@ -0,0 +1,61 @@
+import pytest
+
+from hacker_sim import sweep
+from hacker_sim.engine import CONTENT, GameEngine
+from hacker_sim.npc import PolicyGrid, RivalPolicy, solve
+
+
+def _grid(registry):
+    return PolicyGrid.for_content(registry, skill_caps={"foundation": 3, "web": 0, "binary": 1, "mobile": 0, "social": 0, "cloud": 1},
+                                  credits=(0, 5400), law_watch=(0, 41))
+
+
+@pytest.fixture(scope="module")
+def policy():
+    registry = CONTENT.current
+    return solve(_grid(registry), tolerance=0.5, max_iterations=12, content=registry)[0]
+
+
+def test_table_never_picks_locked_actions(policy):
+    grid = policy.grid
+    registry = CONTENT.current
+    per_unlock = grid.size // len(grid.unlock_sets)
+    for state, choice in enumerate(policy.table):
+        action = policy.actions[choice]
+        if action[0] in ("train", "contract", "gear"):
+            unlocked = grid.unlock_sets[state // per_unlock]
+            needs = grid.gate_mask(registry.prerequisites.get(action[1], ()))
+            assert needs & ~unlocked == 0, (state, action)
+
+
+def test_rivals_play_without_rejections(policy):
+    for seed in range(8):
+        engine = GameEngine(seed)
+        engine.create_player(f"rival-{seed}", "nomad")
+        for _ in range(40):
+            action = policy.act(engine)
+            if action[0] == "train":
+                engine.run_training(action[1])
+            elif action[0] == "contract":
+                engine.start_contract(action[1])
+            elif action[0] == "gear":
+                engine.purchase_gear(action[1])
+            elif action[0] == "crisis":
+                engine.resolve_crisis(action[1])
+            else:
+                engine.advance_market()
+        assert len(engine.player.unlocked_nodes) > 1
+
+
+def test_solve_pins_one_content_version(tmp_path):
+    store = sweep.patched({"contracts:bb_light.payout_range": [10, 20]})
+    registry = store.current
+    solved, stats = solve(_grid(registry), tolerance=5.0, max_iterations=2, content=registry)
+    assert solved.fingerprint == registry.fingerprint != CONTENT.current.fingerprint
+    assert stats.states == solved.grid.size
+    path = tmp_path / "rival.bin"
+    solved.save(path)
+    with pytest.raises(ValueError):
+        RivalPolicy.load(path)
+    loaded = RivalPolicy.load(path, check_content=False)
+    assert loaded.grid == solved.grid and loaded.table == solved.table
@@ -0,0 +1,33 @@
+from hacker_sim.content import packs
+from hacker_sim.content.registry import load_builtin
+
+
+def test_cache_key_covers_validation_rules(tmp_path, monkeypatch):
+    source = tmp_path / "contracts.json"
+    packs.export_pack("contracts", load_builtin(1).contracts[:2], source)
+    cache = tmp_path / "cache"
+    seen = []
+
+    def validator(kind, entries):
+        seen.append(len(entries))
+
+    first = packs.load_pack(source, cache_dir=cache)
+    assert packs.load_pack(source, cache_dir=cache).path == first.path
+    packs.load_pack(source, cache_dir=cache, validator=validator)
+    assert seen == [2]
+    monkeypatch.setattr(packs, "SCHEMA_VERSION", packs.SCHEMA_VERSION + 1)
+    assert packs.load_pack(source, cache_dir=cache).path != first.path
+    assert len(list(cache.iterdir())) == 3
+
+
+def test_csv_pack_with_empty_cells(tmp_path):
+    source = tmp_path / "contracts_extra.csv"
+    source.write_text(
+        "contract_id,name,legality,risk,payout_range,requirements,description\n"
+        'csv_job,CSV Job,lawful,low,"[100, 200]","{""web"": 1}",\n',
+        encoding="utf-8",
+    )
+    pack = packs.load_pack(source, cache_dir=tmp_path / "cache")
+    contract = pack.get("csv_job")
+    assert contract.description == "" and contract.requirements == {"web": 1}
+    assert list(contract.payout_range) == [100, 200]
@@ -0,0 +1,24 @@
+from hacker_sim.compact import CompactPlayer
+from hacker_sim.population import SharedPopulation, seed_slice, step_slice
+
+
+def test_unlocks_persist_in_shared_rows_across_rounds():
+    with SharedPopulation(2) as population:
+        seed_slice(population.name, 2, 0, 2, 7)
+        assert list(population.player(0).unlocked_nodes) == ["training_intro"]
+        population.player(1).unlocked_nodes.append("foundations")
+        assert "foundations" in population.player(1).unlocked_nodes
+        step_slice(population.name, 2, 0, 2, 40, 7, 0)
+        first = [set(population.player(idx).unlocked_nodes) for idx in range(2)]
+        assert all(len(nodes) > 1 for nodes in first)
+        step_slice(population.name, 2, 0, 2, 40, 7, 1)
+        assert all(first[idx] <= set(population.player(idx).unlocked_nodes) for idx in range(2))
+
+
+def test_compact_unlocks_round_trip_with_pack_nodes():
+    player = CompactPlayer("c", "nomad")
+    player.unlocked_nodes.extend(["pack_node", "bin_boot", "pack_node"])
+    assert len(player.unlocked_nodes) == 3 and "pack_node" in player.unlocked_nodes
+    restored = CompactPlayer.from_dict(player.to_dict())
+    assert restored.unlocked_nodes == ["training_intro", "bin_boot", "pack_node"]
+    assert player.to_player().unlocked_nodes == ["training_intro", "bin_boot", "pack_node"]
@@ -0,0 +1,38 @@
+from dataclasses import replace
+
+from hacker_sim.content.packs import export_pack, load_pack_dir
+from hacker_sim.content.registry import LayeredSequence, load_builtin
+
+
+def _eager(base, packs):
+    merged = list(base)
+    position = {c.contract_id: i for i, c in enumerate(merged)}
+    for pack in packs:
+        for entry in pack:
+            if entry.contract_id in position:
+                merged[position[entry.contract_id]] = entry
+            else:
+                position[entry.contract_id] = len(merged)
+                merged.append(entry)
+    return merged
+
+
+def test_packs_overlay_builtin_contracts_lazily(tmp_path):
+    base = load_builtin(1)
+    first, second = base.contracts[0], base.contracts[1]
+    pack_dir = tmp_path / "packs"
+    pack_dir.mkdir()
+    export_pack("contracts", [replace(first, name="A1"), replace(second, contract_id="new_a", name="NA")], pack_dir / "contracts_a.json")
+    export_pack("contracts", [replace(second, contract_id="new_b"), replace(first, name="B1"),
+                              replace(second, contract_id="new_a", name="NA2")], pack_dir / "contracts_b.json")
+    packs = load_pack_dir(pack_dir, tmp_path / "cache")
+    registry = base.with_packs(packs, 2)
+    assert isinstance(registry.contracts, LayeredSequence)
+    expected = _eager(base.contracts, packs["contracts"])
+    assert [c.contract_id for c in registry.contracts] == [c.contract_id for c in expected]
+    assert [c.name for c in registry.contracts] == [c.name for c in expected]
+    assert registry.contracts[0].name == "B1" and registry.contracts[-1].contract_id == "new_b"
+    assert registry.contract_by_id["new_a"].name == "NA2"
+    assert "new_b" in registry.contract_by_id and "missing" not in registry.contract_by_id
+    assert registry.effects is base.effects
+    assert registry.graph.index["new_b"] >= 0
@@ -0,0 +1,51 @@
+import pytest
+
+from hacker_sim.engine import GameEngine
+from hacker_sim.scheduler import EventScheduler
+
+
+def test_recurring_event_keeps_its_handle():
+    scheduler = EventScheduler()
+    rent = scheduler.schedule(10, "cost", {"amount": 5}, every=4)
+    fired = [due for due, _ in scheduler.pop_due(20)]
+    assert fired == [10, 14, 18]
+    assert scheduler.pending() == [rent] and rent.due == 22
+    scheduler.cancel(rent)
+    assert len(scheduler) == 0 and scheduler.pending() == []
+    assert list(scheduler.pop_due(100)) == []
+
+
+def test_cancel_after_one_shot_fired_is_noop():
+    scheduler = EventScheduler()
+    once = scheduler.schedule(1, "market")
+    other = scheduler.schedule(5, "market")
+    assert [event for _, event in scheduler.pop_due(2)] == [once]
+    scheduler.cancel(once)
+    scheduler.cancel(once)
+    assert len(scheduler) == 1 and scheduler.pending() == [other]
+
+
+def test_engine_rent_stops_after_cancel():
+    engine = GameEngine(seed=1)
+    engine.create_player("t", "analyst")
+    rent = engine.schedule_event("cost", in_hours=1, every=1, amount=5)
+    start = engine.player.resources.credits
+    engine.wait(3)
+    assert engine.player.resources.credits == start - 15
+    engine.scheduler.cancel(rent)
+    engine.wait(4)
+    assert engine.player.resources.credits == start - 15
+    assert len(engine.scheduler) == 0
+
+
+def test_crisis_event_id_checked_when_scheduled():
+    engine = GameEngine(seed=1)
+    engine.create_player("t", "analyst")
+    for payload in ({}, {"event_id": "no_such_crisis"}):
+        with pytest.raises(ValueError):
+            engine.schedule_event("crisis", in_hours=1, **payload)
+    assert len(engine.scheduler) == 0
+    event_id = engine.content.crisis[0].event_id
+    engine.schedule_event("crisis", in_hours=1, event_id=event_id)
+    engine.wait(1)
+    assert engine.active_crisis.event_id == event_id
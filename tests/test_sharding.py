@@ -0,0 +1,38 @@
+import pytest
+
+from hacker_sim import sharding
+
+
+def _failing_import(bundle):
+    raise RuntimeError("import failed")
+
+
+def test_failed_move_keeps_sessions_on_old_shard(monkeypatch):
+    monkeypatch.setattr(sharding, "_import_session", _failing_import)
+    with sharding.ShardRouter(workers=1, context="fork") as router:
+        sessions = [router.open_session(f"s{i}", "analyst", seed=i) for i in range(24)]
+        with pytest.raises(RuntimeError):
+            router.add_worker()
+        assert {router.shard_of(sid) for sid in sessions} == {"w0"}
+        for sid in sessions:
+            assert router.call(sid, "list_gear")
+
+
+def test_sessions_survive_rebalance():
+    with sharding.ShardRouter(workers=1, context="fork") as router:
+        sessions = [router.open_session(f"s{i}", "analyst", seed=i) for i in range(24)]
+        router.add_worker()
+        assert len({router.shard_of(sid) for sid in sessions}) == 2
+        assert router.metrics()["totals"]["sessions"] == len(sessions)
+        router.remove_worker("w0")
+        assert router.metrics()["totals"]["sessions"] == len(sessions)
+        assert all(router.call(sid, "export_state")["player"]["codename"] == sid for sid in sessions)
+
+
+def test_import_maps_crisis_through_live_content():
+    engine = sharding.GameEngine(3)
+    engine.create_player("c", "analyst")
+    engine.schedule_event("crisis", in_hours=1, event_id="law_trace")
+    engine.wait(2)
+    moved = sharding._import_session(sharding._export_session(engine))
+    assert moved.active_crisis is moved.content.crisis_by_id["law_trace"]
@@ -0,0 +1,26 @@
+import pytest
+
+from hacker_sim.soak import UI_REQUIRED, soak, soak_ui
+
+
+def test_soak_without_warmup_uses_initial_baseline():
+    held = []
+    report = soak(lambda i: held.append(bytearray(64)), 40, sample_every=10, warmup=0, max_growth=1 << 20)
+    assert report.samples[0][0] == 0 and report.samples[-1][0] == 40
+    assert report.growth > 0 and report.passed
+
+
+def test_soak_rejects_bad_warmup():
+    with pytest.raises(ValueError):
+        soak(lambda i: None, 10, warmup=10)
+    with pytest.raises(ValueError):
+        soak(lambda i: None, 10, warmup=-1)
+
+
+def test_ui_soak_reports_missing_hooks():
+    tk = pytest.importorskip("tkinter")
+    del tk
+    from hacker_sim.ui import HackerApp
+    report = soak_ui(10, warmup=1)
+    if any(not hasattr(HackerApp, name) for name in UI_REQUIRED):
+        assert report.skipped and "HackerApp" in report.skipped and report.passed
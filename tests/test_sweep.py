@@ -0,0 +1,30 @@
+from hacker_sim import sweep
+from hacker_sim.engine import CONTENT, GameEngine
+from hacker_sim.headless import run_career
+
+
+def test_overrides_stay_in_a_private_store():
+    live = CONTENT.current
+    original = live.contract_by_id["bb_light"].payout_range
+    store = sweep.patched({"contracts:bb_light.payout_range": [10, 20], "training:foundations.skill_gain.foundation": 3})
+    engine = GameEngine(content=store)
+    assert engine.content.contract_by_id["bb_light"].payout_range == [10, 20]
+    assert engine.content.training_by_id["foundations"].skill_gain["foundation"] == 3
+    assert engine.content.effects.training["foundations"] != live.effects.training["foundations"]
+    assert store.current.fingerprint != live.fingerprint
+    assert CONTENT.current is live and live.contract_by_id["bb_light"].payout_range == original
+    assert GameEngine().content is live
+
+
+def test_run_career_plays_on_the_given_store():
+    store = sweep.patched({"contracts:bb_light.payout_range": [10, 20]})
+    assert list(run_career(0, 30, content=sweep.patched({}))) == list(run_career(0, 30))
+    assert list(run_career(0, 30, content=store)) != list(run_career(0, 30))
+
+
+def test_sweep_points_differ_by_override():
+    live = CONTENT.current
+    rows = sweep.sweep([{"contracts:bb_light.payout_range": [10, 20]}, {"contracts:bb_light.payout_range": [5000, 9000]}],
+                       seeds=[0, 1, 2], steps=30, cache_dir=None)
+    assert rows[0]["credits_mean"] < rows[1]["credits_mean"]
+    assert CONTENT.current is live
@@ -0,0 +1,29 @@
+import pytest
+
+from hacker_sim.engine import GameEngine
+from hacker_sim.sync import StateDiffer, StateReplica
+
+
+def test_no_player_sends_nothing_until_created():
+    engine = GameEngine(1)
+    differ = StateDiffer(engine)
+    assert differ.diff() is None
+    with pytest.raises(RuntimeError):
+        differ.full()
+    engine.create_player("sync", "analyst")
+    assert "f" in differ.diff()
+
+
+def test_schedule_swap_with_same_size_and_head_is_sent():
+    engine = GameEngine(1)
+    engine.create_player("sync", "analyst")
+    differ, replica = StateDiffer(engine), StateReplica()
+    engine.schedule_event("market", in_hours=5)
+    later = engine.schedule_event("market", in_hours=50)
+    assert replica.apply(differ.diff())
+    engine.scheduler.cancel(later)
+    engine.schedule_event("market", in_hours=80)
+    patch = differ.diff()
+    assert patch is not None and "q" in patch
+    assert replica.apply(patch)
+    assert replica.state["schedule"] == engine.scheduler.to_list()
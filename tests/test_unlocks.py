@@ -0,0 +1,70 @@
+import pytest
+
+from hacker_sim.engine import GameEngine
+
+
+def _engine():
+    engine = GameEngine(1)
+    engine.create_player("unlock", "analyst")
+    engine.player.resources.credits = 10 ** 6
+    return engine
+
+
+def test_actions_gated_on_prerequisites():
+    engine = _engine()
+    with pytest.raises(RuntimeError):
+        engine.run_training("bin_boot")
+    batch = engine.apply_actions([("train", "bin_boot"), ("gear", "forge_lab")])
+    assert list(batch.status) == [-1, -1]
+    engine.player.unlocked_nodes.append("foundations")
+    assert "bin_boot" in engine.available_nodes()
+    assert engine.query_contracts(max_gap=None, visible_only=False).items
+    assert "cloud_guard" not in [c.contract_id for c in engine.query_contracts(max_gap=None, visible_only=False).items]
+
+
+def test_purchases_unlock_and_repeatable_nodes_stay_available():
+    engine = _engine()
+    engine.purchase_gear("rig_basic")
+    assert "rig_basic" in engine.player.unlocked_nodes
+    assert "rig_basic" in engine.available_nodes()
+    engine.purchase_gear("rig_basic")
+
+
+def test_cached_unlock_and_skill_bits_follow_the_player():
+    engine = _engine()
+    graph = engine.content.graph
+    assert engine._unlock_bits() == graph.node_bits(["training_intro"])
+    engine.player.unlocked_nodes.append("foundations")
+    assert engine.prerequisites_met("bin_boot")
+    engine._unlock("bin_boot")
+    assert engine._unlock_bits() == graph.node_bits(["training_intro", "foundations", "bin_boot"])
+    assert engine.prerequisites_met("zero_drop") and not engine.prerequisites_met("cloud_core")
+    contract = engine.content.contract_by_id["zero_drop"]
+    engine.player.skills.update(dict.fromkeys(contract.requirements, 0))
+    engine.player.skills["foundation"] = 0
+    engine._pin()
+    assert not engine._contract_visible(contract)
+    engine.player.skills.update(contract.requirements)
+    engine.player.age = 20
+    engine._pin()
+    assert engine._contract_visible(contract)
+    engine.player = type(engine.player)(codename="fresh", background="analyst")
+    assert engine._unlock_bits() == graph.node_bits(["training_intro"])
+
+
+def test_import_backfills_prerequisites_for_veteran_saves():
+    veteran = _engine()
+    veteran.player.age = 30
+    veteran.player.skills.update(binary=4, cloud=4, foundation=4, web=4)
+    payload = veteran.export_state()
+    assert payload["player"]["unlocked_nodes"] == ["training_intro"]
+    engine = GameEngine(2)
+    engine.import_state(payload)
+    assert {"foundations", "web_scope", "bin_boot", "cloud_core"} <= set(engine.player.unlocked_nodes)
+    assert engine.prerequisites_met("zero_drop") and engine.prerequisites_met("cloud_guard")
+    engine.start_contract("zero_drop")
+    engine.start_contract("cloud_guard")
+    fresh = _engine()
+    restored = GameEngine(3)
+    restored.import_state(fresh.export_state())
+    assert restored.player.unlocked_nodes == ["training_intro"]